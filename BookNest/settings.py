@@ -71,6 +71,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -212,6 +213,112 @@ ELASTICSEARCH_DSL = {
         'hosts': 'http://127.0.0.1:9200',
     },
 }
+# Consecutive Elasticsearch connection failures or 5xx responses after which a worker
+# process stops sending search requests, and the seconds before it sends one probe request
+ELASTICSEARCH_BREAKER_FAILURE_THRESHOLD = 3
+ELASTICSEARCH_BREAKER_RESET_SECONDS = 30
+# Documents per bulk request and parallel bulk request threads of the index rebuild
+ELASTICSEARCH_BULK_CHUNK_SIZE = 500
+ELASTICSEARCH_BULK_THREAD_COUNT = 4
+# Minimum fraction of the books a rebuilt index must hold before the alias is switched to
+# it; a rebuild with any bulk indexing errors is never switched to
+ELASTICSEARCH_REBUILD_MIN_SUCCESS_RATE = 0.99
+
+
+# Cache
+# Response caches are invalidated from Celery workers and the recommendation queue's drain
+# flag is released by them, so production needs a cache shared between processes; without
+# REDIS_CACHE_URL a per-process local-memory cache is used
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    } if REDIS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds a page of book search results is served from the cache as fresh, and the further
+# seconds it is still served while being refreshed in the background; pages are also
+# invalidated as soon as one of their books changes
+BOOK_SEARCH_CACHE_TTL = 60
+BOOK_SEARCH_CACHE_STALE_TTL = 5 * 60
+# Serve Elasticsearch search results straight from the indexed documents; False re-reads
+# the books from the database and serializes them with BookSerializer
+BOOK_SEARCH_RESULTS_FROM_INDEX = True
+
+
+# Recommendation engine
+# Maximum number of trained recommendation models kept in memory per worker process
+RECOMMENDATION_MODEL_CACHE_SIZE = 2
+# Number of similar books precomputed per book for the similar books endpoint
+RECOMMENDATION_SIMILAR_ITEMS_K = 50
+# Candidates retrieved from the IVF index and re-scored per single-user recommendation;
+# 0 disables approximate retrieval and scores the whole catalogue
+RECOMMENDATION_ANN_CANDIDATES = 0
+# Number of IVF clusters (None: 4 * sqrt(number of books))
+RECOMMENDATION_ANN_LISTS = None
+# Books kept per cold-start popularity ranking (overall, per genre, per profile interest)
+RECOMMENDATION_POPULARITY_TOP_N = 200
+# Weight of the global mean in the Bayesian average (None: mean number of ratings per book)
+RECOMMENDATION_POPULARITY_PRIOR_WEIGHT = None
+# Seconds a cached recommendations feed page is kept; pages are invalidated whenever
+# the user's recommendations are regenerated, so this only bounds memory use
+RECOMMENDATION_FEED_CACHE_TIMEOUT = 60 * 60
+# Users with at least this many ratings get their recommendations refreshed after rating
+RECOMMENDATION_RATING_THRESHOLD = 22
+# Rating events for a user are coalesced until the user has been quiet for this long
+RECOMMENDATION_QUEUE_DEBOUNCE_SECONDS = 30
+# Maximum number of queued users refreshed per worker batch
+RECOMMENDATION_QUEUE_BATCH_SIZE = 500
+# Queue entries claimed by a worker longer ago than this are treated as abandoned (worker
+# killed mid-batch) and claimed again
+RECOMMENDATION_QUEUE_CLAIM_TIMEOUT_SECONDS = 15 * 60
+# Minimum metric values (maximum for rmse/mae) a model needs to be activated,
+# e.g. {'holdout_ndcg_at_10': 0.02}; holdout_ metrics come from the time-based offline evaluation
+RECOMMENDATION_ACTIVATION_THRESHOLDS = {}
+# KNN implementation: 'sparse' keeps the top-k neighbours per user and computes them across
+# all cores; 'surprise' builds Surprise's dense user x user similarity matrix on one core
+RECOMMENDATION_KNN_BACKEND = 'sparse'
+# Interaction weights of the implicit-feedback (ALS) model: a rating counts rate / 5 times
+# 'rating', a review 'review' and a reading-list entry the weight of the list type
+RECOMMENDATION_IMPLICIT_WEIGHTS = {
+    'rating': 1.0,
+    'review': 2.0,
+    'done': 3.0,
+    'doing': 2.0,
+    'todo': 1.0,
+    'custom': 1.0,
+}
+# Age in days at which an interaction counts half as much (None disables time decay)
+RECOMMENDATION_IMPLICIT_HALF_LIFE_DAYS = 365
+# Train from the columnar ratings snapshot under MEDIA_ROOT, refreshed with only the
+# new and changed ratings, instead of reading the whole ratings table every time
+RECOMMENDATION_USE_RATINGS_SNAPSHOT = True
+# Ratings created this long before the last snapshot refresh are re-read, to catch
+# rows whose transaction committed after the refresh
+RECOMMENDATION_SNAPSHOT_OVERLAP_SECONDS = 300
+# Days rating change-log rows are kept; older snapshots are rebuilt from scratch
+RECOMMENDATION_SNAPSHOT_LOG_RETENTION_DAYS = 7
+# Seconds a worker keeps the A/B traffic split (models with a traffic_weight alongside the
+# active one) before re-reading it; users are assigned by a hash of their ID and this salt
+RECOMMENDATION_AB_REFRESH_SECONDS = 60
+RECOMMENDATION_AB_SALT = 'booknest-recommendation-ab'
+# Feed impressions are buffered per process and bulk-inserted once this many are pending
+# or the oldest is this many seconds old
+RECOMMENDATION_IMPRESSION_BUFFER_SIZE = 500
+RECOMMENDATION_IMPRESSION_FLUSH_SECONDS = 30
+# Recommendation lists are picked from this many top-scored candidates by maximal marginal
+# relevance (0 disables re-ranking); DIVERSITY trades relevance (0) for variety of authors
+# and genres (1), and a list holds at most MAX_PER_AUTHOR books per author and
+# MAX_PER_GENRE per genre (None: no cap) while other candidates remain
+RECOMMENDATION_RERANK_POOL_SIZE = 200
+RECOMMENDATION_RERANK_DIVERSITY = 0.3
+RECOMMENDATION_RERANK_MAX_PER_AUTHOR = 2
+RECOMMENDATION_RERANK_MAX_PER_GENRE = None
+# Seconds the in-memory book author and genre lookups are kept before being reloaded
+RECOMMENDATION_RERANK_REFRESH_SECONDS = 60 * 60
 
 
 # Static files (CSS, JavaScript, Images)
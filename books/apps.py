@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'books'
+
+    def ready(self):
+        """
+        Register the signal handlers that keep search vectors, the search cache and the
+        Elasticsearch index in step with book changes
+        """
+        import books.signals
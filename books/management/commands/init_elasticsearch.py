@@ -4,6 +4,8 @@ from django.conf import settings
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import ConnectionError, NotFoundError, TransportError
 from django_elasticsearch_dsl.registries import registry
+from books.search_indexes import BookDocument
+from books.utils.es_indexing import create_book_index, restore_replicas, switch_alias
 import time
 import requests
 import socket
@@ -116,7 +118,13 @@ class Command(BaseCommand):
             try:
                 if not es.indices.exists(index=index_name):
                     self.stdout.write(f"Creating index '{index_name}'...")
-                    registry.update_index(index)
+                    if index_name == BookDocument._index._name:
+                        # The books index is versioned behind an alias so it can be rebuilt without downtime
+                        book_index = create_book_index()
+                        restore_replicas(book_index)
+                        switch_alias(book_index)
+                    else:
+                        registry.update_index(index)
                     self.stdout.write(self.style.SUCCESS(f"Successfully created index '{index_name}'"))
                 else:
                     self.stdout.write(f"Index '{index_name}' already exists")
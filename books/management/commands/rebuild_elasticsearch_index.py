@@ -1,9 +1,13 @@
 from django.core.management.base import BaseCommand
-from django_elasticsearch_dsl.registries import registry
 from books.models import Book
+from books.search_indexes import BookDocument
 from django.utils import timezone
 from elasticsearch.exceptions import ConnectionError, TransportError
 from books.utils.elasticsearch_client import ElasticsearchClient
+from books.utils.es_indexing import (
+    bulk_index_books, create_book_index, delete_indices, get_min_success_rate, replay_changes,
+    restore_replicas, start_change_log, stop_change_log, switch_alias
+)
 import time
 import logging
 
@@ -12,14 +16,33 @@ logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = 'Rebuilds the Elasticsearch index for all books'
+    help = 'Rebuilds the Elasticsearch index for all books into a new index and switches the alias to it'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--batch-size',
             type=int,
-            default=100,
-            help='Number of books to index in each batch'
+            default=1000,
+            help='Number of books to read from the database in each query'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Number of books sent in each bulk request (default: ELASTICSEARCH_BULK_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=None,
+            help='Number of parallel bulk request threads (default: ELASTICSEARCH_BULK_THREAD_COUNT)'
+        )
+        parser.add_argument(
+            '--min-success-rate',
+            type=float,
+            default=None,
+            help='Fraction of the books the new index must hold to be switched to '
+                 '(default: ELASTICSEARCH_REBUILD_MIN_SUCCESS_RATE)'
         )
 
     def handle(self, *args, **options):
@@ -33,19 +56,6 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('Cannot connect to Elasticsearch. Please ensure Elasticsearch is running.'))
             return
         
-        # Delete existing index
-        try:
-            self.stdout.write('Deleting existing index...')
-            registry.delete_all()
-            self.stdout.write(self.style.SUCCESS('Successfully deleted existing indices'))
-        except (ConnectionError, TransportError) as e:
-            self.stdout.write(self.style.ERROR(f'Elasticsearch connection error when deleting indices: {str(e)}'))
-            self.stdout.write('Please ensure Elasticsearch is running and accessible.')
-            return
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Error deleting indices: {str(e)}'))
-            return
-        
         # Get total count of books
         total_books = Book.objects.count()
         if total_books == 0:
@@ -54,66 +64,102 @@ class Command(BaseCommand):
             
         self.stdout.write(f'Found {total_books} books to index')
         
-        # Process in batches
+        # Record the books changed while the new index is built, to replay them before the swap
+        if not start_change_log():
+            self.stdout.write(self.style.ERROR('Another index rebuild is running. Aborting.'))
+            return
+        try:
+            self.rebuild(total_books, batch_size, options, start_time)
+        finally:
+            stop_change_log()
+
+    def rebuild(self, total_books, batch_size, options, start_time):
+        """Build a new index next to the live one and switch the alias to it"""
+        # Create a new versioned index; searches keep using the current one meanwhile
+        try:
+            index_name = create_book_index()
+            self.stdout.write(self.style.SUCCESS(f"Successfully created index '{index_name}'"))
+        except (ConnectionError, TransportError) as e:
+            self.stdout.write(self.style.ERROR(f'Elasticsearch connection error when creating the index: {str(e)}'))
+            self.stdout.write('Please ensure Elasticsearch is running and accessible.')
+            return
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error creating the index: {str(e)}'))
+            return
+        
+        def report_progress(indexed, failed):
+            self.stdout.write(
+                self.style.SUCCESS(f'Progress: {indexed}/{total_books} books indexed ({indexed/total_books*100:.1f}%)')
+            )
+        
+        # Stream all books to the new index with the bulk API
         processed = 0
         errors = 0
-        for i in range(0, total_books, batch_size):
-            batch = Book.objects.all()[i:i+batch_size]
-            self.stdout.write(f'Indexing batch {i//batch_size + 1} ({len(batch)} books)...')
+        try:
+            result = bulk_index_books(
+                index_name,
+                batch_size=batch_size,
+                chunk_size=options['chunk_size'],
+                thread_count=options['threads'],
+                progress=report_progress
+            )
+            processed = result['indexed']
+            errors = result['errors']
+        except (ConnectionError, TransportError) as e:
+            self.stdout.write(self.style.ERROR(f'Lost connection to Elasticsearch. Aborting indexing: {str(e)}'))
+        
+        # Never switch searches to an index missing books
+        min_success_rate = options['min_success_rate']
+        if min_success_rate is None:
+            min_success_rate = get_min_success_rate()
+        if errors > 0 or processed < total_books * min_success_rate:
+            self.stdout.write(
+                self.style.ERROR(
+                    f'Elasticsearch index rebuild failed. {processed}/{total_books} books were indexed '
+                    f'with {errors} errors (at least {min_success_rate:.0%} without errors required).\n'
+                    f'The current index is kept. Please check Elasticsearch connection and logs.'
+                )
+            )
+            try:
+                delete_indices([index_name])
+            except (ConnectionError, TransportError) as e:
+                self.stdout.write(self.style.WARNING(f"Could not delete index '{index_name}': {str(e)}"))
+            return
+        
+        try:
+            # Catch up with the books changed during the load
+            self.stdout.write('Replaying books changed during the rebuild...')
+            cursor = replay_changes(index_name)
             
-            # Index the batch
-            batch_errors = 0
-            for book in batch:
-                try:
-                    registry.update(book)
-                    processed += 1
-                except (ConnectionError, TransportError) as e:
-                    errors += 1
-                    batch_errors += 1
-                    self.stdout.write(
-                        self.style.ERROR(f'Elasticsearch connection error indexing book {book.isbn13}: {str(e)}')
-                    )
-                    # If we're getting connection errors, check if Elasticsearch is still available
-                    if batch_errors > 5:  # If we have multiple errors in a batch, check connection
-                        if not ElasticsearchClient.check_connection(max_retries=1):
-                            self.stdout.write(self.style.ERROR('Lost connection to Elasticsearch. Aborting indexing.'))
-                            break
-                except Exception as e:
-                    errors += 1
-                    self.stdout.write(
-                        self.style.ERROR(f'Error indexing book {book.isbn13}: {str(e)}')
-                    )
+            self.stdout.write('Adding replicas...')
+            try:
+                restore_replicas(index_name)
+            except TransportError as e:
+                self.stdout.write(self.style.WARNING(f'Replicas are not allocated yet: {str(e)}'))
             
-            # Print progress
-            if processed > 0:
-                self.stdout.write(
-                    self.style.SUCCESS(f'Progress: {processed}/{total_books} books indexed ({processed/total_books*100:.1f}%)')
-                )
+            # Atomically point searches and updates at the new index
+            previous_indices = switch_alias(index_name)
+            self.stdout.write(self.style.SUCCESS(f"Alias '{BookDocument._index._name}' now points at '{index_name}'"))
             
-            # If we lost connection, break out of the loop
-            if batch_errors > 5 and not ElasticsearchClient.check_connection(max_retries=1):
-                break
+            # Books changed between the replay and the swap were written to the old index
+            replay_changes(index_name, cursor)
+            delete_indices(previous_indices)
+        except (ConnectionError, TransportError) as e:
+            self.stdout.write(self.style.ERROR(f'Elasticsearch error when switching to the new index: {str(e)}'))
+            self.stdout.write(f"The current index is kept; index '{index_name}' can be deleted.")
+            return
         
         # Print summary
         end_time = time.time()
         duration = end_time - start_time
+        success_rate = (processed / total_books) * 100
+        status_style = self.style.SUCCESS if success_rate > 90 else self.style.WARNING
         
-        if processed == 0:
-            self.stdout.write(
-                self.style.ERROR(
-                    f'Elasticsearch index rebuild failed. No books were indexed.\n'
-                    f'Please check Elasticsearch connection and logs.'
-                )
+        self.stdout.write(
+            status_style(
+                f'Elasticsearch index rebuild completed at {timezone.now()}\n'
+                f'Total time: {duration:.2f} seconds\n'
+                f'Books indexed: {processed}/{total_books} ({success_rate:.1f}%)\n'
+                f'Errors encountered: {errors}'
             )
-        else:
-            success_rate = (processed / total_books) * 100
-            status_style = self.style.SUCCESS if success_rate > 90 else self.style.WARNING
-            
-            self.stdout.write(
-                status_style(
-                    f'Elasticsearch index rebuild completed at {timezone.now()}\n'
-                    f'Total time: {duration:.2f} seconds\n'
-                    f'Books indexed: {processed}/{total_books} ({success_rate:.1f}%)\n'
-                    f'Errors encountered: {errors}'
-                )
-            )
\ No newline at end of file
+        )
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_alter_bookauthor_options_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Fill the vectors of existing books; same weights and configuration as
+        # books.utils.db_search.book_search_vector()
+        migrations.RunSQL(
+            sql="""
+                UPDATE book SET search_vector =
+                    setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A')
+                    || setweight(to_tsvector('english'::regconfig, COALESCE((
+                        SELECT string_agg(author.name, ' ')
+                        FROM author_books JOIN author ON author.author_id = author_books.author_id
+                        WHERE author_books.book_id = book.isbn13
+                    ), '')), 'B')
+                    || setweight(to_tsvector('english'::regconfig, COALESCE((
+                        SELECT string_agg(book_genre.genre, ' ')
+                        FROM book_genre
+                        WHERE book_genre.isbn13 = book.isbn13
+                    ), '')), 'C')
+                    || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'D');
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='author_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='book_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
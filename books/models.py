@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
@@ -15,6 +17,10 @@ class Author(models.Model):
 
     class Meta:
         db_table = 'author'
+        indexes = [
+            # Trigram index serving name__icontains lookups
+            GinIndex(fields=['name'], name='author_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self):
         return self.name
@@ -33,12 +39,20 @@ class Book(models.Model):
         max_digits=3, decimal_places=2, null=True, blank=True
     )
     authors = models.ManyToManyField('books.Author' , related_name='books' , through='BookAuthor')
+    # Weighted tsvector of title, author names, genres and description for the database
+    # search fallback, kept current by books.signals (see books.utils.db_search)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     # objects = BookManager()
     
 
     class Meta:
         db_table = "book"
+        indexes = [
+            GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
+            # Trigram index serving fuzzy title matches
+            GinIndex(fields=['title'], name='book_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.title
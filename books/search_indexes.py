@@ -1,6 +1,7 @@
+from django.db.models import Count
 from django_elasticsearch_dsl import Document, fields
 from django_elasticsearch_dsl.registries import registry
-from books.models import Book
+from books.models import Book, BookReview
 
 
 @registry.register_document
@@ -17,14 +18,22 @@ class BookDocument(Document):
     )
     description = fields.TextField()
     
-    # Author names as a nested field
+    # Authors as a nested field, with every field the search API returns
     authors = fields.NestedField(properties={
+        'author_id': fields.IntegerField(),
         'name': fields.TextField(fields={'raw': fields.KeywordField()}),
+        'bio': fields.TextField(index=False),
+        'date_of_birth': fields.DateField(),
+        'number_of_books': fields.IntegerField(),
     })
     
     # Genres as a keyword field
     genres = fields.KeywordField(multi=True)
     
+    # Denormalized review count; the BookReview handlers in books.signals re-index the
+    # book whenever one of its reviews is saved or deleted
+    reviews_count = fields.IntegerField()
+    
     class Index:
         # Name of the Elasticsearch index
         name = 'books'
@@ -43,23 +52,42 @@ class BookDocument(Document):
             'publication_date',
             'number_of_pages',
             'average_rate',
+            'number_of_ratings',
         ]
         
         # Related fields to include in the document
-        related_models = ['authors', 'genres']
+        related_models = ['authors', 'genres', BookReview]
+    
+    def get_queryset(self):
+        """Load authors and genres with the books and count reviews in the same query"""
+        return super().get_queryset().prefetch_related('authors', 'genres').annotate(
+            annotated_reviews_count=Count('reviews', distinct=True)
+        )
     
     def get_instances_from_related(self, related_instance):
         """Get Book instances related to the related model instance"""
         if related_instance.__class__.__name__ == 'Author':
             return related_instance.books.all()
-        elif related_instance.__class__.__name__ == 'BookGenre':
+        elif related_instance.__class__.__name__ in ('BookGenre', 'BookReview'):
             return [related_instance.book]
         return None
     
     def prepare_authors(self, instance):
         """Prepare the authors field"""
-        return [{'name': author.name} for author in instance.authors.all()]
+        return [{
+            'author_id': author.author_id,
+            'name': author.name,
+            'bio': author.bio,
+            'date_of_birth': author.date_of_birth,
+            'number_of_books': author.number_of_books,
+        } for author in instance.authors.all()]
     
     def prepare_genres(self, instance):
         """Prepare the genres field"""
-        return [genre.genre for genre in instance.genres.all()]
\ No newline at end of file
+        return [genre.genre for genre in instance.genres.all()]
+    
+    def prepare_reviews_count(self, instance):
+        """Prepare the reviews_count field, annotated when indexing in bulk"""
+        if hasattr(instance, 'annotated_reviews_count'):
+            return instance.annotated_reviews_count
+        return instance.reviews.count()
\ No newline at end of file
@@ -1,14 +1,24 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
-from books.models import Book, Author, BookAuthor, BookGenre
+from books.models import Book, Author, BookAuthor, BookGenre, BookReview
 from django_elasticsearch_dsl.registries import registry
+from books.utils.db_search import update_search_vectors
+from books.utils.es_indexing import log_index_changes
+from books.utils.search_cache import invalidate_books
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Book)
 def update_book_in_elasticsearch(sender, instance, **kwargs):
     """
-    Update the Elasticsearch index when a book is created or updated.
+    Update the Elasticsearch index and the search vector when a book is created or updated.
     """
+    update_search_vectors([instance.isbn13])
+    invalidate_books([instance.isbn13])
+    log_index_changes([instance.isbn13])
     try:
         registry.update(instance)
     except Exception as e:
@@ -21,6 +31,8 @@ def delete_book_from_elasticsearch(sender, instance, **kwargs):
     """
     Delete the book from the Elasticsearch index when it's deleted from the database.
     """
+    invalidate_books([instance.isbn13])
+    log_index_changes([instance.isbn13])
     try:
         registry.delete(instance)
     except Exception as e:
@@ -31,11 +43,14 @@ def delete_book_from_elasticsearch(sender, instance, **kwargs):
 @receiver(post_save, sender=Author)
 def update_author_books_in_elasticsearch(sender, instance, **kwargs):
     """
-    Update all books by this author in the Elasticsearch index.
+    Update all books by this author in the Elasticsearch index and their search vectors.
     """
+    update_search_vectors(BookAuthor.objects.filter(author=instance).values_list('book_id', flat=True))
     try:
         # Get all books by this author
         book_authors = BookAuthor.objects.filter(author=instance)
+        invalidate_books(book_authors.values_list('book_id', flat=True))
+        log_index_changes(book_authors.values_list('book_id', flat=True))
         for book_author in book_authors:
             registry.update(book_author.book)
     except Exception as e:
@@ -46,21 +61,64 @@ def update_author_books_in_elasticsearch(sender, instance, **kwargs):
 @receiver(post_delete, sender=BookAuthor)
 def update_book_author_in_elasticsearch(sender, instance, **kwargs):
     """
-    Update the book in Elasticsearch when a book-author relationship is created or deleted.
+    Update the book in Elasticsearch and its search vector when a book-author relationship is created or deleted.
     """
+    update_search_vectors([instance.book_id])
+    invalidate_books([instance.book_id])
+    log_index_changes([instance.book_id])
     try:
         registry.update(instance.book)
     except Exception as e:
         print(f"Error updating Elasticsearch index for book {instance.book.isbn13}: {e}")
 
 
+@receiver(m2m_changed, sender=Book.authors.through)
+def update_book_authors_search_vector(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Update search vectors when authors are added to or removed from books through
+    Book.authors, which bulk-writes BookAuthor rows without their save/delete signals.
+    """
+    if action == 'pre_clear' and reverse:
+        # Remember the author's books, which are no longer known after the clear
+        instance._cleared_isbns = list(instance.books.values_list('isbn13', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        isbns = [instance.isbn13]
+    elif action == 'post_clear':
+        isbns = getattr(instance, '_cleared_isbns', [])
+    else:
+        isbns = pk_set or []
+    update_search_vectors(isbns)
+    invalidate_books(isbns)
+    log_index_changes(isbns)
+
+
 @receiver(post_save, sender=BookGenre)
 @receiver(post_delete, sender=BookGenre)
 def update_book_genre_in_elasticsearch(sender, instance, **kwargs):
     """
-    Update the book in Elasticsearch when a book-genre relationship is created or deleted.
+    Update the book in Elasticsearch and its search vector when a book-genre relationship is created or deleted.
+    """
+    update_search_vectors([instance.book_id])
+    invalidate_books([instance.book_id])
+    log_index_changes([instance.book_id])
+    try:
+        registry.update(instance.book)
+    except Exception as e:
+        print(f"Error updating Elasticsearch index for book {instance.book.isbn13}: {e}")
+
+
+@receiver(post_save, sender=BookReview)
+@receiver(post_delete, sender=BookReview)
+def update_book_review_count_in_elasticsearch(sender, instance, **kwargs):
+    """
+    Update the book's reviews_count in Elasticsearch when a review is created or deleted.
     """
+    invalidate_books([instance.book_id])
+    log_index_changes([instance.book_id])
     try:
         registry.update(instance.book)
     except Exception as e:
-        print(f"Error updating Elasticsearch index for book {instance.book.isbn13}: {e}")
\ No newline at end of file
+        logger.error(f"Error updating Elasticsearch index for book {instance.book_id}: {e}")
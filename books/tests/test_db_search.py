@@ -0,0 +1,38 @@
+from django.test import TestCase
+from books.models import Author, Book, BookGenre
+from books.utils.db_search import search_books_in_database
+
+
+class DatabaseSearchTests(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name="Frank Herbert")
+        self.dune = Book.objects.create(
+            isbn13="9780000000001",
+            title="Dune",
+            description="A desert planet and its spice."
+        )
+        self.dune.authors.add(self.author)
+        BookGenre.objects.create(book=self.dune, genre="Science Fiction")
+        self.garden = Book.objects.create(
+            isbn13="9780000000002",
+            title="Gardening Basics",
+            description="Growing vegetables at home, with a chapter on dune grasses."
+        )
+        BookGenre.objects.create(book=self.garden, genre="Home")
+
+    def isbns(self, query, filters=None):
+        return list(search_books_in_database(query, filters).values_list('isbn13', flat=True))
+
+    def test_title_match_ranks_above_description_match(self):
+        self.assertEqual(self.isbns("dune"), [self.dune.isbn13, self.garden.isbn13])
+
+    def test_author_names_and_genres_are_searchable(self):
+        self.assertEqual(self.isbns("herbert"), [self.dune.isbn13])
+        self.assertEqual(self.isbns("science fiction"), [self.dune.isbn13])
+
+    def test_misspelled_title_matches_by_trigram_similarity(self):
+        self.assertEqual(self.isbns("Gardenning Basic"), [self.garden.isbn13])
+
+    def test_filters(self):
+        self.assertEqual(self.isbns("dune", {'genres': ["Home"]}), [self.garden.isbn13])
+        self.assertEqual(self.isbns("dune", {'author': "herbert"}), [self.dune.isbn13])
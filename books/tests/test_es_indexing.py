@@ -0,0 +1,179 @@
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django_elasticsearch_dsl.registries import registry
+from books.models import Book
+from books.search_indexes import BookDocument
+from books.utils.es_indexing import (
+    log_index_changes, replay_changes, start_change_log, stop_change_log, switch_alias
+)
+
+COMMAND = 'books.management.commands.rebuild_elasticsearch_index'
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ChangeLogTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('books.utils.es_indexing.index_books')
+        self.index_books = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def replayed(self):
+        return [set(call.args[0]) for call in self.index_books.call_args_list]
+
+    def test_changes_are_ignored_without_a_rebuild(self):
+        log_index_changes(['9780000000001'])
+        self.assertEqual(replay_changes('books-new'), 0)
+        self.index_books.assert_not_called()
+
+    def test_only_one_rebuild_records_changes(self):
+        self.assertTrue(start_change_log())
+        self.assertFalse(start_change_log())
+        stop_change_log()
+        self.assertTrue(start_change_log())
+
+    def test_replay_advances_the_cursor(self):
+        start_change_log()
+        log_index_changes(['9780000000001', '9780000000002'])
+        cursor = replay_changes('books-new')
+        self.assertEqual(cursor, 2)
+        log_index_changes(['9780000000003'])
+        self.assertEqual(replay_changes('books-new', cursor), 3)
+        self.assertEqual(self.replayed(), [
+            {'9780000000001', '9780000000002'}, {'9780000000003'}
+        ])
+        self.assertEqual(self.index_books.call_args.args[1], 'books-new')
+
+    def test_replay_stops_at_an_entry_not_written_yet(self):
+        start_change_log()
+        log_index_changes(['9780000000001'])
+        # A writer has taken number 2 but not stored its entry
+        cache.incr('es_reindex:sequence')
+        log_index_changes(['9780000000003'])
+        cursor = replay_changes('books-new')
+        self.assertEqual(cursor, 1)
+        cache.set('es_reindex:change:2', '9780000000002')
+        self.assertEqual(replay_changes('books-new', cursor), 3)
+        self.assertEqual(self.replayed(), [{'9780000000001'}, {'9780000000002', '9780000000003'}])
+
+
+class SwitchAliasTests(SimpleTestCase):
+    def setUp(self):
+        self.alias = BookDocument._index._name
+        self.client = mock.Mock()
+        patcher = mock.patch.object(BookDocument, '_get_connection', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def actions(self):
+        return self.client.indices.update_aliases.call_args.kwargs['body']['actions']
+
+    def test_moves_alias_from_previous_indices(self):
+        self.client.indices.exists_alias.return_value = True
+        self.client.indices.get_alias.return_value = {f'{self.alias}-1': {}, f'{self.alias}-2': {}}
+        previous = switch_alias(f'{self.alias}-3')
+        self.assertEqual(previous, [f'{self.alias}-1', f'{self.alias}-2'])
+        self.assertEqual(self.actions(), [
+            {'remove': {'index': f'{self.alias}-1', 'alias': self.alias}},
+            {'remove': {'index': f'{self.alias}-2', 'alias': self.alias}},
+            {'add': {'index': f'{self.alias}-3', 'alias': self.alias}},
+        ])
+
+    def test_replaces_concrete_index_with_the_alias_name(self):
+        self.client.indices.exists_alias.return_value = False
+        self.client.indices.exists.return_value = True
+        self.assertEqual(switch_alias(f'{self.alias}-1'), [])
+        self.assertEqual(self.actions(), [
+            {'remove_index': {'index': self.alias}},
+            {'add': {'index': f'{self.alias}-1', 'alias': self.alias}},
+        ])
+
+    def test_creates_alias_on_first_rebuild(self):
+        self.client.indices.exists_alias.return_value = False
+        self.client.indices.exists.return_value = False
+        switch_alias(f'{self.alias}-1')
+        self.assertEqual(self.actions(), [{'add': {'index': f'{self.alias}-1', 'alias': self.alias}}])
+
+
+@override_settings(ELASTICSEARCH_REBUILD_MIN_SUCCESS_RATE=0.9)
+class RebuildCommandTests(SimpleTestCase):
+    def setUp(self):
+        self.mocks = {}
+        for name in ('ElasticsearchClient', 'Book', 'bulk_index_books', 'create_book_index',
+                     'delete_indices', 'replay_changes', 'restore_replicas', 'start_change_log',
+                     'stop_change_log', 'switch_alias'):
+            patcher = mock.patch(f'{COMMAND}.{name}')
+            self.mocks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.mocks['Book'].objects.count.return_value = 100
+        self.mocks['create_book_index'].return_value = 'books-new'
+        self.mocks['replay_changes'].return_value = 0
+        self.mocks['switch_alias'].return_value = ['books-old']
+
+    def rebuild(self, indexed, errors, **options):
+        self.mocks['bulk_index_books'].return_value = {'indexed': indexed, 'errors': errors}
+        call_command('rebuild_elasticsearch_index', stdout=StringIO(), **options)
+
+    def test_switches_alias_to_complete_index(self):
+        self.rebuild(95, 0)
+        self.mocks['switch_alias'].assert_called_once_with('books-new')
+        self.mocks['delete_indices'].assert_called_once_with(['books-old'])
+
+    def test_keeps_old_index_when_books_failed(self):
+        self.rebuild(99, 1)
+        self.mocks['switch_alias'].assert_not_called()
+        self.mocks['delete_indices'].assert_called_once_with(['books-new'])
+
+    def test_keeps_old_index_when_too_few_books_were_indexed(self):
+        self.rebuild(89, 0)
+        self.mocks['switch_alias'].assert_not_called()
+        self.rebuild(89, 0, min_success_rate=0.8)
+        self.mocks['switch_alias'].assert_called_once_with('books-new')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RebuildWithWritesTests(TestCase):
+    """Rebuild against in-memory indices, with the books signals logging the changes"""
+
+    def setUp(self):
+        cache.clear()
+        Book.objects.create(isbn13='9780000000001', title='Before the rebuild')
+        self.indices = {'books-old': set(), 'books-new': set()}
+        self.alias = 'books-old'
+
+        def index_books(isbns, index_name):
+            existing = set(Book.objects.filter(pk__in=isbns).values_list('pk', flat=True))
+            self.indices[index_name] = (self.indices[index_name] - set(isbns)) | existing
+
+        def bulk_index_books(index_name, **kwargs):
+            self.indices[index_name] |= set(Book.objects.values_list('pk', flat=True))
+            # A book saved after the bulk load read its batch
+            Book.objects.create(isbn13='9780000000002', title='During the rebuild')
+            return {'indexed': 1, 'errors': 0}
+
+        def switch_alias(index_name):
+            previous, self.alias = self.alias, index_name
+            return [previous]
+
+        patches = [
+            mock.patch('books.utils.es_indexing.index_books', side_effect=index_books),
+            mock.patch(f'{COMMAND}.bulk_index_books', side_effect=bulk_index_books),
+            mock.patch(f'{COMMAND}.switch_alias', side_effect=switch_alias),
+            mock.patch(f'{COMMAND}.create_book_index', return_value='books-new'),
+            mock.patch(f'{COMMAND}.ElasticsearchClient'),
+            mock.patch(f'{COMMAND}.delete_indices'),
+            mock.patch(f'{COMMAND}.restore_replicas'),
+            # Autosync writes through the alias, which still points at the old index
+            mock.patch.object(registry, 'update', lambda book: self.indices[self.alias].add(book.pk)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_book_saved_during_the_rebuild_reaches_the_new_index(self):
+        call_command('rebuild_elasticsearch_index', stdout=StringIO())
+        self.assertEqual(self.alias, 'books-new')
+        self.assertEqual(self.indices['books-new'], {'9780000000001', '9780000000002'})
@@ -0,0 +1,45 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from books.utils.search_cache import cached_search, get_search_cache, invalidate_books, search_cache_key
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SearchCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def search(self):
+        self.calls += 1
+        return [{'isbn13': '9780000000001', 'title': 'Test Book 1'}], 1
+
+    def test_equivalent_queries_share_a_key(self):
+        self.assertEqual(
+            search_cache_key('  Test   BOOK ', 1, 10, {'genres': ['b', 'a'], 'author': None}),
+            search_cache_key('test book', 1, 10, {'genres': ['a', 'b']})
+        )
+        self.assertNotEqual(search_cache_key('test book', 1, 10), search_cache_key('test book', 2, 10))
+
+    def test_repeated_search_is_served_from_cache(self):
+        first = cached_search('test', 1, 10, None, self.search)
+        second = cached_search('Test', 1, 10, None, self.search)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+    def test_changed_book_invalidates_cached_results(self):
+        cached_search('test', 1, 10, None, self.search)
+        invalidate_books(['9780000000001'])
+        cached_search('test', 1, 10, None, self.search)
+        self.assertEqual(self.calls, 2)
+
+    def test_empty_results_are_not_cached(self):
+        cached_search('nothing', 1, 10, None, lambda: ([], 0))
+        cached_search('nothing', 1, 10, None, self.search)
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(BOOK_SEARCH_CACHE_TTL=60, BOOK_SEARCH_CACHE_STALE_TTL=300)
+    def test_book_versions_outlive_cached_pages(self):
+        with mock.patch.object(get_search_cache(), 'set_many') as set_many:
+            invalidate_books(['9780000000001'])
+        self.assertEqual(set_many.call_args.args[1], 360)
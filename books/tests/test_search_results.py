@@ -0,0 +1,52 @@
+import json
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from elasticsearch.serializer import JSONSerializer
+from books.models import Author, Book, BookGenre, BookReview
+from books.search_indexes import BookDocument
+from books.serializers.book_serializers import BookSerializer
+from books.utils.elasticsearch_client import ElasticsearchClient
+
+
+class SearchResultTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='password'
+        )
+        author = Author.objects.create(
+            name='Frank Herbert', bio='American author', date_of_birth=date(1920, 10, 8),
+            number_of_books=20
+        )
+        self.book = Book.objects.create(
+            isbn13='9780000000001',
+            isbn='0000000001',
+            title='Dune',
+            description='A desert planet and its spice.',
+            publication_date=date(1965, 8, 1),
+            number_of_pages=412,
+            cover_img='https://example.com/dune.jpg',
+            number_of_ratings=3,
+            average_rate=Decimal('4.25')
+        )
+        self.book.authors.add(author)
+        BookGenre.objects.create(book=self.book, genre='Science Fiction')
+        BookReview.objects.create(user=user, book=self.book, review_text='Great')
+        self.empty_book = Book.objects.create(isbn13='9780000000002', title='Untitled')
+
+    def search_result(self, book):
+        # The document goes through the JSON encoding Elasticsearch stores it with
+        document = BookDocument()
+        source = json.loads(JSONSerializer().dumps(document.prepare(book)))
+        result = ElasticsearchClient.book_from_source(source)
+        self.assertEqual(result.pop('source'), 'elasticsearch')
+        return result
+
+    def test_search_result_matches_serializer(self):
+        for book in (self.book, self.empty_book):
+            self.assertEqual(self.search_result(book), BookSerializer(book).data)
+
+    def test_bulk_indexed_document_matches_serializer(self):
+        book = BookDocument().get_queryset().get(pk=self.book.pk)
+        self.assertEqual(self.search_result(book), BookSerializer(self.book).data)
@@ -0,0 +1,47 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from books.models import Book
+
+
+class SimilarBooksAPITests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username='reader', email='reader@example.com', password='password'
+        )
+        self.client.force_authenticate(user)
+        self.book = Book.objects.create(isbn13='9780000000001', title='Test Book 1')
+        Book.objects.create(isbn13='9780000000002', title='Test Book 2')
+        self.url = reverse('book-similar-api', kwargs={'pk': self.book.isbn13})
+
+    def get_similar_books(self, return_value):
+        patcher = mock.patch(
+            'recommendation.services.RecommendationService.get_similar_books', return_value=return_value
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_without_model(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_unknown_book(self):
+        response = self.client.get(reverse('book-similar-api', kwargs={'pk': '9789999999999'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_returns_similar_books_in_order(self):
+        self.get_similar_books([('9780000000002', 0.9), ('9780000000003', 0.8)])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['isbn13'] for book in response.data], ['9780000000002'])
+
+    @override_settings(RECOMMENDATION_SIMILAR_ITEMS_K=20)
+    def test_limit_is_clamped_to_the_neighbour_index(self):
+        get_similar_books = self.get_similar_books([])
+        for limit, n in (('5', 5), ('1000', 20), ('-3', 0), ('many', 10)):
+            self.client.get(self.url, {'limit': limit})
+            self.assertEqual(get_similar_books.call_args.kwargs['n'], n)
@@ -12,6 +12,7 @@ from books.views.views import (
     BookUpdateAPIView,
     BookCreateAPIView,
     AuthorBookListAPIView,
+    SimilarBooksAPIView,
 )
 from books.views.search_views import BookSearchAPIView
 from books.views.suggestion_views import BookSuggestionAPIView
@@ -53,6 +54,7 @@ urlpatterns = [
     path("books/<str:pk>/", BookDetailAPIView.as_view(), name="book-detail-api"),
     path("books/<str:pk>/update/", BookUpdateAPIView.as_view(), name="book-update"),
     path("books/<str:pk>/delete/", BookDeleteAPIView.as_view(), name="book-delete"),
+    path("books/<str:pk>/similar/", SimilarBooksAPIView.as_view(), name="book-similar-api"),
     
     # Author endpoints
     path("authors/", AuthorListAPIView.as_view(), name="authors-list-api"),
@@ -5,6 +5,9 @@ from django.db import transaction
 from books.models import Book, Author, BookAuthor, BookGenre
 from books.utils.external_api_clients import search_external_apis
 from books.utils.elasticsearch_client import ElasticsearchClient
+from books.utils.db_search import search_books_in_database
+from books.utils.es_health import elasticsearch_breaker
+from books.utils.search_cache import cached_search
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -29,6 +32,27 @@ logger = logging.getLogger(__name__)
 def search_books(query: str, page: int = 1, page_size: int = 10, 
                filters: Optional[Dict[str, Any]] = None) -> tuple[List[Dict[str, Any]], int]:
     """
+    Search for books, serving repeated searches from the search result cache.
+    See books.utils.search_cache for how cached pages expire and are invalidated.
+    
+    Args:
+        query: Search query string
+        page: Page number (1-indexed)
+        page_size: Number of results per page
+        filters: Dictionary of filters to apply (e.g. {'genres': ['Fiction'], 'min_rating': 4})
+        
+    Returns:
+        Tuple of (list of book dictionaries, total count)
+    """
+    return cached_search(
+        query, page, page_size, filters,
+        lambda: search_books_uncached(query, page=page, page_size=page_size, filters=filters)
+    )
+
+
+def search_books_uncached(query: str, page: int = 1, page_size: int = 10, 
+                          filters: Optional[Dict[str, Any]] = None) -> tuple[List[Dict[str, Any]], int]:
+    """
     Search for books in Elasticsearch first, then in the database, and finally in external APIs if needed.
     Supports pagination and filtering.
     
@@ -41,10 +65,10 @@ def search_books(query: str, page: int = 1, page_size: int = 10,
     Returns:
         Tuple of (list of book dictionaries, total count)
     """
-    # First, check if Elasticsearch is available
-    if ElasticsearchClient.check_connection(max_retries=1):
+    # First, search Elasticsearch unless its circuit breaker knows it is down
+    if elasticsearch_breaker.is_available():
         try:
-            # Search in Elasticsearch with retry mechanism
+            # Search in Elasticsearch; returns no books at once if the circuit opens
             es_books, total_count = ElasticsearchClient.search_books(
                 query, 
                 page=page, 
@@ -65,39 +89,19 @@ def search_books(query: str, page: int = 1, page_size: int = 10,
     
     # If no results from Elasticsearch, search in the local database
     try:
-        # Build the base query
-        db_query = Book.objects.filter(title__icontains=query)
-        
-        # Apply filters to database query if provided
-        if filters:
-            # Filter by genres
-            if 'genres' in filters and filters['genres']:
-                db_query = db_query.filter(genres__name__in=filters['genres'])
-            
-            # Filter by minimum rating
-            if 'min_rating' in filters and filters['min_rating'] is not None:
-                db_query = db_query.filter(average_rate__gte=filters['min_rating'])
-            
-            # Filter by publication date range
-            if 'pub_date_from' in filters and filters['pub_date_from']:
-                db_query = db_query.filter(publication_date__gte=filters['pub_date_from'])
-            if 'pub_date_to' in filters and filters['pub_date_to']:
-                db_query = db_query.filter(publication_date__lte=filters['pub_date_to'])
-            
-            # Filter by author
-            if 'author' in filters and filters['author']:
-                db_query = db_query.filter(authors__name__icontains=filters['author']).distinct()
-        
-        # Get total count for pagination
-        total_count = db_query.count()
+        # Full-text search with filters, ranked by relevance (see books.utils.db_search)
+        db_query = search_books_in_database(query, filters)
         
         # Apply pagination
         start = (page - 1) * page_size
         end = start + page_size
-        db_books = db_query.prefetch_related('authors', 'genres')[start:end]
+        db_books = list(db_query.prefetch_related('authors')[start:end])
         
         # If we found books in the database, return them
-        if db_books.exists():
+        if db_books:
+            # Get total count for pagination, skipping the query when this is the last page
+            total_count = start + len(db_books) if len(db_books) < page_size else db_query.count()
+            
             # Convert to list of dictionaries
             books = [{
                 'isbn13': book.isbn13,
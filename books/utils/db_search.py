@@ -0,0 +1,106 @@
+from typing import Any, Dict, Iterable, Optional
+import logging
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import Exists, F, OuterRef, Q, QuerySet, Subquery
+from books.models import Book, BookAuthor, BookGenre
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Text search configuration of Book.search_vector; the 0004 migration fills the column
+# with the same configuration, so changing it means recomputing every vector
+SEARCH_CONFIG = 'english'
+
+
+def book_search_vector() -> SearchVector:
+    """Expression computing Book.search_vector for the book of each updated row
+
+    Title words rank highest, then author names, genres and finally the description.
+    Authors and genres are read with correlated subqueries, so the expression can be used
+    in a single UPDATE.
+    """
+    author_names = BookAuthor.objects.filter(book=OuterRef('pk')).order_by().values('book').annotate(
+        names=StringAgg('author__name', ' ')
+    ).values('names')
+    genre_names = BookGenre.objects.filter(book=OuterRef('pk')).order_by().values('book').annotate(
+        names=StringAgg('genre', ' ')
+    ).values('names')
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Subquery(author_names), weight='B', config=SEARCH_CONFIG)
+        + SearchVector(Subquery(genre_names), weight='C', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(isbns: Optional[Iterable[str]] = None) -> int:
+    """Recompute the search vectors of the given books, or of every book
+
+    Args:
+        isbns: ISBN13s of the books to update; None updates all books
+
+    Returns:
+        Number of books updated
+    """
+    books = Book.objects.all()
+    if isbns is not None:
+        isbns = [isbn for isbn in set(isbns) if isbn]
+        if not isbns:
+            return 0
+        books = books.filter(isbn13__in=isbns)
+    # QuerySet.update() sends no post_save signal, so this does not trigger itself
+    return books.update(search_vector=book_search_vector())
+
+
+def search_books_in_database(query: str, filters: Optional[Dict[str, Any]] = None) -> QuerySet:
+    """Full-text search of the books table, for when Elasticsearch is unavailable
+
+    Books match if their search vector matches the query (web search syntax: quoted
+    phrases, OR, -word) or if their title is trigram-similar to it, which catches typos.
+    Both conditions are served by GIN indexes. Results are ordered by SearchRank, then by
+    title similarity.
+
+    Args:
+        query: Search query string; an empty query matches every book
+        filters: Dictionary of filters to apply (e.g. {'genres': ['Fiction'], 'min_rating': 4})
+
+    Returns:
+        Ordered queryset of the matching books
+    """
+    query = (query or '').strip()
+    if query:
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        books = Book.objects.filter(
+            Q(search_vector=search_query) | Q(title__trigram_similar=query)
+        ).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            similarity=TrigramSimilarity('title', query),
+        ).order_by('-rank', '-similarity', 'isbn13')
+    else:
+        books = Book.objects.order_by('isbn13')
+
+    if filters:
+        # Filter by genres; EXISTS keeps one row per book when several genres match
+        if filters.get('genres'):
+            books = books.filter(Exists(
+                BookGenre.objects.filter(book=OuterRef('pk'), genre__in=filters['genres'])
+            ))
+
+        # Filter by minimum rating
+        if filters.get('min_rating') is not None:
+            books = books.filter(average_rate__gte=filters['min_rating'])
+
+        # Filter by publication date range
+        if filters.get('pub_date_from'):
+            books = books.filter(publication_date__gte=filters['pub_date_from'])
+        if filters.get('pub_date_to'):
+            books = books.filter(publication_date__lte=filters['pub_date_to'])
+
+        # Filter by author; the ILIKE uses the trigram index on author names
+        if filters.get('author'):
+            books = books.filter(Exists(
+                BookAuthor.objects.filter(book=OuterRef('pk'), author__name__icontains=filters['author'])
+            ))
+
+    return books
@@ -1,6 +1,7 @@
 from elasticsearch_dsl import Q
 from elasticsearch.exceptions import ConnectionError, TransportError, NotFoundError
 from books.search_indexes import BookDocument
+from books.utils.es_health import elasticsearch_breaker, is_outage
 from typing import List, Dict, Any, Optional, Tuple
 import logging
 import time
@@ -17,6 +18,10 @@ class ElasticsearchClient:
     def check_connection(cls, max_retries=3, retry_interval=2):
         """Check if Elasticsearch is available and retry if necessary
         
+        This sends real probe queries and is meant for management commands; request
+        handlers should use elasticsearch_breaker.is_available() instead, which costs no
+        round-trip. The outcome is recorded in the circuit breaker.
+        
         Args:
             max_retries: Maximum number of connection retries
             retry_interval: Seconds to wait between retries
@@ -30,9 +35,12 @@ class ElasticsearchClient:
                 # Try to create a search object and execute a simple query
                 search = BookDocument.search()
                 search.execute()
+                elasticsearch_breaker.record_success()
                 return True
             except (ConnectionError, TransportError) as e:
                 logger.warning(f"Elasticsearch connection error (attempt {retries+1}/{max_retries}): {str(e)}")
+                if is_outage(e):
+                    elasticsearch_breaker.record_failure()
                 retries += 1
                 if retries < max_retries:
                     time.sleep(retry_interval)
@@ -54,11 +62,12 @@ class ElasticsearchClient:
             filters: Dictionary of filters to apply (e.g. {'genres': ['Fiction'], 'min_rating': 4})
             
         Returns:
-            Tuple of (list of book dictionaries, total count)
+            Tuple of (list of book dictionaries, total count); ([], 0) without a round-trip
+            while the Elasticsearch circuit is open
         """
-        # First check if Elasticsearch is available
-        if not cls.check_connection():
-            logger.error("Elasticsearch is not available")
+        # Fail fast while Elasticsearch is known to be down
+        if not elasticsearch_breaker.allow_request():
+            logger.warning("Elasticsearch circuit is open, skipping search")
             return [], 0
             
         # Create a multi-match query that searches across multiple fields
@@ -111,23 +120,10 @@ class ElasticsearchClient:
         while True:
             try:
                 response = search.execute()
+                elasticsearch_breaker.record_success()
                 
-                # Format the results
-                books = []
-                for hit in response:
-                    book = {
-                        'isbn13': hit.isbn13,
-                        'isbn': hit.isbn,
-                        'title': hit.title,
-                        'authors': [author['name'] for author in hit.authors] if hasattr(hit, 'authors') else [],
-                        'cover_img': hit.cover_img if hasattr(hit, 'cover_img') else None,
-                        'publication_date': hit.publication_date if hasattr(hit, 'publication_date') else None,
-                        'number_of_pages': hit.number_of_pages if hasattr(hit, 'number_of_pages') else None,
-                        'description': hit.description if hasattr(hit, 'description') else '',
-                        'average_rate': hit.average_rate if hasattr(hit, 'average_rate') else None,
-                        'source': 'elasticsearch'
-                    }
-                    books.append(book)
+                # Format the results from the raw _source, in relevance order
+                books = [cls.book_from_source(hit['_source']) for hit in response.to_dict()['hits']['hits']]
                 
                 # Return both the books and the total count
                 return books, response.hits.total.value
@@ -135,14 +131,54 @@ class ElasticsearchClient:
             except (ConnectionError, TransportError) as e:
                 retries += 1
                 logger.warning(f"Elasticsearch search error (attempt {retries}/{max_retries}): {str(e)}")
-                if retries >= max_retries:
-                    logger.error(f"Failed to search Elasticsearch after {max_retries} attempts")
+                if not is_outage(e):
+                    return [], 0
+                elasticsearch_breaker.record_failure()
+                # Retry at once unless the failure opened the circuit
+                if retries >= max_retries or not elasticsearch_breaker.allow_request():
+                    logger.error(f"Failed to search Elasticsearch after {retries} attempts")
                     return [], 0
-                time.sleep(1)  # Wait before retrying
             except Exception as e:
                 logger.error(f"Unexpected error during Elasticsearch search: {str(e)}")
                 return [], 0
     
+    @staticmethod
+    def book_from_source(source: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a search result from a BookDocument _source
+        
+        The result has the fields and formats of BookSerializer, so search pages can be
+        served without reading the books from the database.
+        
+        Args:
+            source: The _source of a BookDocument hit
+            
+        Returns:
+            Book dictionary with a 'source' key set to 'elasticsearch'
+        """
+        average_rate = source.get('average_rate')
+        return {
+            'isbn13': source.get('isbn13'),
+            'isbn': source.get('isbn'),
+            'title': source.get('title'),
+            'authors': [{
+                'author_id': author.get('author_id'),
+                'name': author.get('name'),
+                'bio': author.get('bio'),
+                'date_of_birth': author.get('date_of_birth'),
+                'number_of_books': author.get('number_of_books'),
+            } for author in source.get('authors') or []],
+            'genres': source.get('genres') or [],
+            # DRF renders decimals as strings with the field's 2 decimal places
+            'average_rate': f'{average_rate:.2f}' if average_rate is not None else None,
+            'description': source.get('description'),
+            'publication_date': source.get('publication_date'),
+            'number_of_pages': source.get('number_of_pages'),
+            'cover_img': source.get('cover_img'),
+            'number_of_ratings': source.get('number_of_ratings', 0),
+            'reviews_count': source.get('reviews_count', 0),
+            'source': 'elasticsearch'
+        }
+    
     @classmethod
     def suggest_books(cls, query: str, limit: int = 5, max_retries: int = 2) -> List[Dict[str, Any]]:
         """Get book title suggestions based on a partial query
@@ -152,11 +188,12 @@ class ElasticsearchClient:
             limit: Maximum number of suggestions to return
             
         Returns:
-            List of book title suggestions
+            List of book title suggestions; [] without a round-trip while the Elasticsearch
+            circuit is open
         """
-        # First check if Elasticsearch is available
-        if not cls.check_connection():
-            logger.error("Elasticsearch is not available for suggestions")
+        # Fail fast while Elasticsearch is known to be down
+        if not elasticsearch_breaker.allow_request():
+            logger.warning("Elasticsearch circuit is open, skipping suggestions")
             return []
             
         # Create a completion suggester query
@@ -187,14 +224,18 @@ class ElasticsearchClient:
         while True:
             try:
                 response = search.execute()
+                elasticsearch_breaker.record_success()
                 break
             except (ConnectionError, TransportError) as e:
                 retries += 1
                 logger.warning(f"Elasticsearch suggestion error (attempt {retries}/{max_retries}): {str(e)}")
-                if retries >= max_retries:
-                    logger.error(f"Failed to get suggestions from Elasticsearch after {max_retries} attempts")
+                if not is_outage(e):
+                    return []
+                elasticsearch_breaker.record_failure()
+                # Retry at once unless the failure opened the circuit
+                if retries >= max_retries or not elasticsearch_breaker.allow_request():
+                    logger.error(f"Failed to get suggestions from Elasticsearch after {retries} attempts")
                     return []
-                time.sleep(1)  # Wait before retrying
             except Exception as e:
                 logger.error(f"Unexpected error during Elasticsearch suggestion: {str(e)}")
                 return []
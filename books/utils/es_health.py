@@ -0,0 +1,111 @@
+from typing import Optional
+import logging
+import threading
+import time
+from django.conf import settings
+from elasticsearch.exceptions import ConnectionError, TransportError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def is_outage(error: Exception) -> bool:
+    """Whether an Elasticsearch error means the cluster is unreachable or failing
+
+    Connection errors and timeouts (status 'N/A') and 5xx responses count; client errors
+    such as a malformed query (4xx) do not, since retrying them cannot succeed either.
+    """
+    if isinstance(error, ConnectionError):
+        return True
+    if isinstance(error, TransportError):
+        return not isinstance(error.status_code, int) or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """Per-process circuit breaker holding the health of a remote service
+
+    Closed: requests go through; failure_threshold consecutive failures open the circuit.
+    Open: requests are refused without touching the network until reset_timeout seconds
+    have passed since the circuit opened.
+    Half-open: a single request is let through as a probe; its success closes the circuit
+    and its failure opens it for another reset_timeout. Other requests are refused while
+    the probe runs, and a probe that never reports back is replaced after reset_timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._changed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def failure_threshold(self) -> int:
+        if self._failure_threshold is not None:
+            return self._failure_threshold
+        return getattr(settings, 'ELASTICSEARCH_BREAKER_FAILURE_THRESHOLD', 3)
+
+    @property
+    def reset_timeout(self) -> float:
+        if self._reset_timeout is not None:
+            return self._reset_timeout
+        return getattr(settings, 'ELASTICSEARCH_BREAKER_RESET_SECONDS', 30)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_available(self) -> bool:
+        """Whether a request would currently be let through, without claiming the probe"""
+        with self._lock:
+            return (self._state == self.CLOSED
+                    or time.monotonic() - self._changed_at >= self.reset_timeout)
+
+    def allow_request(self) -> bool:
+        """Whether to send a request now; in the half-open state this claims the probe"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._changed_at < self.reset_timeout:
+                return False
+            if self._state == self.OPEN:
+                logger.info(f"{self.name} circuit half-open, probing with the next request")
+            self._state = self.HALF_OPEN
+            self._changed_at = time.monotonic()
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed, the service is available again")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"{self.name} circuit open after {self._failures} failures, "
+                        f"refusing requests for {self.reset_timeout} seconds"
+                    )
+                self._state = self.OPEN
+                self._changed_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._changed_at = time.monotonic()
+
+
+elasticsearch_breaker = CircuitBreaker('Elasticsearch')
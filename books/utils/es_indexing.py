@@ -0,0 +1,285 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from elasticsearch import helpers
+from books.search_indexes import BookDocument
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of failed documents logged individually before only counting them
+MAX_LOGGED_ERRORS = 10
+
+# Cache keys of the change log kept while an index is rebuilt
+CHANGE_LOG_PREFIX = 'es_reindex'
+CHANGE_LOG_ACTIVE_KEY = f'{CHANGE_LOG_PREFIX}:active'
+CHANGE_LOG_SEQUENCE_KEY = f'{CHANGE_LOG_PREFIX}:sequence'
+# Seconds a change log outlives a rebuild that crashed before closing it
+CHANGE_LOG_TTL = 24 * 60 * 60
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, 'ELASTICSEARCH_BULK_CHUNK_SIZE', 500)
+
+
+def get_thread_count() -> int:
+    return getattr(settings, 'ELASTICSEARCH_BULK_THREAD_COUNT', 4)
+
+
+def get_min_success_rate() -> float:
+    return getattr(settings, 'ELASTICSEARCH_REBUILD_MIN_SUCCESS_RATE', 0.99)
+
+
+def iter_book_batches(document: BookDocument, batch_size: int) -> Iterator[List[Any]]:
+    """Read all books to index in primary key order, batch_size books per query
+
+    Batches are selected with keyset pagination (isbn13 > last isbn13 of the previous batch),
+    so each query costs the same however far into the table it is, unlike OFFSET. Authors
+    and genres are prefetched and reviews counted by BookDocument.get_queryset().
+
+    Args:
+        document: Document whose queryset is read
+        batch_size: Number of books per database query
+
+    Returns:
+        Iterator of lists of books
+    """
+    queryset = document.get_queryset().order_by('pk')
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def book_actions(document: BookDocument, index_name: str, batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Bulk index actions of every book, written into index_name"""
+    for batch in iter_book_batches(document, batch_size):
+        for action in document.get_actions(batch, 'index'):
+            action['_index'] = index_name
+            yield action
+
+
+def _get_refresh_interval(client, index_name: str) -> Optional[str]:
+    """The index's explicit refresh_interval, None if it uses the default"""
+    response = client.indices.get_settings(index=index_name, name='index.refresh_interval')
+    for index_settings in response.values():
+        return index_settings.get('settings', {}).get('index', {}).get('refresh_interval')
+    return None
+
+
+def bulk_index_books(index_name: Optional[str] = None, batch_size: int = 1000,
+                     chunk_size: Optional[int] = None, thread_count: Optional[int] = None,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Index every book into an Elasticsearch index with the bulk API
+
+    Books are read with iter_book_batches and streamed to Elasticsearch chunk_size documents
+    per bulk request, from thread_count threads with helpers.parallel_bulk, or with
+    helpers.streaming_bulk (which retries rejected chunks) if thread_count is 1. Refreshes
+    are disabled during the load and the index's refresh_interval is restored afterwards,
+    followed by one refresh so the documents are searchable when this returns.
+
+    Args:
+        index_name: Index (or alias) to write to; defaults to BookDocument's index
+        batch_size: Number of books per database query
+        chunk_size: Documents per bulk request; defaults to ELASTICSEARCH_BULK_CHUNK_SIZE
+        thread_count: Bulk request threads; defaults to ELASTICSEARCH_BULK_THREAD_COUNT
+        progress: Called with (indexed, errors) after every chunk_size documents
+
+    Returns:
+        Dictionary with the number of books 'indexed' and of 'errors'
+
+    Raises:
+        elasticsearch.exceptions.ConnectionError: If Elasticsearch becomes unreachable
+    """
+    document = BookDocument()
+    client = document._get_connection()
+    index_name = index_name or document._index._name
+    chunk_size = chunk_size or get_chunk_size()
+    thread_count = thread_count or get_thread_count()
+
+    actions = book_actions(document, index_name, batch_size)
+    if thread_count > 1:
+        results = helpers.parallel_bulk(
+            client, actions, thread_count=thread_count, chunk_size=chunk_size,
+            raise_on_error=False
+        )
+    else:
+        results = helpers.streaming_bulk(
+            client, actions, chunk_size=chunk_size, max_retries=3, raise_on_error=False
+        )
+
+    refresh_interval = _get_refresh_interval(client, index_name)
+    client.indices.put_settings(index=index_name, body={'index': {'refresh_interval': '-1'}})
+    indexed = 0
+    errors = 0
+    try:
+        for ok, item in results:
+            if ok:
+                indexed += 1
+            else:
+                errors += 1
+                if errors <= MAX_LOGGED_ERRORS:
+                    logger.error(f"Error indexing book: {item}")
+            if progress and (indexed + errors) % chunk_size == 0:
+                progress(indexed, errors)
+    finally:
+        # None resets the setting to the Elasticsearch default
+        client.indices.put_settings(index=index_name, body={'index': {'refresh_interval': refresh_interval}})
+        client.indices.refresh(index=index_name)
+
+    if progress:
+        progress(indexed, errors)
+    logger.info(f"Bulk indexed {indexed} books into {index_name} with {errors} errors")
+    return {'indexed': indexed, 'errors': errors}
+
+
+def index_books(isbns: Iterable[str], index_name: str) -> None:
+    """Write the current state of the given books into an index
+
+    Books that exist are indexed and books that were deleted are removed from the index.
+    """
+    isbns = set(isbns)
+    if not isbns:
+        return
+    document = BookDocument()
+    books = list(document.get_queryset().filter(pk__in=isbns))
+    actions = list(document.get_actions(books, 'index'))
+    for action in actions:
+        action['_index'] = index_name
+    actions.extend(
+        {'_op_type': 'delete', '_index': index_name, '_id': isbn}
+        for isbn in isbns - {book.pk for book in books}
+    )
+    # Deleting a book that is not in the index yet is a 404, which is fine
+    helpers.bulk(document._get_connection(), actions, raise_on_error=False)
+
+
+def create_book_index() -> str:
+    """Create a new timestamped books index without replicas, for a bulk load
+
+    The index has BookDocument's mapping and settings; its name starts with the name of
+    BookDocument's index, which is the alias searches and updates go through.
+
+    Returns:
+        Name of the new index
+    """
+    alias = BookDocument._index._name
+    index_name = f'{alias}-{timezone.now():%Y%m%d%H%M%S}'
+    index = BookDocument._index.clone(name=index_name)
+    index.settings(number_of_replicas=0)
+    index.create()
+    logger.info(f"Created index {index_name}")
+    return index_name
+
+
+def restore_replicas(index_name: str, timeout: str = '60s') -> None:
+    """Give an index the number of replicas of BookDocument's settings and wait for them"""
+    client = BookDocument._get_connection()
+    replicas = BookDocument._index.to_dict().get('settings', {}).get('number_of_replicas', 1)
+    client.indices.put_settings(index=index_name, body={'index': {'number_of_replicas': replicas}})
+    if replicas:
+        client.cluster.health(index=index_name, wait_for_status='green', timeout=timeout)
+
+
+def switch_alias(index_name: str) -> List[str]:
+    """Point the books alias at index_name in one atomic request
+
+    Searches see either the old index or the new one, never none. A concrete index still
+    holding the alias name (created before indices were versioned) is deleted in the same
+    request.
+
+    Returns:
+        Names of the indices the alias pointed at before, to be deleted by the caller
+    """
+    client = BookDocument._get_connection()
+    alias = BookDocument._index._name
+    previous = []
+    actions = []
+    if client.indices.exists_alias(name=alias):
+        previous = [name for name in client.indices.get_alias(name=alias) if name != index_name]
+        actions.extend({'remove': {'index': name, 'alias': alias}} for name in previous)
+    elif client.indices.exists(index=alias):
+        actions.append({'remove_index': {'index': alias}})
+    actions.append({'add': {'index': index_name, 'alias': alias}})
+    client.indices.update_aliases(body={'actions': actions})
+    logger.info(f"Alias {alias} now points at {index_name}")
+    return previous
+
+
+def delete_indices(index_names: Iterable[str]) -> None:
+    """Delete indices, ignoring those that do not exist"""
+    client = BookDocument._get_connection()
+    for index_name in index_names:
+        client.indices.delete(index=index_name, ignore=404)
+        logger.info(f"Deleted index {index_name}")
+
+
+def _change_key(sequence: int) -> str:
+    return f'{CHANGE_LOG_PREFIX}:change:{sequence}'
+
+
+def start_change_log() -> bool:
+    """Start recording the books changed during a rebuild
+
+    The log lives in the default cache, which must be shared with the web and worker
+    processes (REDIS_CACHE_URL) for their changes to be seen by the rebuild.
+
+    Returns:
+        False if another rebuild is already recording changes
+    """
+    if not cache.add(CHANGE_LOG_ACTIVE_KEY, True, CHANGE_LOG_TTL):
+        return False
+    cache.set(CHANGE_LOG_SEQUENCE_KEY, 0, CHANGE_LOG_TTL)
+    return True
+
+
+def stop_change_log() -> None:
+    cache.delete(CHANGE_LOG_ACTIVE_KEY)
+
+
+def log_index_changes(isbns: Iterable[str]) -> None:
+    """Record changed books while a rebuild runs; costs one cache read otherwise
+
+    Each change gets its own key numbered with an atomic counter, so concurrent writers
+    never overwrite each other's entries.
+    """
+    isbns = {isbn for isbn in isbns if isbn}
+    if not isbns or not cache.get(CHANGE_LOG_ACTIVE_KEY):
+        return
+    try:
+        for isbn in isbns:
+            cache.set(_change_key(cache.incr(CHANGE_LOG_SEQUENCE_KEY)), isbn, CHANGE_LOG_TTL)
+    except ValueError:
+        # The log was closed meanwhile
+        pass
+
+
+def replay_changes(index_name: str, cursor: int = 0) -> int:
+    """Re-index the books logged after position cursor into index_name
+
+    Replaying stops before the first entry whose number was taken but which is not
+    written yet, so the next replay picks it up.
+
+    Returns:
+        The new cursor, to pass to the next replay
+    """
+    sequence = cache.get(CHANGE_LOG_SEQUENCE_KEY) or 0
+    if sequence <= cursor:
+        return cursor
+    entries = cache.get_many([_change_key(number) for number in range(cursor + 1, sequence + 1)])
+    isbns = set()
+    for number in range(cursor + 1, sequence + 1):
+        isbn = entries.get(_change_key(number))
+        if isbn is None:
+            break
+        isbns.add(isbn)
+        cursor = number
+    index_books(isbns, index_name)
+    logger.info(f"Replayed {len(isbns)} changed books into {index_name}")
+    return cursor
@@ -0,0 +1,191 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_PREFIX = 'book_search'
+
+
+def get_search_cache():
+    return caches[getattr(settings, 'BOOK_SEARCH_CACHE_ALIAS', 'default')]
+
+
+def get_fresh_seconds() -> int:
+    return getattr(settings, 'BOOK_SEARCH_CACHE_TTL', 60)
+
+
+def get_stale_seconds() -> int:
+    return getattr(settings, 'BOOK_SEARCH_CACHE_STALE_TTL', 5 * 60)
+
+
+def _entry_seconds() -> int:
+    """How long a cached page is kept, fresh then stale"""
+    return get_fresh_seconds() + get_stale_seconds()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so equivalent queries share a cache entry
+
+    Unicode is NFKC-normalized, case is folded and runs of whitespace are collapsed.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query or '').casefold().split())
+
+
+def _normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drop empty filters and sort list values, so filter order does not matter"""
+    normalized = {}
+    for name, value in (filters or {}).items():
+        if value is None or value == '' or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(str(item).strip() for item in value)
+        elif isinstance(value, str):
+            value = value.strip()
+        normalized[name] = value
+    return normalized
+
+
+def search_cache_key(query: str, page: int, page_size: int,
+                     filters: Optional[Dict[str, Any]] = None) -> str:
+    """Cache key of one page of search results
+
+    Args:
+        query: Search query string
+        page: Page number (1-indexed)
+        page_size: Number of results per page
+        filters: Dictionary of filters applied to the search
+
+    Returns:
+        Cache key built from the normalized query, the page and the normalized filters
+    """
+    params = json.dumps(
+        [normalize_query(query), page, page_size, _normalize_filters(filters)],
+        sort_keys=True, default=str
+    )
+    digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+    return f'{SEARCH_CACHE_PREFIX}:results:{digest}'
+
+
+def _book_version_key(isbn13: str) -> str:
+    return f'{SEARCH_CACHE_PREFIX}:book:{isbn13}'
+
+
+def _get_book_versions(isbns: List[str]) -> Dict[str, Any]:
+    return get_search_cache().get_many([_book_version_key(isbn) for isbn in isbns])
+
+
+def invalidate_books(isbns: Iterable[str]) -> None:
+    """Invalidate every cached search page containing one of the given books
+
+    Each cached page stores the versions of its books when it was cached; starting a new
+    version for a book makes all those pages misses on their next lookup, so there is no
+    need to know which queries returned the book.
+    """
+    isbns = [isbn for isbn in set(isbns) if isbn]
+    if not isbns:
+        return
+    version = time.time_ns()
+    # Pages cached before this version expire with it at the latest, so the version only
+    # has to outlive them; a page cached afterwards that loses its version is a miss
+    get_search_cache().set_many(
+        {_book_version_key(isbn): version for isbn in isbns}, _entry_seconds()
+    )
+
+
+def _store(key: str, books: List[Dict[str, Any]], total_count: int,
+           book_versions: Dict[str, Any]) -> None:
+    entry = {
+        'books': books,
+        'total_count': total_count,
+        'book_versions': book_versions,
+        'cached_at': time.time(),
+    }
+    get_search_cache().set(key, entry, _entry_seconds())
+
+
+def _compute_and_store(key: str, search: Callable[[], Tuple[List[Dict[str, Any]], int]]
+                       ) -> Tuple[List[Dict[str, Any]], int]:
+    """Run the search and cache its results
+
+    Results are not cached if one of their books changed while the search ran, or if they
+    are empty, which usually means every search backend failed.
+    """
+    started = time.time_ns()
+    books, total_count = search()
+    if not books:
+        return books, total_count
+
+    isbns = [book['isbn13'] for book in books if isinstance(book, dict) and book.get('isbn13')]
+    try:
+        current_versions = _get_book_versions(isbns) if isbns else {}
+        book_versions = {isbn: current_versions.get(_book_version_key(isbn)) for isbn in isbns}
+        if all(version is None or version < started for version in book_versions.values()):
+            _store(key, books, total_count, book_versions)
+    except Exception as e:
+        logger.warning(f"Could not cache search results: {e}")
+    return books, total_count
+
+
+def _revalidate_in_background(key: str, search: Callable[[], Tuple[List[Dict[str, Any]], int]]) -> None:
+    """Refresh a stale entry in a background thread, at most one refresh per key at a time"""
+    lock_key = f'{key}:refreshing'
+    if not get_search_cache().add(lock_key, True, get_fresh_seconds()):
+        return
+
+    def refresh():
+        try:
+            _compute_and_store(key, search)
+        except Exception as e:
+            logger.warning(f"Error refreshing cached search results: {e}")
+        finally:
+            get_search_cache().delete(lock_key)
+            close_old_connections()
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def cached_search(query: str, page: int, page_size: int, filters: Optional[Dict[str, Any]],
+                  search: Callable[[], Tuple[List[Dict[str, Any]], int]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Serve a search from the result cache with stale-while-revalidate
+
+    Results younger than BOOK_SEARCH_CACHE_TTL are returned as they are. Older results are
+    still returned for up to BOOK_SEARCH_CACHE_STALE_TTL more seconds while one background
+    thread refreshes them. Results containing a book that changed since they were cached
+    are recomputed.
+
+    Args:
+        query: Search query string
+        page: Page number (1-indexed)
+        page_size: Number of results per page
+        filters: Dictionary of filters applied to the search
+        search: Function running the uncached search
+
+    Returns:
+        Tuple of (list of book dictionaries, total count)
+    """
+    key = search_cache_key(query, page, page_size, filters)
+    try:
+        entry = get_search_cache().get(key)
+    except Exception as e:
+        logger.warning(f"Search cache unavailable: {e}")
+        return search()
+
+    if entry is not None:
+        book_versions = entry['book_versions']
+        current_versions = _get_book_versions(list(book_versions))
+        if all(current_versions.get(_book_version_key(isbn)) == version
+               for isbn, version in book_versions.items()):
+            if time.time() - entry['cached_at'] >= get_fresh_seconds():
+                _revalidate_in_background(key, search)
+            return entry['books'], entry['total_count']
+
+    return _compute_and_store(key, search)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -5,7 +6,7 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter
 from books.models import Book
 from books.serializers.book_serializers import BookSerializer
 from books.utils.book_service import search_books
-from books.utils.elasticsearch_client import ElasticsearchClient
+from books.utils.es_health import elasticsearch_breaker
 import logging
 
 # Configure logging
@@ -102,8 +103,9 @@ class BookSearchAPIView(APIView):
             except ValueError:
                 pass
         
-        # Check Elasticsearch availability for search status info
-        es_available = ElasticsearchClient.check_connection(max_retries=1)
+        # Elasticsearch availability for search status info, from the circuit breaker state
+        es_available = elasticsearch_breaker.is_available()
+        from_index = getattr(settings, 'BOOK_SEARCH_RESULTS_FROM_INDEX', True)
         if not es_available:
             logger.warning("Elasticsearch is not available for search, falling back to database only")
         
@@ -113,18 +115,27 @@ class BookSearchAPIView(APIView):
             
             # If we found books, they're already saved to the database
             if books_data:
-                # Get the ISBNs of all books found
-                isbns = [book['isbn13'] for book in books_data if isinstance(book, dict) and 'isbn13' in book]
-                
-                # Fetch the books from the database
-                books = Book.objects.filter(isbn13__in=isbns).prefetch_related('authors', 'genres')
-                serializer = BookSerializer(books, many=True)
+                if from_index and all(book.get('source') == 'elasticsearch' for book in books_data):
+                    # Elasticsearch hits carry every serialized field, so no SQL is needed
+                    results = [
+                        {field: book.get(field) for field in BookSerializer.Meta.fields}
+                        for book in books_data
+                    ]
+                else:
+                    # Get the ISBNs of all books found
+                    isbns = [book['isbn13'] for book in books_data if isinstance(book, dict) and 'isbn13' in book]
+                    
+                    # Fetch the books from the database, keeping the search order
+                    books = Book.objects.filter(isbn13__in=isbns).prefetch_related('authors', 'genres')
+                    positions = {isbn: position for position, isbn in enumerate(isbns)}
+                    books = sorted(books, key=lambda book: positions[book.isbn13])
+                    results = BookSerializer(books, many=True).data
                 
                 # Calculate total pages
                 total_pages = (total_count + page_size - 1) // page_size
                 
                 response_data = {
-                    'results': serializer.data,
+                    'results': results,
                     'count': total_count,
                     'page': page,
                     'page_size': page_size,
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from books.utils.elasticsearch_client import ElasticsearchClient
+from books.utils.es_health import elasticsearch_breaker
 import logging
 from books.models import Book
 
@@ -44,8 +45,8 @@ class BookSuggestionAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if Elasticsearch is available first
-        if not ElasticsearchClient.check_connection(max_retries=1):
+        # Fail fast while the Elasticsearch circuit breaker knows it is down
+        if not elasticsearch_breaker.is_available():
             logger.warning("Elasticsearch is not available for suggestions")
             return Response(
                 {"warning": "Search suggestions are temporarily unavailable"},
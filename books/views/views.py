@@ -7,6 +7,7 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, IsAdminUser 
 from django.db import models
+from django.conf import settings
 
 
 class BookListAPIView(generics.ListAPIView):
@@ -62,6 +63,31 @@ class BookDetailAPIView(generics.RetrieveAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
 
+
+# return the books readers of a book also liked, most similar first
+class SimilarBooksAPIView(generics.ListAPIView):
+    schema = AutoSchema()
+    serializer_class = BookSerializer
+
+    def get_queryset(self):
+        from recommendation.services import RecommendationService  # Import here to avoid circular imports
+
+        isbn13 = self.kwargs.get('pk')
+        if not Book.objects.filter(isbn13=isbn13).exists():
+            raise NotFound("Book not found")
+
+        try:
+            limit = int(self.request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+
+        # Neighbours are precomputed per book, up to RECOMMENDATION_SIMILAR_ITEMS_K of them;
+        # a larger limit would score the book against every book in the model
+        max_limit = getattr(settings, 'RECOMMENDATION_SIMILAR_ITEMS_K', 50)
+        similar = RecommendationService.get_similar_books(isbn13, n=min(max(limit, 0), max_limit))
+        books = Book.objects.prefetch_related('authors').in_bulk([isbn for isbn, _ in similar])
+        return [books[isbn] for isbn, _ in similar if isbn in books]
+
 #PRIV
 class BookDeleteAPIView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import threading
+import time
+from bisect import bisect_right
+from django.conf import settings
+from django.db.models import Q
+
+from .model_registry import model_registry
+from .models import RecommendationModel
+
+logger = logging.getLogger(__name__)
+
+_split = None
+_split_loaded_at = 0.0
+_split_lock = threading.Lock()
+
+
+def get_refresh_seconds():
+    return getattr(settings, 'RECOMMENDATION_AB_REFRESH_SECONDS', 60)
+
+
+def get_salt():
+    return getattr(settings, 'RECOMMENDATION_AB_SALT', 'recommendation-ab')
+
+
+def user_bucket(user_id):
+    """
+    Stable position of a user in [0, 1), the same in every process and across restarts
+    Changing RECOMMENDATION_AB_SALT reshuffles all users
+    """
+    digest = hashlib.blake2b(f"{get_salt()}:{user_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def build_traffic_split(model_records):
+    """
+    Turn the served models into (model_ids, upper bucket bounds)
+    The latest active model is the control: it serves its own traffic_weight if set,
+    otherwise whatever share the experiments leave. Experiments take the lowest buckets
+    in id order and the control the rest, so starting an experiment only moves users
+    out of the control. Weights are scaled to add up to 1
+    """
+    control = next((record for record in model_records if record.is_active), None)
+    experiments = sorted(
+        (record for record in model_records if record is not control and record.traffic_weight > 0),
+        key=lambda record: record.id
+    )
+    weights = [record.traffic_weight for record in experiments]
+    if control is not None:
+        experiments.append(control)
+        weights.append(control.traffic_weight or max(0.0, 1.0 - sum(weights)))
+
+    total = sum(weights)
+    if not total:
+        return [], []
+
+    model_ids, bounds, bound = [], [], 0.0
+    for record, weight in zip(experiments, weights):
+        if weight > 0:
+            bound += weight / total
+            model_ids.append(record.id)
+            bounds.append(bound)
+    return model_ids, bounds
+
+
+def get_traffic_split():
+    """
+    Return the current traffic split, reloaded from the database at most every
+    RECOMMENDATION_AB_REFRESH_SECONDS so weight changes reach running workers without a
+    restart. Every served model is loaded and pinned in the model registry on reload, so
+    no variant is evicted by the others or loaded on a request
+    """
+    global _split, _split_loaded_at
+
+    with _split_lock:
+        if _split is not None and time.monotonic() - _split_loaded_at < get_refresh_seconds():
+            return _split
+
+        model_records = [
+            record
+            for record in RecommendationModel.objects.filter(Q(is_active=True) | Q(traffic_weight__gt=0))
+            if record.artifact_path or record.model_file
+        ]
+        model_ids, bounds = build_traffic_split(model_records)
+        model_registry.pin([record for record in model_records if record.id in model_ids])
+
+        if _split is None or _split[0] != model_ids or _split[1] != bounds:
+            logger.info(f"Recommendation traffic split: {dict(zip(model_ids, bounds))}")
+        _split = (model_ids, bounds)
+        _split_loaded_at = time.monotonic()
+        return _split
+
+
+def invalidate_traffic_split():
+    """
+    Reload the traffic split on the next lookup in this process
+    """
+    global _split
+    with _split_lock:
+        _split = None
+
+
+def assign_model_id(user_id, split=None):
+    """
+    Return the id of the model serving user_id, or None if no model is served
+    """
+    model_ids, bounds = split or get_traffic_split()
+    if not model_ids:
+        return None
+    # Rounding can leave the last bound just below 1
+    return model_ids[min(bisect_right(bounds, user_bucket(user_id)), len(model_ids) - 1)]
+
+
+def group_users_by_model(user_ids):
+    """
+    Split user_ids by the model serving them, as {model_id: [user_id, ...]}
+    """
+    split = get_traffic_split()
+    groups = {}
+    for user_id in user_ids:
+        groups.setdefault(assign_model_id(user_id, split), []).append(user_id)
+    return groups
@@ -0,0 +1,152 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def augment_items(item_factors: np.ndarray, item_bias: np.ndarray | None = None) -> np.ndarray:
+    """
+    Maps items to vectors whose Euclidean nearest neighbours to an augmented user
+    vector are the items with the highest factor score for that user.
+
+    An item becomes [q_i, b_i, sqrt(M^2 - |q_i|^2 - b_i^2)] with M the largest
+    [q_i, b_i] norm, and a user becomes [p_u, 1, 0] (see augment_user). All items then
+    have norm M, so |x_i - y_u|^2 = M^2 + |y_u|^2 - 2 (p_u . q_i + b_i) and the
+    closest items are exactly those with the largest p_u . q_i + b_i.
+
+    Args:
+        item_factors (np.ndarray): Item factor matrix, shape (n_items, n_factors).
+        item_bias (np.ndarray | None): Item bias vector, shape (n_items,).
+
+    Returns:
+        np.ndarray: Augmented item vectors, shape (n_items, n_factors + 2), float32.
+    """
+    n_items = item_factors.shape[0]
+    bias = item_bias if item_bias is not None else np.zeros(n_items)
+    vectors = np.empty((n_items, item_factors.shape[1] + 2), dtype=np.float32)
+    vectors[:, :-2] = item_factors
+    vectors[:, -2] = bias
+    squared_norms = np.einsum("ij,ij->i", vectors[:, :-1], vectors[:, :-1])
+    vectors[:, -1] = np.sqrt(np.maximum(squared_norms.max() - squared_norms, 0.0))
+    return vectors
+
+
+def augment_user(user_factors: np.ndarray) -> np.ndarray:
+    """
+    Maps a user factor vector to the query vector [p_u, 1, 0] of augment_items.
+    """
+    return np.concatenate([user_factors, [1.0, 0.0]]).astype(np.float32)
+
+
+def _nearest_centroids(
+    vectors: np.ndarray, centroids: np.ndarray, block_size: int
+) -> np.ndarray:
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], block_size):
+        block = vectors[start : start + block_size]
+        # |x - c|^2 up to the |x|^2 term, which is the same for every centroid
+        distances = centroid_norms[np.newaxis, :] - 2.0 * (block @ centroids.T)
+        assignments[start : start + block_size] = np.argmin(distances, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """
+    Inverted file index over SVD item vectors for approximate top-N retrieval.
+
+    Items are clustered with k-means on their augmented vectors (see augment_items);
+    each cluster's items are stored contiguously (CSR-style list_indptr/list_items).
+    A query visits the clusters whose centroids are closest to the user until it has
+    collected the requested number of candidates, which callers then re-score exactly.
+    More candidates mean higher recall and higher latency.
+    """
+
+    def __init__(
+        self, centroids: np.ndarray, list_indptr: np.ndarray, list_items: np.ndarray
+    ):
+        self.centroids = centroids
+        self.list_indptr = list_indptr
+        self.list_items = list_items
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        item_factors: np.ndarray,
+        item_bias: np.ndarray | None = None,
+        n_lists: int | None = None,
+        n_iter: int = 15,
+        random_state: int = 42,
+        block_size: int = 8192,
+    ) -> "IVFIndex":
+        """
+        Clusters the items with k-means and builds the inverted lists.
+
+        Args:
+            item_factors (np.ndarray): Item factor matrix, shape (n_items, n_factors).
+            item_bias (np.ndarray | None): Item bias vector, shape (n_items,).
+            n_lists (int | None): Number of clusters, 4 * sqrt(n_items) by default.
+            n_iter (int): Number of k-means iterations.
+            random_state (int): Seed of the centroid initialization.
+            block_size (int): Number of items assigned per matrix product.
+
+        Returns:
+            IVFIndex: The built index.
+        """
+        vectors = augment_items(item_factors, item_bias)
+        n_items = vectors.shape[0]
+        if n_lists is None:
+            n_lists = int(4 * np.sqrt(n_items))
+        n_lists = max(min(n_lists, n_items), 1)
+
+        rng = np.random.default_rng(random_state)
+        centroids = vectors[rng.choice(n_items, size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = _nearest_centroids(vectors, centroids, block_size)
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.zeros_like(centroids, dtype=np.float64)
+            np.add.at(sums, assignments, vectors)
+            non_empty = counts > 0
+            centroids[non_empty] = (sums[non_empty] / counts[non_empty, np.newaxis]).astype(
+                np.float32
+            )
+            # Restart empty clusters from random items
+            n_empty = int((~non_empty).sum())
+            if n_empty:
+                centroids[~non_empty] = vectors[rng.choice(n_items, size=n_empty, replace=False)]
+
+        assignments = _nearest_centroids(vectors, centroids, block_size)
+        list_items = np.argsort(assignments, kind="stable").astype(np.int32)
+        list_indptr = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=list_indptr[1:])
+
+        logger.info(f"Built IVF index with {n_lists} lists over {n_items} items")
+        return cls(centroids, list_indptr, list_items)
+
+    def candidates(self, user_factors: np.ndarray, n_candidates: int) -> np.ndarray:
+        """
+        Returns the items of the clusters closest to the user, visiting clusters until
+        at least n_candidates items are collected.
+
+        Args:
+            user_factors (np.ndarray): Latent factor vector of the user, shape (n_factors,).
+            n_candidates (int): Minimum number of candidate items to return.
+
+        Returns:
+            np.ndarray: Candidate item indices, in no particular order.
+        """
+        query = augment_user(user_factors)
+        centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        closeness = 2.0 * (self.centroids @ query) - centroid_norms
+        list_order = np.argsort(-closeness)
+
+        list_sizes = np.diff(self.list_indptr)[list_order]
+        n_probe = int(np.searchsorted(np.cumsum(list_sizes), n_candidates)) + 1
+        probed = list_order[: min(n_probe, self.n_lists)]
+        return np.concatenate(
+            [self.list_items[self.list_indptr[i] : self.list_indptr[i + 1]] for i in probed]
+        )
@@ -0,0 +1,197 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Metrics where a lower value is better; all others are maximized
+LOWER_IS_BETTER = {"rmse", "mae"}
+
+
+def time_based_split(
+    ratings_df: pd.DataFrame,
+    holdout_fraction: float = 0.2,
+    timestamp_col: str = "created_at",
+    user_id_col: str = "user_id",
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Splits ratings at a global point in time, so the model is evaluated on ratings
+    made after every rating it was trained on.
+
+    Args:
+        ratings_df (pd.DataFrame): Ratings with a timestamp column.
+        holdout_fraction (float): Approximate proportion of the most recent ratings held out.
+        timestamp_col (str): Name of the column with the rating timestamps.
+        user_id_col (str): Name of the column for user IDs.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: (train_df, test_df). Held-out ratings of users
+                                           without any earlier rating are dropped, since
+                                           no personalized model can rank for them.
+    """
+    if not 0 < holdout_fraction < 1:
+        raise ValueError("holdout_fraction must be between 0 and 1.")
+
+    cutoff = ratings_df[timestamp_col].quantile(1 - holdout_fraction)
+    is_test = (ratings_df[timestamp_col] >= cutoff).to_numpy()
+    train_df = ratings_df[~is_test]
+    test_df = ratings_df[is_test]
+    test_df = test_df[test_df[user_id_col].isin(train_df[user_id_col].unique())]
+
+    logger.info(
+        f"Time-based split at {cutoff}: {len(train_df)} training ratings, {len(test_df)} held-out ratings"
+    )
+    return train_df, test_df
+
+
+def evaluate_recommendations(
+    recommendations: dict,
+    train_df: pd.DataFrame,
+    test_df: pd.DataFrame,
+    k: int = 10,
+    relevance_threshold: float = 4.0,
+    item_id_col: str = "isbn13",
+    user_id_col: str = "user_id",
+    rating_col: str = "rate",
+) -> dict:
+    """
+    Computes ranking metrics of top-N lists against held-out ratings.
+
+    Users are evaluated if they have at least one relevant held-out rating; users without
+    a recommendation list count as lists without hits. All per-user metrics are computed
+    on a (n_users, k) hit matrix without a Python loop over users.
+
+    Args:
+        recommendations (dict): Recommended item IDs per user, best first, e.g. {user_id: [item_id, ...]}.
+        train_df (pd.DataFrame): Ratings the recommendations were computed from.
+        test_df (pd.DataFrame): Held-out ratings.
+        k (int): Length of the evaluated lists.
+        relevance_threshold (float): Minimum held-out rating of a relevant item.
+        item_id_col (str): Name of the column for item IDs.
+        user_id_col (str): Name of the column for user IDs.
+        rating_col (str): Name of the column for ratings.
+
+    Returns:
+        dict: precision_at_k, recall_at_k, ndcg_at_k, map_at_k (means over users),
+              coverage (share of the training catalogue recommended to anyone),
+              novelty (mean self-information -log2 of the recommended items' popularity)
+              and users (number of evaluated users).
+    """
+    relevant = test_df[test_df[rating_col].to_numpy() >= relevance_threshold]
+    relevant_users = relevant[user_id_col].to_numpy()
+    relevant_items = relevant[item_id_col].to_numpy(dtype=object)
+    train_items = train_df[item_id_col].to_numpy(dtype=object)
+
+    users = np.unique(relevant_users)
+    n_users = len(users)
+    if n_users == 0:
+        logger.warning("No relevant held-out ratings to evaluate against.")
+        return {}
+
+    # Recommendation lists as a padded (n_users, k) matrix of item IDs
+    lists = [list(recommendations.get(user_id, ()))[:k] for user_id in users.tolist()]
+    lengths = np.fromiter((len(items) for items in lists), dtype=np.int64, count=n_users)
+    rows = np.repeat(np.arange(n_users), lengths)
+    cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    recommended_items = np.empty(lengths.sum(), dtype=object)
+    recommended_items[:] = [item for items in lists for item in items]
+
+    # Encode every item ID as an integer code shared by train, test and recommendations
+    item_index = pd.Index(
+        pd.unique(np.concatenate([train_items, relevant_items, recommended_items]))
+    )
+    n_codes = len(item_index)
+    recommended_codes = np.full((n_users, k), -1, dtype=np.int64)
+    recommended_codes[rows, cols] = item_index.get_indexer(recommended_items)
+
+    user_positions = np.searchsorted(users, relevant_users)
+    relevant_keys = np.unique(user_positions * n_codes + item_index.get_indexer(relevant_items))
+    n_relevant = np.bincount(user_positions, minlength=n_users)
+
+    recommended_keys = np.arange(n_users)[:, np.newaxis] * n_codes + recommended_codes
+    hits = np.isin(recommended_keys, relevant_keys) & (recommended_codes >= 0)
+
+    n_hits = hits.sum(axis=1)
+    ideal_hits = np.minimum(n_relevant, k)
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = hits @ discounts
+    idcg = np.cumsum(discounts)[ideal_hits - 1]
+    precision_at_rank = np.cumsum(hits, axis=1) / np.arange(1, k + 1)
+    average_precision = (precision_at_rank * hits).sum(axis=1) / ideal_hits
+
+    # Popularity is the share of training users who rated the item
+    train_codes = item_index.get_indexer(train_items)
+    n_train_users = max(train_df[user_id_col].nunique(), 1)
+    item_counts = np.bincount(train_codes, minlength=n_codes)
+    popularity = np.maximum(item_counts, 1) / n_train_users
+    valid_codes = recommended_codes[recommended_codes >= 0]
+    catalogue_size = max(int((item_counts > 0).sum()), 1)
+
+    return {
+        f"precision_at_{k}": float((n_hits / k).mean()),
+        f"recall_at_{k}": float((n_hits / n_relevant).mean()),
+        f"ndcg_at_{k}": float((dcg / idcg).mean()),
+        f"map_at_{k}": float(average_precision.mean()),
+        "coverage": float(len(np.unique(valid_codes)) / catalogue_size),
+        "novelty": float(-np.log2(popularity[valid_codes]).mean()) if len(valid_codes) else 0.0,
+        "users": int(n_users),
+    }
+
+
+def evaluate_engine(
+    engine,
+    train_df: pd.DataFrame,
+    test_df: pd.DataFrame,
+    k: int = 10,
+    relevance_threshold: float = 4.0,
+    block_size: int = 1024,
+) -> dict:
+    """
+    Computes ranking metrics of an engine trained on train_df against test_df.
+
+    Users are scored in blocks through engine.recommend_for_users. For SVD models, users
+    the engine filtered out of its trainset are folded in from their training ratings,
+    as they are when serving.
+
+    Args:
+        engine (RecommendationEngine): Engine trained on train_df.
+        train_df (pd.DataFrame): Ratings the engine was trained on.
+        test_df (pd.DataFrame): Held-out ratings.
+        k (int): Length of the evaluated lists.
+        relevance_threshold (float): Minimum held-out rating of a relevant item.
+        block_size (int): Number of users scored per matrix product.
+
+    Returns:
+        dict: The metrics of evaluate_recommendations.
+    """
+    user_id_col, item_id_col, rating_col = engine.user_id_col, engine.item_id_col, engine.rating_col
+    relevant = test_df[test_df[rating_col].to_numpy() >= relevance_threshold]
+    user_ids = np.unique(relevant[user_id_col].to_numpy()).tolist()
+
+    recommendations = {
+        user_id: [item_id for item_id, _ in recs]
+        for user_id, recs in engine.recommend_for_users(
+            user_ids, n_recommendations=k, block_size=block_size
+        )
+    }
+
+    missing = set(user_ids) - recommendations.keys()
+    if missing and engine.model_type == "svd":
+        missing_ratings = train_df[train_df[user_id_col].isin(missing)]
+        for user_id, user_ratings in missing_ratings.groupby(user_id_col, observed=True):
+            recs = engine.recommend_from_ratings(
+                list(zip(user_ratings[item_id_col].astype(object), user_ratings[rating_col])), k
+            )
+            recommendations[user_id] = [item_id for item_id, _ in recs]
+
+    return evaluate_recommendations(
+        recommendations,
+        train_df,
+        test_df,
+        k=k,
+        relevance_threshold=relevance_threshold,
+        item_id_col=item_id_col,
+        user_id_col=user_id_col,
+        rating_col=rating_col,
+    )
@@ -0,0 +1,54 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+FEED_CACHE_PREFIX = 'recommendation_feed'
+
+
+def _version_key(user_id):
+    return f'{FEED_CACHE_PREFIX}:version:{user_id}'
+
+
+def get_feed_version(user_id):
+    """
+    Return the current version of a user's cached feed, starting a new one if the
+    version was never set or has been evicted
+    """
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        # add() keeps a version set concurrently by another request
+        if not cache.add(_version_key(user_id), version, None):
+            version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def feed_cache_key(user_id, query_params, endpoint='feed'):
+    """
+    Cache key of one feed response: the user's feed version plus the endpoint and the
+    page's query parameters
+    """
+    query = hashlib.md5(query_params.urlencode().encode(), usedforsecurity=False).hexdigest()
+    return f'{FEED_CACHE_PREFIX}:{user_id}:{get_feed_version(user_id)}:{endpoint}:{query}'
+
+
+def get_cached_feed(user_id, query_params, endpoint='feed'):
+    return cache.get(feed_cache_key(user_id, query_params, endpoint))
+
+
+def set_cached_feed(user_id, query_params, data, endpoint='feed'):
+    cache.set(
+        feed_cache_key(user_id, query_params, endpoint),
+        data,
+        getattr(settings, 'RECOMMENDATION_FEED_CACHE_TIMEOUT', 60 * 60)
+    )
+
+
+def invalidate_feeds(user_ids):
+    """
+    Start a new feed version for each user so all their cached pages are ignored;
+    the old entries simply expire
+    """
+    version = time.time_ns()
+    cache.set_many({_version_key(user_id): version for user_id in user_ids}, None)
@@ -0,0 +1,151 @@
+import logging
+import numpy as np
+import scipy.sparse as sp
+
+logger = logging.getLogger(__name__)
+
+
+class ImplicitALS:
+    """
+    Weighted alternating least squares for implicit feedback (Hu, Koren & Volinsky).
+
+    Every observed (user, item) interaction has preference 1 and confidence
+    1 + alpha * weight; unobserved pairs have preference 0 and confidence 1.
+    Each half-step solves the regularized weighted least squares problem of all
+    users (or items) at once with a few conjugate gradient iterations, warm-started
+    from the previous factors. The per-user matrix-vector products are expressed as
+    dense BLAS products plus one sparse-dense product over the interaction matrix,
+    so the cost is linear in the number of interactions and no n_factors x n_factors
+    system is built per user.
+    """
+
+    def __init__(
+        self,
+        n_factors: int = 64,
+        regularization: float = 0.1,
+        alpha: float = 40.0,
+        n_iterations: int = 15,
+        cg_steps: int = 3,
+        block_size: int = 8192,
+        random_state: int = 42,
+    ):
+        """
+        Args:
+            n_factors (int): Number of latent factors.
+            regularization (float): L2 regularization of the factors.
+            alpha (float): Scale from interaction weight to confidence.
+            n_iterations (int): Number of alternating user/item half-step pairs.
+            cg_steps (int): Conjugate gradient iterations per half-step.
+            block_size (int): Number of users (items) solved per batch, bounding the
+                              memory of the per-interaction temporaries.
+            random_state (int): Seed of the factor initialization.
+        """
+        self.n_factors = n_factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.n_iterations = n_iterations
+        self.cg_steps = cg_steps
+        self.block_size = block_size
+        self.random_state = random_state
+
+        self.user_factors = None
+        self.item_factors = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.user_factors is not None
+
+    def fit(self, interactions: sp.csr_matrix) -> "ImplicitALS":
+        """
+        Learns user and item factors from a user x item matrix of interaction weights.
+
+        Args:
+            interactions (sp.csr_matrix): Non-negative interaction weights, shape (n_users, n_items).
+
+        Returns:
+            ImplicitALS: self, with user_factors and item_factors set.
+        """
+        # Stored values are c - 1 = alpha * weight; the implicit ones are added in the solver
+        user_items = sp.csr_matrix(interactions, dtype=np.float32) * np.float32(self.alpha)
+        user_items.sum_duplicates()
+        item_users = user_items.T.tocsr()
+
+        rng = np.random.default_rng(self.random_state)
+        n_users, n_items = user_items.shape
+        user_factors = rng.normal(0, 0.01, (n_users, self.n_factors)).astype(np.float32)
+        item_factors = rng.normal(0, 0.01, (n_items, self.n_factors)).astype(np.float32)
+
+        for iteration in range(self.n_iterations):
+            user_factors = self._solve(user_items, item_factors, user_factors)
+            item_factors = self._solve(item_users, user_factors, item_factors)
+            logger.debug(f"ALS iteration {iteration + 1}/{self.n_iterations} done")
+
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        return self
+
+    def _solve(
+        self, confidence: sp.csr_matrix, fixed: np.ndarray, initial: np.ndarray
+    ) -> np.ndarray:
+        """
+        Runs conjugate gradient on (F^T C_u F + reg I) x_u = F^T C_u p_u for every row u
+        of the confidence matrix, with F the fixed factors.
+        Private helper method.
+        """
+        gram = fixed.T @ fixed + self.regularization * np.eye(
+            self.n_factors, dtype=np.float32
+        )
+        solved = np.empty_like(initial)
+
+        for start in range(0, confidence.shape[0], self.block_size):
+            block = confidence[start : start + self.block_size]
+            x = initial[start : start + self.block_size].copy()
+
+            # b = F^T C_u p_u = sum over interactions of (1 + alpha * w) f_i
+            targets = sp.csr_matrix(
+                (block.data + 1.0, block.indices, block.indptr), shape=block.shape
+            )
+            residual = targets @ fixed - self._matvec(block, fixed, gram, x)
+            direction = residual.copy()
+            residual_norms = np.einsum("ij,ij->i", residual, residual)
+
+            for _ in range(self.cg_steps):
+                product = self._matvec(block, fixed, gram, direction)
+                curvature = np.einsum("ij,ij->i", direction, product)
+                step = np.divide(
+                    residual_norms,
+                    curvature,
+                    out=np.zeros_like(residual_norms),
+                    where=curvature > 0,
+                )
+                x += step[:, np.newaxis] * direction
+                residual -= step[:, np.newaxis] * product
+                new_norms = np.einsum("ij,ij->i", residual, residual)
+                beta = np.divide(
+                    new_norms,
+                    residual_norms,
+                    out=np.zeros_like(new_norms),
+                    where=residual_norms > 0,
+                )
+                direction = residual + beta[:, np.newaxis] * direction
+                residual_norms = new_norms
+
+            solved[start : start + self.block_size] = x
+        return solved
+
+    @staticmethod
+    def _matvec(
+        block: sp.csr_matrix, fixed: np.ndarray, gram: np.ndarray, x: np.ndarray
+    ) -> np.ndarray:
+        """
+        Computes (F^T F + reg I) x_u + sum_i (c_ui - 1) (f_i . x_u) f_i for every row u.
+        Private helper method.
+        """
+        rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+        weighted_dots = (
+            np.einsum("ij,ij->i", x[rows], fixed[block.indices]) * block.data
+        )
+        weighted = sp.csr_matrix(
+            (weighted_dots, block.indices, block.indptr), shape=block.shape
+        )
+        return x @ gram + weighted @ fixed
@@ -0,0 +1,92 @@
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import RecommendationImpression
+
+logger = logging.getLogger(__name__)
+
+
+def get_buffer_size():
+    return getattr(settings, 'RECOMMENDATION_IMPRESSION_BUFFER_SIZE', 500)
+
+
+def get_flush_seconds():
+    return getattr(settings, 'RECOMMENDATION_IMPRESSION_FLUSH_SECONDS', 30)
+
+
+class ImpressionBuffer:
+    """
+    Process-level buffer of recommendation impressions
+    Impressions are kept in memory and written with one bulk INSERT once
+    RECOMMENDATION_IMPRESSION_BUFFER_SIZE are pending or the oldest is
+    RECOMMENDATION_IMPRESSION_FLUSH_SECONDS old, so serving a feed page costs no query
+    Impressions are best-effort: a failed write is logged and dropped, and impressions
+    still buffered when a process is killed are lost
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def add(self, user_id, items, shown_at=None):
+        """
+        Buffer the impressions of one feed page; items are (book_id, model_id) pairs in
+        page order
+        """
+        shown_at = shown_at or timezone.now()
+        impressions = [
+            RecommendationImpression(
+                user_id=user_id, book_id=book_id, model_id=model_id,
+                position=position, shown_at=shown_at
+            )
+            for position, (book_id, model_id) in enumerate(items)
+        ]
+        if not impressions:
+            return
+        with self._lock:
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._pending.extend(impressions)
+            due = (
+                len(self._pending) >= get_buffer_size()
+                or time.monotonic() - self._oldest >= get_flush_seconds()
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all buffered impressions; returns the number written
+        """
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, [], None
+        if not pending:
+            return 0
+        try:
+            RecommendationImpression.objects.bulk_create(pending, batch_size=get_buffer_size())
+        except DatabaseError as e:
+            logger.error(f"Dropped {len(pending)} recommendation impressions: {str(e)}")
+            return 0
+        return len(pending)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+impression_buffer = ImpressionBuffer()
+atexit.register(impression_buffer.flush)
+
+
+def log_impressions(user_id, recommendations):
+    """
+    Record a served feed page; recommendations are the serialized UserRecommendations
+    """
+    impression_buffer.add(
+        user_id, [(recommendation['book'], recommendation.get('model')) for recommendation in recommendations]
+    )
@@ -0,0 +1,306 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from surprise import AlgoBase, PredictionImpossible
+
+logger = logging.getLogger(__name__)
+
+# Set once per worker process by _init_worker and only read afterwards
+_shared_normalized = None
+_shared_binary = None
+_shared_k = None
+_shared_shrinkage = None
+
+
+def _init_worker(normalized, binary, k, shrinkage):
+    global _shared_normalized, _shared_binary, _shared_k, _shared_shrinkage
+    _shared_normalized = normalized
+    _shared_binary = binary
+    _shared_k = k
+    _shared_shrinkage = shrinkage
+
+
+def top_k_neighbors_block(
+    normalized: sp.csr_matrix,
+    binary: sp.csr_matrix,
+    start: int,
+    stop: int,
+    k: int,
+    shrinkage: float,
+) -> tuple[int, np.ndarray, np.ndarray]:
+    """
+    Computes the k most similar users of the users start..stop-1.
+
+    The similarity is the cosine of the mean-centered rating vectors (the Pearson
+    correlation with unrated items counted as the user's mean), shrunk towards zero by
+    the number of co-rated items: sim * (n_common - 1) / (n_common - 1 + shrinkage).
+    Only the (stop - start) x n_users similarity block exists at any time.
+
+    Args:
+        normalized (sp.csr_matrix): Mean-centered, L2-normalized ratings, shape (n_users, n_items).
+        binary (sp.csr_matrix): 1 for every rating, same shape.
+        start (int): First user of the block.
+        stop (int): End (exclusive) of the block.
+        k (int): Number of neighbours kept per user.
+        shrinkage (float): Shrinkage constant, 0 disables shrinkage.
+
+    Returns:
+        tuple[int, np.ndarray, np.ndarray]: (start, neighbour indices, similarities), both
+                                            (stop - start, k); neighbours without a positive
+                                            similarity are padded with index -1 and similarity 0.
+    """
+    similarities = (normalized[start:stop] @ normalized.T).toarray()
+    if shrinkage:
+        n_common = (binary[start:stop] @ binary.T).toarray()
+        similarities *= np.maximum(n_common - 1, 0) / (np.maximum(n_common - 1, 0) + shrinkage)
+    # A user is not their own neighbour
+    similarities[np.arange(stop - start), np.arange(start, stop)] = 0.0
+
+    k = min(k, similarities.shape[1])
+    top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    top_similarities = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(-top_similarities, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    top_similarities = np.take_along_axis(top_similarities, order, axis=1).astype(np.float32)
+
+    positive = top_similarities > 0
+    return start, np.where(positive, top, -1), np.where(positive, top_similarities, 0.0)
+
+
+def _top_k_neighbors_worker(start: int, stop: int):
+    return top_k_neighbors_block(
+        _shared_normalized, _shared_binary, start, stop, _shared_k, _shared_shrinkage
+    )
+
+
+class SparseUserKNN(AlgoBase):
+    """
+    User-based KNN with means that keeps only the k best neighbours per user.
+
+    Surprise's KNNWithMeans builds a dense n_users x n_users similarity matrix on one
+    core. This algorithm computes the similarities from sparse mean-centered rating
+    vectors in blocks of users across a process pool and keeps the k most similar users
+    per user, so memory is O(n_users * k) plus the sparse ratings. Predictions follow
+    KNNWithMeans (user mean plus the similarity-weighted mean offset of the positively
+    similar neighbours who rated the item), with the neighbours taken from the user's
+    k nearest users rather than from the k nearest users who rated the item.
+    """
+
+    def __init__(
+        self,
+        k: int = 40,
+        shrinkage: float = 100.0,
+        min_k: int = 1,
+        block_size: int | None = None,
+        n_jobs: int | None = None,
+        verbose: bool = False,
+    ):
+        """
+        Args:
+            k (int): Number of neighbours kept per user.
+            shrinkage (float): Shrinkage of similarities with few co-rated items.
+            min_k (int): Minimum number of neighbours who rated the item to use them;
+                         otherwise the user's mean is predicted.
+            block_size (int | None): Users per similarity block, chosen from the number
+                                     of users by default to bound each block's memory.
+            n_jobs (int | None): Number of worker processes, all cores by default.
+            verbose (bool): Unused, kept for Surprise compatibility.
+        """
+        AlgoBase.__init__(self)
+        self.k = k
+        self.shrinkage = shrinkage
+        self.min_k = min_k
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+
+    def fit(self, trainset):
+        AlgoBase.fit(self, trainset)
+
+        n_ratings = trainset.n_ratings
+        users = np.empty(n_ratings, dtype=np.int32)
+        items = np.empty(n_ratings, dtype=np.int32)
+        ratings = np.empty(n_ratings, dtype=np.float32)
+        for index, (u, i, r) in enumerate(trainset.all_ratings()):
+            users[index], items[index], ratings[index] = u, i, r
+
+        shape = (trainset.n_users, trainset.n_items)
+        rating_matrix = sp.csr_matrix((ratings, (users, items)), shape=shape)
+        rating_matrix.sort_indices()
+        counts = np.diff(rating_matrix.indptr)
+        self.means = np.asarray(rating_matrix.sum(axis=1)).ravel() / np.maximum(counts, 1)
+
+        rows = np.repeat(np.arange(shape[0]), counts)
+        self.centered = sp.csr_matrix(
+            (rating_matrix.data - self.means[rows].astype(np.float32),
+             rating_matrix.indices, rating_matrix.indptr),
+            shape=shape,
+        )
+        self.binary = sp.csr_matrix(
+            (np.ones_like(rating_matrix.data), rating_matrix.indices, rating_matrix.indptr),
+            shape=shape,
+        )
+        # Item-major copy for single predictions
+        self.centered_by_item = self.centered.tocsc()
+        self.centered_by_item.sort_indices()
+
+        norms = np.sqrt(np.asarray(self.centered.multiply(self.centered).sum(axis=1)).ravel())
+        inverse_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        normalized = sp.csr_matrix(sp.diags(inverse_norms.astype(np.float32)) @ self.centered)
+
+        self.neighbors, self.neighbor_similarities = self._compute_neighbors(normalized)
+        return self
+
+    def _compute_neighbors(self, normalized: sp.csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the top-k neighbours of every user, in blocks across a process pool.
+        Private helper method.
+        """
+        n_users = normalized.shape[0]
+        block_size = self.block_size or max(1, min(4096, (1 << 23) // max(n_users, 1)))
+        blocks = [
+            (start, min(start + block_size, n_users)) for start in range(0, n_users, block_size)
+        ]
+        n_jobs = min(self.n_jobs or os.cpu_count() or 1, len(blocks))
+        logger.info(
+            f"Computing {self.k} nearest neighbours of {n_users} users in {len(blocks)} blocks "
+            f"with {n_jobs} worker processes"
+        )
+
+        k = min(self.k, n_users)
+        neighbors = np.full((n_users, k), -1, dtype=np.int32)
+        similarities = np.zeros((n_users, k), dtype=np.float32)
+
+        if n_jobs <= 1:
+            results = (
+                top_k_neighbors_block(normalized, self.binary, start, stop, k, self.shrinkage)
+                for start, stop in blocks
+            )
+            for start, block_neighbors, block_similarities in results:
+                neighbors[start : start + len(block_neighbors)] = block_neighbors
+                similarities[start : start + len(block_neighbors)] = block_similarities
+            return neighbors, similarities
+
+        # With the fork start method the workers share the parent's matrices
+        mp_context = (
+            multiprocessing.get_context("fork")
+            if "fork" in multiprocessing.get_all_start_methods()
+            else None
+        )
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(normalized, self.binary, k, self.shrinkage),
+        ) as executor:
+            futures = [
+                executor.submit(_top_k_neighbors_worker, start, stop) for start, stop in blocks
+            ]
+            for future in futures:
+                start, block_neighbors, block_similarities = future.result()
+                neighbors[start : start + len(block_neighbors)] = block_neighbors
+                similarities[start : start + len(block_neighbors)] = block_similarities
+        return neighbors, similarities
+
+    def estimate(self, u, i):
+        if not (self.trainset.knows_user(u) and self.trainset.knows_item(i)):
+            raise PredictionImpossible("User and/or item is unknown.")
+
+        column = slice(self.centered_by_item.indptr[i], self.centered_by_item.indptr[i + 1])
+        raters = self.centered_by_item.indices[column]
+        offsets = self.centered_by_item.data[column]
+
+        # Neighbours who rated the item, found by binary search in the sorted raters
+        neighbors = self.neighbors[u]
+        positions = np.searchsorted(raters, neighbors)
+        rated = (neighbors >= 0) & (positions < len(raters))
+        rated[rated] = raters[positions[rated]] == neighbors[rated]
+
+        est = self.means[u]
+        actual_k = int(rated.sum())
+        if actual_k and actual_k >= self.min_k:
+            similarities = self.neighbor_similarities[u][rated]
+            est += float(similarities @ offsets[positions[rated]]) / float(similarities.sum())
+        return est, {"actual_k": actual_k}
+
+    def predict_block(self, user_indices: np.ndarray) -> np.ndarray:
+        """
+        Estimates the ratings of every item for a block of users at once.
+
+        Args:
+            user_indices (np.ndarray): Inner user IDs.
+
+        Returns:
+            np.ndarray: Estimated ratings, shape (len(user_indices), n_items).
+        """
+        neighbors = self.neighbors[user_indices]
+        similarities = self.neighbor_similarities[user_indices]
+        valid = neighbors >= 0
+        weights = sp.csr_matrix(
+            (
+                similarities[valid],
+                neighbors[valid],
+                np.concatenate([[0], np.cumsum(valid.sum(axis=1))]),
+            ),
+            shape=(len(user_indices), self.centered.shape[0]),
+        )
+        weighted_offsets = (weights @ self.centered).toarray()
+        similarity_sums = (weights @ self.binary).toarray()
+        n_raters = (weights.sign() @ self.binary).toarray()
+
+        use_neighbors = (n_raters >= max(self.min_k, 1)) & (similarity_sums > 0)
+        estimates = np.divide(
+            weighted_offsets,
+            similarity_sums,
+            out=np.zeros_like(weighted_offsets),
+            where=use_neighbors,
+        )
+        estimates += self.means[user_indices][:, np.newaxis]
+        return estimates
+
+    def top_n(self, user_indices: list, n: int) -> list[list[tuple[int, float]]]:
+        """
+        Returns the n highest estimated unrated items of each user, estimates clipped to
+        the rating scale as in predict. Users are scored in sub-blocks that keep the dense
+        estimate matrix at about 4M entries.
+
+        Args:
+            user_indices (list): Inner user IDs.
+            n (int): Number of items per user.
+
+        Returns:
+            list[list[tuple[int, float]]]: (inner item ID, estimate) pairs per user, best first.
+        """
+        user_indices = np.asarray(user_indices, dtype=np.int64)
+        n_items = self.centered.shape[1]
+        n = min(n, n_items)
+        if n == 0:
+            return [[] for _ in user_indices]
+        low, high = self.trainset.rating_scale
+        block_size = max(1, (1 << 22) // max(n_items, 1))
+
+        recommendations = []
+        for start in range(0, len(user_indices), block_size):
+            block = user_indices[start : start + block_size]
+            estimates = self.predict_block(block)
+            np.clip(estimates, low, high, out=estimates)
+            estimates[self.binary[block].nonzero()] = -np.inf
+
+            top = np.argpartition(-estimates, n - 1, axis=1)[:, :n]
+            top_estimates = np.take_along_axis(estimates, top, axis=1)
+            order = np.argsort(-top_estimates, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_estimates = np.take_along_axis(top_estimates, order, axis=1)
+            recommendations.extend(
+                [
+                    (int(item), float(estimate))
+                    for item, estimate in zip(row_items, row_estimates)
+                    if np.isfinite(estimate)
+                ]
+                for row_items, row_estimates in zip(top, top_estimates)
+            )
+        return recommendations
@@ -0,0 +1,243 @@
+import logging
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.services import RecommendationService
+from recommendation.serving import ServingModel
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Benchmark recommendation pipeline stages against their previous implementations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            type=str,
+            default='scoring',
+            choices=['scoring', 'extraction', 'ann'],
+            help='Stage to benchmark: top-N scoring (scoring), ratings extraction from the database (extraction) '
+                 'or approximate retrieval against exact scoring (ann)'
+        )
+        parser.add_argument(
+            '--model-id',
+            type=int,
+            help='ID of the recommendation model to benchmark (optional, uses active model by default)'
+        )
+        parser.add_argument(
+            '--synthetic',
+            action='store_true',
+            help='Train a throwaway SVD model on random ratings instead of loading a stored model'
+        )
+        parser.add_argument(
+            '--synthetic-users',
+            type=int,
+            default=2000,
+            help='Number of users in the synthetic ratings data'
+        )
+        parser.add_argument(
+            '--synthetic-items',
+            type=int,
+            default=20000,
+            help='Number of items in the synthetic ratings data'
+        )
+        parser.add_argument(
+            '--synthetic-ratings',
+            type=int,
+            default=200000,
+            help='Number of ratings in the synthetic ratings data'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=20,
+            help='Number of users to sample for the benchmark'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10,
+            help='Number of recommendations to generate per user'
+        )
+        parser.add_argument(
+            '--candidates',
+            type=int,
+            nargs='+',
+            default=[100, 200, 500, 1000],
+            help='Numbers of ANN candidates to benchmark (ann target)'
+        )
+        parser.add_argument(
+            '--ann-lists',
+            type=int,
+            help='Number of IVF clusters when the index has to be built (ann target)'
+        )
+
+    def handle(self, *args, **options):
+        if options['target'] == 'extraction':
+            self._benchmark_extraction()
+            return
+
+        if options['synthetic']:
+            engine = self._train_synthetic_engine(options)
+        else:
+            model_data = RecommendationService.load_recommendation_model(options['model_id'])
+            if not model_data:
+                self.stdout.write(self.style.ERROR('No recommendation model available. Use --synthetic or train a model first.'))
+                return
+            engine, _ = model_data
+
+        if options['target'] == 'ann':
+            self._benchmark_ann(engine, options)
+            return
+
+        if engine is None or getattr(engine, 'trainset', None) is None:
+            self.stdout.write(self.style.ERROR('Recommendation model has no trainset to benchmark against. '
+                                               'Models stored as serving artifacts only keep the factors; use --synthetic.'))
+            return
+
+        if engine.model_type != 'svd':
+            self.stdout.write(self.style.ERROR('Vectorized scoring is only available for SVD models.'))
+            return
+
+        self._benchmark_scoring(engine, options['users'], options['count'])
+
+    def _train_synthetic_engine(self, options):
+        rng = np.random.default_rng(42)
+        ratings_df = pd.DataFrame({
+            'user_id': rng.integers(0, options['synthetic_users'], options['synthetic_ratings']),
+            'isbn13': rng.integers(0, options['synthetic_items'], options['synthetic_ratings']).astype(str),
+            'rate': rng.integers(1, 6, options['synthetic_ratings']),
+        }).drop_duplicates(['user_id', 'isbn13'])
+
+        self.stdout.write(f'Training synthetic SVD model on {len(ratings_df)} ratings...')
+        engine = RecommendationEngine(model_type='svd', min_ratings_per_user=1)
+        if engine.train(ratings_df) is None:
+            return None
+        return engine
+
+    def _benchmark_scoring(self, engine, n_users, count):
+        trainset = engine.trainset
+        rng = np.random.default_rng(0)
+        sample = rng.choice(trainset.n_users, size=min(n_users, trainset.n_users), replace=False)
+        user_ids = [trainset.to_raw_uid(int(inner_uid)) for inner_uid in sample]
+
+        self.stdout.write(
+            f'Benchmarking {len(user_ids)} users against {trainset.n_items} items (top {count})...'
+        )
+
+        # Silence per-user log lines so they do not distort the timings
+        engine_logger = logging.getLogger('recommendation.recommendation_engine')
+        previous_level = engine_logger.level
+        engine_logger.setLevel(logging.WARNING)
+        try:
+            loop_time = 0.0
+            vectorized_time = 0.0
+            matching_items = 0
+            max_score_diff = 0.0
+            for user_id in user_ids:
+                inner_uid = trainset.to_inner_uid(user_id)
+
+                start = time.perf_counter()
+                loop_recs = engine._recommend_by_prediction(user_id, inner_uid, count)
+                loop_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                vectorized_recs = engine.recommend_for_user(user_id, count)
+                vectorized_time += time.perf_counter() - start
+
+                matching_items += len({iid for iid, _ in loop_recs} & {iid for iid, _ in vectorized_recs})
+                for (_, loop_score), (_, vectorized_score) in zip(loop_recs, vectorized_recs):
+                    max_score_diff = max(max_score_diff, abs(loop_score - vectorized_score))
+        finally:
+            engine_logger.setLevel(previous_level)
+
+        n = len(user_ids)
+        self.stdout.write(f'Predict loop:      {loop_time / n * 1000:.2f} ms/user')
+        self.stdout.write(f'Vectorized top-N:  {vectorized_time / n * 1000:.2f} ms/user')
+        if vectorized_time > 0:
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {loop_time / vectorized_time:.1f}x'))
+        self.stdout.write(
+            f'Overlap of recommended items: {matching_items}/{n * count} '
+            f'(ties at the clipped maximum may be ordered differently), '
+            f'max score difference: {max_score_diff:.2e}'
+        )
+
+    def _benchmark_ann(self, engine, options):
+        if engine is None or engine.model_type != 'svd':
+            self.stdout.write(self.style.ERROR('Approximate retrieval is only available for SVD models.'))
+            return
+
+        serving_model = engine if isinstance(engine, ServingModel) else engine.to_serving_model()
+        if serving_model.ann_centroids is None:
+            self.stdout.write('Model has no IVF index, building one...')
+            start = time.perf_counter()
+            serving_model.build_ann_index(n_lists=options['ann_lists'])
+            self.stdout.write(f'Built index in {time.perf_counter() - start:.2f} s')
+
+        rng = np.random.default_rng(0)
+        sample = rng.choice(serving_model.n_users, size=min(options['users'], serving_model.n_users), replace=False)
+        user_ids = [serving_model.user_ids[index].item() for index in sample]
+        count = options['count']
+
+        self.stdout.write(
+            f'Benchmarking {len(user_ids)} users against {serving_model.n_items} items (top {count})...'
+        )
+
+        exact_recs = {}
+        start = time.perf_counter()
+        for user_id in user_ids:
+            exact_recs[user_id] = {iid for iid, _ in serving_model.recommend_for_user(user_id, count, n_candidates=0)}
+        exact_time = (time.perf_counter() - start) / len(user_ids)
+        self.stdout.write(f'{"exact":>12}  {exact_time * 1000:8.3f} ms/user  recall@{count} 1.000')
+
+        for n_candidates in options['candidates']:
+            found = 0
+            start = time.perf_counter()
+            for user_id in user_ids:
+                recs = serving_model.recommend_for_user(user_id, count, n_candidates=n_candidates)
+                found += len(exact_recs[user_id] & {iid for iid, _ in recs})
+            ann_time = (time.perf_counter() - start) / len(user_ids)
+            total = sum(len(recs) for recs in exact_recs.values())
+            self.stdout.write(
+                f'{n_candidates:>12}  {ann_time * 1000:8.3f} ms/user  recall@{count} {found / max(total, 1):.3f}'
+            )
+
+    def _benchmark_extraction(self):
+        self.stdout.write('Benchmarking ratings extraction from the database...')
+        results = []
+        for name, extract in (
+            ('select_related loop', self._legacy_ratings_dataframe),
+            ('streamed values_list', RecommendationService.get_ratings_dataframe),
+        ):
+            tracemalloc.start()
+            start = time.perf_counter()
+            ratings_df = extract()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            frame_size = ratings_df.memory_usage(deep=True).sum()
+            results.append(elapsed)
+            self.stdout.write(
+                f'{name:<22} {elapsed:8.2f} s  peak Python memory {peak / 2**20:8.1f} MiB  '
+                f'DataFrame {frame_size / 2**20:8.1f} MiB  ({len(ratings_df)} ratings)'
+            )
+            del ratings_df
+
+        if results[1] > 0:
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {results[0] / results[1]:.1f}x'))
+
+    @staticmethod
+    def _legacy_ratings_dataframe():
+        # The extraction used before ratings were streamed, kept here as the benchmark baseline
+        from books.models import BookRating
+
+        ratings = BookRating.objects.select_related('user', 'book').all()
+        return pd.DataFrame({
+            'user_id': [rating.user.id for rating in ratings],
+            'isbn13': [rating.book.isbn13 for rating in ratings],
+            'rate': [rating.rate for rating in ratings],
+        })
@@ -0,0 +1,76 @@
+import logging
+from django.core.management.base import BaseCommand
+from recommendation.models import RecommendationModel
+from recommendation.services import RecommendationService
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Evaluate a recommendation model configuration with ranking metrics on a time-based holdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model-id',
+            type=int,
+            help='ID of the recommendation model to evaluate (optional, uses the active model by default)'
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=10,
+            help='Length of the evaluated recommendation lists'
+        )
+        parser.add_argument(
+            '--holdout-fraction',
+            type=float,
+            default=0.2,
+            help='Proportion of the most recent ratings held out for evaluation'
+        )
+        parser.add_argument(
+            '--relevance-threshold',
+            type=float,
+            default=4.0,
+            help='Minimum held-out rating for a book to count as relevant'
+        )
+
+    def handle(self, *args, **options):
+        model_id = options['model_id']
+
+        try:
+            if model_id:
+                model_record = RecommendationModel.objects.get(id=model_id)
+            else:
+                model_record = RecommendationModel.objects.filter(is_active=True).order_by('-created_at').first()
+        except RecommendationModel.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f'Recommendation model with ID {model_id} does not exist'))
+            return
+
+        if not model_record:
+            self.stdout.write(self.style.ERROR('No active recommendation model available'))
+            return
+
+        self.stdout.write(f'Evaluating {model_record.model_type.upper()} model {model_record.id}...')
+
+        try:
+            metrics = RecommendationService.evaluate_recommendation_model(
+                model_record,
+                k=options['k'],
+                holdout_fraction=options['holdout_fraction'],
+                relevance_threshold=options['relevance_threshold']
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error evaluating model: {str(e)}'))
+            return
+
+        if not metrics:
+            self.stdout.write(self.style.ERROR('Evaluation failed. Check logs for details.'))
+            return
+
+        for name, value in metrics.items():
+            self.stdout.write(f'{name}: {value:.4f}' if isinstance(value, float) else f'{name}: {value}')
+
+        failures = RecommendationService.check_activation_thresholds(model_record)
+        if failures:
+            self.stdout.write(self.style.WARNING(f'Activation thresholds not met: {"; ".join(failures)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Model meets the activation thresholds'))
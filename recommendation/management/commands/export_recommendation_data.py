@@ -1,11 +1,48 @@
 # recommendations/management/commands/export_recommendation_data.py
+import os
+import pandas as pd
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from recommendation.tocsv import export_data_to_csv
+from books.models import Book
+from recommendation.snapshot import refresh_ratings_snapshot
 
 class Command(BaseCommand):
     help = 'Export book and ratings data to CSV files for recommendation system'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default=os.path.join(settings.MEDIA_ROOT, 'recommendation_data'),
+            help='Directory the books.csv and ratings.csv files are written to'
+        )
+        parser.add_argument(
+            '--full-refresh',
+            action='store_true',
+            help='Rebuild the ratings snapshot from the whole ratings table instead of refreshing it'
+        )
+
     def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+
         self.stdout.write('Exporting recommendation data to CSV...')
-        export_data_to_csv()
-        self.stdout.write(self.style.SUCCESS('Successfully exported recommendation data!'))
\ No newline at end of file
+
+        # Ratings come from the snapshot, so only new and changed ratings are read from the database
+        snapshot = refresh_ratings_snapshot(full=options['full_refresh'])
+        ratings_df = snapshot.to_dataframe(include_timestamps=True)
+        ratings_df.to_csv(os.path.join(output_dir, 'ratings.csv'), index=False)
+
+        books_df = pd.DataFrame(
+            list(Book.objects.order_by().values(
+                'isbn13', 'title', 'publication_date', 'number_of_pages',
+                'number_of_ratings', 'average_rate'
+            )),
+            columns=['isbn13', 'title', 'publication_date', 'number_of_pages',
+                     'number_of_ratings', 'average_rate'],
+        )
+        books_df.to_csv(os.path.join(output_dir, 'books.csv'), index=False)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully exported {len(ratings_df)} ratings and {len(books_df)} books to {output_dir}!'
+        ))
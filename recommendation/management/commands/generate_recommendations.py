@@ -39,6 +39,11 @@ class Command(BaseCommand):
             default=3,
             help='Minimum number of ratings required for a user to get recommendations'
         )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Record the run for all users with cProfile (per-stage timings are always stored)'
+        )
 
     def handle(self, *args, **options):
         user_id = options['user_id']
@@ -91,7 +96,8 @@ class Command(BaseCommand):
             count = RecommendationService.generate_recommendations_for_all_users(
                 n_recommendations=count,
                 model_id=model_id,
-                min_ratings=min_ratings
+                min_ratings=min_ratings,
+                profile=options['profile']
             )
             
             self.stdout.write(self.style.SUCCESS(f'Generated recommendations for multiple users. Total count: {count}'))
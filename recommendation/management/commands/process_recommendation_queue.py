@@ -0,0 +1,35 @@
+import logging
+from django.core.management.base import BaseCommand
+from recommendation.work_queue import process_pending_updates
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Refresh recommendations of users queued by rating events (for deployments without a Celery worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Maximum number of queued users to refresh per batch (defaults to RECOMMENDATION_QUEUE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=10,
+            help='Number of recommendations to generate per user'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed, remaining = process_pending_updates(
+                batch_size=options['batch_size'],
+                n_recommendations=options['count']
+            )
+            total += processed
+            # Stop once the queue is empty or only holds users still inside the debounce window
+            if not processed or not remaining:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Refreshed recommendations for {total} queued users'))
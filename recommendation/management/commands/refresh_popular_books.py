@@ -0,0 +1,27 @@
+import logging
+from django.core.management.base import BaseCommand
+from recommendation.popularity import refresh_popular_books
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recompute the cold-start popularity rankings of books'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-n',
+            type=int,
+            help='Number of books kept per ranking (defaults to RECOMMENDATION_POPULARITY_TOP_N)'
+        )
+        parser.add_argument(
+            '--prior-weight',
+            type=float,
+            help='Weight of the global mean in the Bayesian average (defaults to the mean number of ratings per book)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            count = refresh_popular_books(top_n=options['top_n'], prior_weight=options['prior_weight'])
+            self.stdout.write(self.style.SUCCESS(f'Refreshed popularity rankings with {count} entries'))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error refreshing popularity rankings: {str(e)}'))
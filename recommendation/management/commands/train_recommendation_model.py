@@ -12,8 +12,8 @@ class Command(BaseCommand):
             '--model-type',
             type=str,
             default='svd',
-            choices=['svd', 'knn'],
-            help='Type of recommendation model to train (svd, knn)'
+            choices=['svd', 'knn', 'als'],
+            help='Type of recommendation model to train (svd, knn, or als for implicit feedback)'
         )
         parser.add_argument(
             '--min-ratings',
@@ -25,7 +25,7 @@ class Command(BaseCommand):
             '--n-factors',
             type=int,
             default=100,
-            help='Number of factors for SVD model'
+            help='Number of factors for SVD and ALS models'
         )
         parser.add_argument(
             '--knn-k',
@@ -33,6 +33,16 @@ class Command(BaseCommand):
             default=40,
             help='Number of neighbors for KNN model'
         )
+        parser.add_argument(
+            '--evaluate',
+            action='store_true',
+            help='Compute ranking metrics on a time-based holdout before activating the model'
+        )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Record the training run with cProfile (per-stage timings are always stored)'
+        )
 
     def handle(self, *args, **options):
         model_type = options['model_type']
@@ -47,7 +57,9 @@ class Command(BaseCommand):
                 model_type=model_type,
                 min_ratings_per_user=min_ratings,
                 n_factors=n_factors,
-                knn_k=knn_k
+                knn_k=knn_k,
+                evaluate=options['evaluate'],
+                profile=options['profile']
             )
             
             if model_record:
@@ -56,6 +68,15 @@ class Command(BaseCommand):
                 ))
                 if model_record.rmse is not None and model_record.mae is not None:
                     self.stdout.write(f'RMSE: {model_record.rmse:.4f}, MAE: {model_record.mae:.4f}')
+                for stage in model_record.profile.get('training', {}).get('stages', []):
+                    self.stdout.write(
+                        f"{stage['stage']}: {stage['wall_time_s']:.2f}s, "
+                        f"peak RSS {stage['peak_rss_mb']} MiB, {stage['items_per_s']} rows/s"
+                    )
+                if not model_record.is_active:
+                    self.stdout.write(self.style.WARNING(
+                        'Model was not activated: it does not meet RECOMMENDATION_ACTIVATION_THRESHOLDS'
+                    ))
             else:
                 self.stdout.write(self.style.ERROR('Model training failed. Check logs for details.'))
                 
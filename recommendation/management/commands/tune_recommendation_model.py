@@ -0,0 +1,143 @@
+import logging
+from django.core.management.base import BaseCommand
+from recommendation.services import RecommendationService
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Search recommendation model hyperparameters in parallel and activate the best model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model-types',
+            type=str,
+            nargs='+',
+            default=['svd'],
+            choices=['svd', 'knn'],
+            help='Types of recommendation model to include in the search'
+        )
+        parser.add_argument(
+            '--n-factors',
+            type=int,
+            nargs='+',
+            default=[50, 100, 200],
+            help='Candidate numbers of factors for SVD models'
+        )
+        parser.add_argument(
+            '--n-epochs',
+            type=int,
+            nargs='+',
+            default=[20, 40],
+            help='Candidate numbers of SGD epochs for SVD models'
+        )
+        parser.add_argument(
+            '--reg',
+            type=float,
+            nargs='+',
+            default=[0.02, 0.05, 0.1],
+            help='Candidate regularization terms for SVD models'
+        )
+        parser.add_argument(
+            '--lr',
+            type=float,
+            nargs='+',
+            default=[0.005],
+            help='Candidate learning rates for SVD models'
+        )
+        parser.add_argument(
+            '--knn-k',
+            type=int,
+            nargs='+',
+            default=[20, 40, 80],
+            help='Candidate numbers of neighbors for KNN models'
+        )
+        parser.add_argument(
+            '--min-ratings',
+            type=int,
+            default=5,
+            help='Minimum number of ratings a user must have to be included'
+        )
+        parser.add_argument(
+            '--search',
+            type=str,
+            default='grid',
+            choices=['grid', 'random'],
+            help='Evaluate every combination (grid) or a random sample of them (random)'
+        )
+        parser.add_argument(
+            '--n-iter',
+            type=int,
+            default=10,
+            help='Number of candidates sampled by random search'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            help='Number of worker processes (defaults to all cores)'
+        )
+        parser.add_argument(
+            '--metric',
+            type=str,
+            default='rmse',
+            choices=['rmse', 'mae', 'precision_at_10', 'recall_at_10'],
+            help='Metric used to select the best candidate'
+        )
+        parser.add_argument(
+            '--no-activate',
+            action='store_true',
+            help='Store the candidates without activating the best one'
+        )
+
+    def handle(self, *args, **options):
+        param_grid = {
+            'model_type': options['model_types'],
+            'svd_n_factors': options['n_factors'],
+            'svd_n_epochs': options['n_epochs'],
+            'svd_reg_all': options['reg'],
+            'svd_lr_all': options['lr'],
+            'knn_k': options['knn_k'],
+        }
+        metric = options['metric']
+
+        self.stdout.write(self.style.SUCCESS(f'Starting {options["search"]} search selecting on {metric}...'))
+
+        try:
+            model_records, best_record = RecommendationService.tune_recommendation_model(
+                param_grid,
+                search=options['search'],
+                n_iter=options['n_iter'],
+                n_jobs=options['jobs'],
+                metric=metric,
+                min_ratings_per_user=options['min_ratings'],
+                activate=not options['no_activate']
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error tuning model: {str(e)}'))
+            return
+
+        if not best_record:
+            self.stdout.write(self.style.ERROR('Hyperparameter search failed. Check logs for details.'))
+            return
+
+        for model_record in model_records:
+            params = {
+                name: value for name, value in model_record.hyperparameters.items()
+                if name not in ('model_type', 'min_ratings_per_user', 'random_state')
+            }
+            metrics = ', '.join(f'{name}={value:.4f}' for name, value in model_record.metrics.items())
+            self.stdout.write(f'Model {model_record.id} {model_record.model_type.upper()} {params}: {metrics}')
+
+        summary = (
+            f'best model {best_record.id} with {metric}={best_record.metrics[metric]:.4f} '
+            f'out of {len(model_records)} candidates'
+        )
+        best_record.refresh_from_db(fields=['is_active'])
+        if best_record.is_active:
+            self.stdout.write(self.style.SUCCESS(f'Activated {summary}'))
+        elif options['no_activate']:
+            self.stdout.write(self.style.SUCCESS(f'Stored {summary}'))
+        else:
+            failures = RecommendationService.check_activation_thresholds(best_record)
+            self.stdout.write(self.style.WARNING(
+                f'Stored {summary}, but did not activate it: {"; ".join(failures)}'
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationmodel',
+            name='artifact_path',
+            field=models.CharField(blank=True, default='', help_text='Serving artifact directory relative to MEDIA_ROOT', max_length=255),
+        ),
+    ]
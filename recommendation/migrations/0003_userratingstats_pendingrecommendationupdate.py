@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-18 18:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_user_rating_stats(apps, schema_editor):
+    BookRating = apps.get_model('books', 'BookRating')
+    UserRatingStats = apps.get_model('recommendation', 'UserRatingStats')
+    
+    counts = BookRating.objects.values('user_id').annotate(
+        rating_count=models.Count('rate_id'),
+        last_rated_at=models.Max('created_at'),
+    ).order_by()
+    UserRatingStats.objects.bulk_create(
+        (UserRatingStats(user_id=row['user_id'], rating_count=row['rating_count'],
+                         last_rated_at=row['last_rated_at'])
+         for row in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_alter_bookauthor_options_and_more'),
+        ('recommendation', '0002_recommendationmodel_artifact_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRatingStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('last_rated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PendingRecommendationUpdate',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_recommendation_update', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the first event since the last refresh')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the latest event, used for debouncing')),
+            ],
+            options={
+                'ordering': ['requested_at'],
+                'indexes': [models.Index(fields=['updated_at'], name='recommendat_updated_e17be7_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_user_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0003_userratingstats_pendingrecommendationupdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationmodel',
+            name='hyperparameters',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='recommendationmodel',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
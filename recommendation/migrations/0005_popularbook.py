@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 19:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_alter_bookauthor_options_and_more'),
+        ('recommendation', '0004_recommendationmodel_hyperparameters_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularBook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('overall', 'Overall'), ('genre', 'Genre'), ('interest', 'Profile interest')], max_length=10)),
+                ('key', models.CharField(blank=True, default='', max_length=255)),
+                ('rank', models.IntegerField()),
+                ('score', models.FloatField(help_text='Bayesian average rating')),
+                ('rating_count', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity_ranks', to='books.book')),
+            ],
+            options={
+                'ordering': ['scope', 'key', 'rank'],
+                'indexes': [models.Index(fields=['scope', 'key', 'rank'], name='recommendat_scope_b3f61b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0005_popularbook'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recommendationmodel',
+            name='model_type',
+            field=models.CharField(choices=[('svd', 'Singular Value Decomposition'), ('knn', 'K-Nearest Neighbors'), ('als', 'Implicit Alternating Least Squares')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='recommendationmodel',
+            name='n_factors',
+            field=models.IntegerField(default=100, help_text='Number of factors for SVD and ALS models'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0006_alter_recommendationmodel_model_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rate_id', models.IntegerField()),
+                ('change_type', models.CharField(choices=[('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
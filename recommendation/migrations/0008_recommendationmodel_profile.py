@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0007_ratingchangelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationmodel',
+            name='profile',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
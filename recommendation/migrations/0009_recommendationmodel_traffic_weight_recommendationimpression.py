@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-18 21:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_alter_bookauthor_options_and_more'),
+        ('recommendation', '0008_recommendationmodel_profile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationmodel',
+            name='traffic_weight',
+            field=models.FloatField(default=0.0, help_text='Share of users served by this model in an A/B test'),
+        ),
+        migrations.CreateModel(
+            name='RecommendationImpression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(help_text='Position of the book on the feed page')),
+                ('shown_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='books.book')),
+                ('model', models.ForeignKey(help_text='Model that produced the recommendation; empty for popularity rankings', null=True, on_delete=django.db.models.deletion.SET_NULL, to='recommendation.recommendationmodel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_impressions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'shown_at'], name='recommendat_model_i_051775_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendation', '0009_recommendationmodel_traffic_weight_recommendationimpression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingrecommendationupdate',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='Time a worker claimed the entry, null while waiting', null=True),
+        ),
+    ]
@@ -0,0 +1,144 @@
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+from .serving import ARTIFACT_META_FILE, ServingModel
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Process-level cache of loaded recommendation engines and serving models.
+
+    Entries are keyed by RecommendationModel id and model file mtime, so a model file
+    that is rewritten on disk is reloaded on the next access. At most max_models
+    engines are kept; the least recently used one is evicted first. Pinned models (the
+    variants currently served, see recommendation.ab_testing) are never evicted and do not
+    count towards max_models.
+
+    Model files are read outside the registry lock, so a slow load does not hold up cache
+    hits of other models; concurrent misses for the same model share one load.
+    """
+
+    def __init__(self, max_models=None):
+        self._max_models = max_models
+        self._models = OrderedDict()
+        self._pinned = set()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_models(self):
+        if self._max_models is not None:
+            return self._max_models
+        return getattr(settings, 'RECOMMENDATION_MODEL_CACHE_SIZE', 2)
+
+    @staticmethod
+    def get_model_path(model_record):
+        if model_record.artifact_path:
+            return os.path.join(settings.MEDIA_ROOT, model_record.artifact_path)
+        return os.path.join(settings.MEDIA_ROOT, model_record.model_file.name)
+
+    def get(self, model_record):
+        """
+        Return the engine for model_record, loading it from disk on first access
+        Serving artifacts are memory-mapped; pickled engines are loaded whole
+        """
+        model_path = self.get_model_path(model_record)
+        if model_record.artifact_path:
+            mtime = os.path.getmtime(os.path.join(model_path, ARTIFACT_META_FILE))
+        else:
+            mtime = os.path.getmtime(model_path)
+        key = (model_record.id, mtime)
+
+        with self._lock:
+            engine = self._lookup(key)
+            if engine is not None:
+                return engine
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another thread may have loaded the model while this one waited
+            with self._lock:
+                engine = self._lookup(key)
+            if engine is not None:
+                return engine
+
+            try:
+                logger.info(f"Loading recommendation model {model_record.id} from {model_path}")
+                if model_record.artifact_path:
+                    engine = ServingModel.load(model_path, mmap_mode='r')
+                else:
+                    with open(model_path, 'rb') as f:
+                        engine = pickle.load(f)
+
+                with self._lock:
+                    # Drop stale versions of the same model before inserting the new one
+                    for cached_key in [k for k in self._models if k[0] == model_record.id]:
+                        del self._models[cached_key]
+                    self._models[key] = engine
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            return engine
+
+    def _lookup(self, key):
+        """
+        Cached engine of key marked as most recently used, or None; the lock must be held
+        """
+        engine = self._models.get(key)
+        if engine is not None:
+            self._models.move_to_end(key)
+        return engine
+
+    def _evict(self):
+        """
+        Evict least recently used unpinned engines beyond max_models; the lock must be held
+        """
+        unpinned = [key for key in self._models if key[0] not in self._pinned]
+        for evicted_key in unpinned[:max(len(unpinned) - max(self.max_models, 1), 0)]:
+            del self._models[evicted_key]
+            logger.info(f"Evicted recommendation model {evicted_key[0]} from the model cache")
+
+    def pin(self, model_records):
+        """
+        Keep exactly the given models loaded: load them now if needed and exempt them
+        from eviction; previously pinned models become evictable again
+        While the models load, both the old and the new ones are pinned, so neither loads
+        nor concurrent requests can evict a variant; the final set is swapped in at the end
+        Models whose files cannot be read are logged and left unpinned
+        """
+        with self._lock:
+            self._pinned = self._pinned | {model_record.id for model_record in model_records}
+        pinned = set()
+        for model_record in model_records:
+            try:
+                self.get(model_record)
+                pinned.add(model_record.id)
+            except OSError as e:
+                logger.error(f"Could not load recommendation model {model_record.id}: {str(e)}")
+        with self._lock:
+            self._pinned = pinned
+            self._evict()
+
+    def invalidate(self, model_id=None):
+        """
+        Drop the cached engine of model_id, or every cached engine if model_id is None
+        """
+        with self._lock:
+            if model_id is None:
+                self._models.clear()
+                return
+            for cached_key in [k for k in self._models if k[0] == model_id]:
+                del self._models[cached_key]
+
+    def __len__(self):
+        return len(self._models)
+
+
+model_registry = ModelRegistry()
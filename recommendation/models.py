@@ -9,24 +9,35 @@ class RecommendationModel(models.Model):
     MODEL_TYPES = (
         ('svd', 'Singular Value Decomposition'),
         ('knn', 'K-Nearest Neighbors'),
+        ('als', 'Implicit Alternating Least Squares'),
     )
     
     model_type = models.CharField(max_length=10, choices=MODEL_TYPES)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=False)
+    # Share of users served by this model alongside the active one (see recommendation.ab_testing)
+    traffic_weight = models.FloatField(default=0.0, help_text="Share of users served by this model in an A/B test")
     
     # Model parameters
     min_ratings_per_user = models.IntegerField(default=5)
-    n_factors = models.IntegerField(default=100, help_text="Number of factors for SVD model")
+    n_factors = models.IntegerField(default=100, help_text="Number of factors for SVD and ALS models")
     knn_k = models.IntegerField(default=40, help_text="Number of neighbors for KNN model")
     
     # Model performance metrics
     rmse = models.FloatField(null=True, blank=True)
     mae = models.FloatField(null=True, blank=True)
+    # Full hyperparameters and evaluation metrics (e.g. ranking metrics) of the model
+    hyperparameters = models.JSONField(default=dict, blank=True)
+    metrics = models.JSONField(default=dict, blank=True)
+    # Per-stage wall time, memory and throughput of the training and inference runs
+    profile = models.JSONField(default=dict, blank=True)
     
     # Serialized model data will be stored in a file referenced by this field
     model_file = models.FileField(upload_to='recommendation_models/', null=True, blank=True)
+    # Directory (relative to MEDIA_ROOT) of the compact memory-mappable serving artifact
+    artifact_path = models.CharField(max_length=255, blank=True, default='',
+                                     help_text="Serving artifact directory relative to MEDIA_ROOT")
     
     class Meta:
         ordering = ['-created_at']
@@ -50,4 +61,104 @@ class UserRecommendation(models.Model):
         unique_together = ['user', 'book']
     
     def __str__(self):
-        return f"Recommendation for {self.user} - {self.book} (Score: {self.score:.2f})"
\ No newline at end of file
+        return f"Recommendation for {self.user} - {self.book} (Score: {self.score:.2f})"
+
+class UserRatingStats(models.Model):
+    """
+    Per-user rating counter maintained from BookRating signals so the rating
+    request path never has to COUNT a user's ratings
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                primary_key=True, related_name='rating_stats')
+    rating_count = models.IntegerField(default=0)
+    last_rated_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.user} has {self.rating_count} ratings"
+
+
+class PendingRecommendationUpdate(models.Model):
+    """
+    Durable queue of users whose recommendations need to be refreshed
+    One row per user, so bursts of rating events are coalesced
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                primary_key=True, related_name='pending_recommendation_update')
+    requested_at = models.DateTimeField(default=timezone.now, help_text="Time of the first event since the last refresh")
+    updated_at = models.DateTimeField(default=timezone.now, help_text="Time of the latest event, used for debouncing")
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="Time a worker claimed the entry, null while waiting")
+    
+    class Meta:
+        ordering = ['requested_at']
+        indexes = [models.Index(fields=['updated_at'])]
+    
+    def __str__(self):
+        return f"Pending recommendation update for {self.user}"
+
+
+class PopularBook(models.Model):
+    """
+    Precomputed Bayesian-averaged popularity ranking used for cold-start recommendations
+    Holds the top books overall, per book genre and per profile interest
+    """
+    SCOPES = (
+        ('overall', 'Overall'),
+        ('genre', 'Genre'),
+        ('interest', 'Profile interest'),
+    )
+    
+    scope = models.CharField(max_length=10, choices=SCOPES)
+    # Genre or lowercased interest the ranking is for; empty for the overall ranking
+    key = models.CharField(max_length=255, blank=True, default='')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='popularity_ranks')
+    rank = models.IntegerField()
+    score = models.FloatField(help_text="Bayesian average rating")
+    rating_count = models.IntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['scope', 'key', 'rank']
+        indexes = [models.Index(fields=['scope', 'key', 'rank'])]
+    
+    def __str__(self):
+        return f"#{self.rank} {self.scope} {self.key}: {self.book} (Score: {self.score:.2f})"
+
+
+class RatingChangeLog(models.Model):
+    """
+    Tombstone log of updated and deleted ratings, filled from BookRating signals
+    The ratings snapshot (see recommendation.snapshot) replays it to drop or re-read
+    changed rows; new ratings are found by their rate_id instead
+    """
+    CHANGE_TYPES = (
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    )
+    
+    # Plain integer rather than a foreign key, since deleted ratings must stay logged
+    rate_id = models.IntegerField()
+    change_type = models.CharField(max_length=10, choices=CHANGE_TYPES)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"Rating {self.rate_id} {self.change_type} at {self.created_at}"
+
+
+class RecommendationImpression(models.Model):
+    """
+    A recommended book shown to a user, written in batches by the impression buffer
+    (see recommendation.impressions) to compare the models of an A/B test
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                             related_name='recommendation_impressions')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    model = models.ForeignKey(RecommendationModel, on_delete=models.SET_NULL, null=True,
+                              help_text="Model that produced the recommendation; empty for popularity rankings")
+    position = models.PositiveSmallIntegerField(help_text="Position of the book on the feed page")
+    shown_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [models.Index(fields=['model', 'shown_at'])]
+    
+    def __str__(self):
+        return f"{self.book} shown to {self.user} at {self.shown_at}"
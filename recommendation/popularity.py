@@ -0,0 +1,200 @@
+import logging
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, FloatField, Q, Sum
+from django.db.models.functions import Cast, Lower, Trim
+from django.utils import timezone
+
+from .models import PopularBook
+
+logger = logging.getLogger(__name__)
+
+
+def get_top_n():
+    return getattr(settings, 'RECOMMENDATION_POPULARITY_TOP_N', 200)
+
+
+def bayesian_average(rating_sums, rating_counts, prior_mean, prior_weight):
+    """
+    Shrink each book's mean rating towards prior_mean as if it had prior_weight extra
+    ratings of prior_mean, so a book with a few 5-star ratings does not outrank a book
+    with hundreds of 4.5-star ones
+    """
+    return (prior_weight * prior_mean + rating_sums) / (prior_weight + rating_counts)
+
+
+def refresh_popular_books(top_n=None, prior_weight=None):
+    """
+    Recompute the popularity rankings (overall, per genre and per profile interest) and
+    replace the PopularBook table in one transaction
+    Interests are matched case-insensitively against the genres that contain them
+    prior_weight defaults to RECOMMENDATION_POPULARITY_PRIOR_WEIGHT, or to the mean number
+    of ratings per rated book if that is not set
+    Returns the number of rows written
+    """
+    from books.models import BookGenre, BookRating  # Import here to avoid circular imports
+    from users.models.profile import ProfileInterest
+
+    top_n = top_n or get_top_n()
+    if prior_weight is None:
+        prior_weight = getattr(settings, 'RECOMMENDATION_POPULARITY_PRIOR_WEIGHT', None)
+
+    books = pd.DataFrame(
+        list(
+            BookRating.objects.order_by().values('book_id').annotate(
+                rating_count=Count('rate_id'), rating_sum=Sum(Cast('rate', FloatField()))
+            ).values_list('book_id', 'rating_count', 'rating_sum')
+        ),
+        columns=['book_id', 'rating_count', 'rating_sum'],
+    )
+
+    rankings = []
+    if not books.empty:
+        prior_mean = books['rating_sum'].sum() / books['rating_count'].sum()
+        if prior_weight is None:
+            prior_weight = float(books['rating_count'].mean())
+        books['score'] = bayesian_average(
+            books['rating_sum'], books['rating_count'], prior_mean, prior_weight
+        )
+        books = books.sort_values(
+            ['score', 'rating_count', 'book_id'], ascending=[False, False, True]
+        )
+        rankings.append(('overall', '', books.head(top_n)))
+
+        # Inner merge keeps the score order of books and drops unrated books
+        genres = books.merge(
+            pd.DataFrame(
+                list(BookGenre.objects.values_list('book_id', 'genre')),
+                columns=['book_id', 'genre'],
+            ),
+            on='book_id',
+        )
+        for genre, ranked in genres.groupby('genre', sort=False):
+            rankings.append(('genre', genre, ranked.head(top_n)))
+
+        lower_genres = genres['genre'].str.lower()
+        interests = set(
+            ProfileInterest.objects.annotate(key=Lower(Trim('interest')))
+            .values_list('key', flat=True).distinct()
+        )
+        for interest in interests:
+            if not interest:
+                continue
+            ranked = genres[lower_genres.str.contains(interest, regex=False)]
+            ranked = ranked.drop_duplicates('book_id')
+            if not ranked.empty:
+                rankings.append(('interest', interest, ranked.head(top_n)))
+
+    refreshed_at = timezone.now()
+    rows = [
+        PopularBook(
+            scope=scope,
+            key=key[:255],
+            book_id=book_id,
+            rank=rank,
+            score=float(score),
+            rating_count=int(rating_count),
+            refreshed_at=refreshed_at,
+        )
+        for scope, key, ranked in rankings
+        for rank, (book_id, score, rating_count) in enumerate(
+            zip(ranked['book_id'], ranked['score'], ranked['rating_count']), start=1
+        )
+    ]
+
+    with transaction.atomic():
+        PopularBook.objects.all().delete()
+        PopularBook.objects.bulk_create(rows, batch_size=1000)
+
+    logger.info(f"Refreshed {len(rankings)} popularity rankings with {len(rows)} rows")
+    return len(rows)
+
+
+def _pick_popular(rows, rated_books, n_recommendations):
+    """
+    Merge ranking rows ((scope, book_id, score) tuples) into one list: interest matches
+    first, each group by score, skipping duplicates and rated books
+    """
+    rows = sorted(rows, key=lambda row: (row[0] != 'interest', -row[2]))
+
+    recommendations = []
+    seen = set(rated_books)
+    for _, book_id, score in rows:
+        if book_id in seen:
+            continue
+        seen.add(book_id)
+        recommendations.append((book_id, score))
+        if len(recommendations) >= n_recommendations:
+            break
+    return recommendations
+
+
+def popular_recommendations(user_id, n_recommendations=10):
+    """
+    Cold-start recommendations for users the model cannot score, read from the
+    precomputed PopularBook table in one query
+    Books ranked for the user's profile interests come first, then the overall ranking;
+    books the user has already rated are excluded
+    Returns a list of (isbn13, score) tuples
+    """
+    from books.models import BookRating  # Import here to avoid circular imports
+    from users.models.profile import ProfileInterest
+
+    interests = ProfileInterest.objects.filter(profile__user_id=user_id).annotate(
+        key=Lower(Trim('interest'))
+    ).values('key')
+    rated_books = BookRating.objects.filter(user_id=user_id).values('book_id')
+
+    rows = PopularBook.objects.filter(
+        Q(scope='overall') | Q(scope='interest', key__in=interests)
+    ).exclude(book_id__in=rated_books).values_list('scope', 'book_id', 'score')
+
+    return _pick_popular(rows, (), n_recommendations)
+
+
+def popular_recommendations_for_users(user_ids, n_recommendations=10, ratings_by_user=None):
+    """
+    popular_recommendations for a batch of users with a fixed number of queries: the
+    users' interests and the rankings they need are read once and each user's rated books
+    are filtered in memory
+    ratings_by_user maps user IDs to (isbn13, rate) pairs; read with one query if not given
+    Returns {user_id: [(isbn13, score), ...]} for the users with at least one recommendation
+    """
+    from books.models import BookRating  # Import here to avoid circular imports
+    from users.models.profile import ProfileInterest
+
+    if not user_ids:
+        return {}
+    if ratings_by_user is None:
+        ratings_by_user = {}
+        for user_id, book_id in BookRating.objects.filter(user_id__in=user_ids).values_list('user_id', 'book_id'):
+            ratings_by_user.setdefault(user_id, []).append((book_id, None))
+
+    interests_by_user = {}
+    for user_id, key in ProfileInterest.objects.filter(profile__user_id__in=user_ids).annotate(
+        key=Lower(Trim('interest'))
+    ).values_list('profile__user_id', 'key'):
+        interests_by_user.setdefault(user_id, set()).add(key)
+    all_interests = set().union(*interests_by_user.values())
+
+    overall = []
+    by_interest = {}
+    for scope, key, book_id, score in PopularBook.objects.filter(
+        Q(scope='overall') | Q(scope='interest', key__in=all_interests)
+    ).values_list('scope', 'key', 'book_id', 'score'):
+        if scope == 'overall':
+            overall.append((scope, book_id, score))
+        else:
+            by_interest.setdefault(key, []).append((scope, book_id, score))
+
+    recommendations_by_user = {}
+    for user_id in user_ids:
+        rows = overall + [
+            row for key in interests_by_user.get(user_id, ()) for row in by_interest.get(key, [])
+        ]
+        rated_books = [book_id for book_id, _ in ratings_by_user.get(user_id, [])]
+        recommendations = _pick_popular(rows, rated_books, n_recommendations)
+        if recommendations:
+            recommendations_by_user[user_id] = recommendations
+    return recommendations_by_user
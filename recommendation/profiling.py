@@ -0,0 +1,136 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far in MiB, or None if unknown
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """
+    Current resident set size of this process in MiB, or None if unknown
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _rounded(value, digits=4):
+    return round(value, digits) if value is not None else None
+
+
+class StageProfiler:
+    """
+    Per-stage timing and memory instrumentation of one training or inference run
+    Each stage records its wall time, the peak and current RSS of the process when it
+    ended, the rows it processed and the resulting rows per second; a stage entered
+    several times (e.g. once per chunk) accumulates its time and rows
+    finish() emits one JSON log record per stage plus one for the run and returns the
+    summary that is stored on the RecommendationModel; with cprofile set the whole run
+    is also recorded with cProfile and can be dumped to a .prof file
+    Use it as a context manager, so cProfile is disabled even when the run raises
+    """
+
+    def __init__(self, run, cprofile=False):
+        self.run = run
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile() if cprofile else None
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """
+        Disable cProfile if it is still recording; finish() calls this too
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time a stage; the yielded dict's 'rows' can be set once the row count is known
+        """
+        record = {'rows': rows}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            wall_time = time.perf_counter() - start
+            stage = self.stages.setdefault(
+                name, {'stage': name, 'calls': 0, 'wall_time_s': 0.0, 'rows': None}
+            )
+            stage['calls'] += 1
+            stage['wall_time_s'] += wall_time
+            if record.get('rows') is not None:
+                stage['rows'] = (stage['rows'] or 0) + int(record['rows'])
+            stage['peak_rss_mb'] = peak_rss_mb()
+            stage['rss_mb'] = current_rss_mb()
+
+    def finish(self, cprofile_path=None):
+        """
+        Stop the run, log it as JSON records and return its summary
+        If cprofile_path is given and cProfile was enabled, the profile is dumped there
+        """
+        self.close()
+        if self.profiler is not None:
+            if cprofile_path:
+                os.makedirs(os.path.dirname(cprofile_path), exist_ok=True)
+                self.profiler.dump_stats(cprofile_path)
+
+        stages = []
+        for stage in self.stages.values():
+            wall_time = stage['wall_time_s']
+            stages.append({
+                **stage,
+                'wall_time_s': _rounded(wall_time),
+                'peak_rss_mb': _rounded(stage['peak_rss_mb'], 1),
+                'rss_mb': _rounded(stage['rss_mb'], 1),
+                'items_per_s': _rounded(stage['rows'] / wall_time, 1)
+                if stage['rows'] and wall_time > 0 else None,
+            })
+            logger.info(json.dumps({'event': 'recommendation_stage', 'run': self.run, **stages[-1]}))
+
+        summary = {
+            'run': self.run,
+            'total_wall_time_s': _rounded(time.perf_counter() - self.started),
+            'peak_rss_mb': _rounded(peak_rss_mb(), 1),
+        }
+        logger.info(json.dumps({'event': 'recommendation_run', **summary}))
+        return {**summary, 'stages': stages}
+
+
+def stage(profiler, name, rows=None):
+    """
+    Time a stage on profiler, or do nothing if profiler is None
+    """
+    return profiler.stage(name, rows) if profiler is not None else nullcontext({'rows': rows})
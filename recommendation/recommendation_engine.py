@@ -1,9 +1,17 @@
+import numpy as np
 import pandas as pd
 import logging
+import scipy.sparse as sp
 from surprise import Dataset, Reader, SVD, KNNWithMeans, AlgoBase
 from surprise.model_selection import train_test_split
 from surprise import accuracy
 
+from .evaluation import evaluate_recommendations
+from .implicit_als import ImplicitALS
+from .knn import SparseUserKNN
+from .profiling import stage
+from .serving import ServingModel
+
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -25,21 +33,45 @@ class RecommendationEngine:
         user_id_col: str = "user_id",
         rating_col: str = "rate",
         svd_n_factors: int = 100,
+        svd_n_epochs: int = 20,
+        svd_reg_all: float = 0.02,
+        svd_lr_all: float = 0.005,
         knn_k: int = 40,
+        knn_backend: str = "surprise",
+        knn_n_jobs: int | None = None,
+        als_n_factors: int = 64,
+        als_regularization: float = 0.1,
+        als_alpha: float = 40.0,
+        als_n_iterations: int = 15,
+        als_cg_steps: int = 3,
         random_state: int = 42,
     ):
         """
         Initializes the RecommendationEngine.
 
         Args:
-            model_type (str): Type of model to use ('svd' or 'knn').
+            model_type (str): Type of model to use ('svd', 'knn' or 'als').
+                              'als' learns from implicit interaction weights in rating_col
+                              instead of explicit ratings.
             min_ratings_per_user (int): Minimum number of ratings a user must have to be included.
             rating_scale (tuple): The scale of ratings (min_rating, max_rating).
             item_id_col (str): Name of the column for item IDs in the input DataFrame.
             user_id_col (str): Name of the column for user IDs in the input DataFrame.
             rating_col (str): Name of the column for ratings in the input DataFrame.
             svd_n_factors (int): Number of factors for SVD.
+            svd_n_epochs (int): Number of SGD epochs for SVD.
+            svd_reg_all (float): Regularization term for all SVD parameters.
+            svd_lr_all (float): Learning rate for all SVD parameters.
             knn_k (int): Number of neighbors for KNN.
+            knn_backend (str): 'surprise' for KNNWithMeans with a dense user x user similarity
+                               matrix, or 'sparse' for SparseUserKNN, which keeps only the
+                               top knn_k neighbours per user and computes them across processes.
+            knn_n_jobs (int | None): Worker processes of the sparse KNN backend, all cores by default.
+            als_n_factors (int): Number of factors for ALS.
+            als_regularization (float): Regularization term for the ALS factors.
+            als_alpha (float): Scale from interaction weight to ALS confidence.
+            als_n_iterations (int): Number of alternating ALS iterations.
+            als_cg_steps (int): Conjugate gradient steps per ALS half-iteration.
             random_state (int): Random state for reproducibility.
         """
         self.model_type = model_type.lower()
@@ -49,29 +81,67 @@ class RecommendationEngine:
         self.user_id_col = user_id_col
         self.rating_col = rating_col
         self.svd_n_factors = svd_n_factors
+        self.svd_n_epochs = svd_n_epochs
+        self.svd_reg_all = svd_reg_all
+        self.svd_lr_all = svd_lr_all
         self.knn_k = knn_k
+        self.knn_backend = knn_backend
+        self.knn_n_jobs = knn_n_jobs
+        self.als_n_factors = als_n_factors
+        self.als_regularization = als_regularization
+        self.als_alpha = als_alpha
+        self.als_n_iterations = als_n_iterations
+        self.als_cg_steps = als_cg_steps
         self.random_state = random_state
 
-        self.model: AlgoBase | None = None
+        self.model: AlgoBase | ImplicitALS | None = None
         self.trainset = None  # Surprise trainset object
         self.full_ratings_df = None  # To store the original df for all items
+        self.als_serving_model = None  # ALS models are only kept in serving form
+
+        if self.knn_backend not in ("surprise", "sparse"):
+            raise ValueError(
+                f"Unsupported KNN backend: {knn_backend}. Choose 'surprise' or 'sparse'."
+            )
 
         if self.model_type == "svd":
             self.model = SVD(
-                n_factors=self.svd_n_factors, random_state=self.random_state
+                n_factors=self.svd_n_factors,
+                n_epochs=self.svd_n_epochs,
+                reg_all=self.svd_reg_all,
+                lr_all=self.svd_lr_all,
+                random_state=self.random_state,
             )
+        elif self.model_type == "knn" and self.knn_backend == "sparse":
+            self.model = SparseUserKNN(k=self.knn_k, n_jobs=self.knn_n_jobs)
         elif self.model_type == "knn":
             # Using pearson_baseline similarity as it often performs well
             sim_options = {"name": "pearson_baseline", "user_based": True}
             self.model = KNNWithMeans(k=self.knn_k, sim_options=sim_options)
+        elif self.model_type == "als":
+            self.model = ImplicitALS(
+                n_factors=self.als_n_factors,
+                regularization=self.als_regularization,
+                alpha=self.als_alpha,
+                n_iterations=self.als_n_iterations,
+                cg_steps=self.als_cg_steps,
+                random_state=self.random_state,
+            )
         else:
             raise ValueError(
-                f"Unsupported model type: {model_type}. Choose 'svd' or 'knn'."
+                f"Unsupported model type: {model_type}. Choose 'svd', 'knn' or 'als'."
             )
         logger.info(
             f"RecommendationEngine initialized with model type: {self.model_type.upper()}"
         )
 
+    def __getstate__(self):
+        # Derived caches are rebuilt on demand and must not bloat pickled models
+        state = self.__dict__.copy()
+        state.pop("_serving_model_cache", None)
+        state.pop("_raw_item_ids_cache", None)
+        return state
+
     def _filter_active_users(self, ratings_df: pd.DataFrame) -> pd.DataFrame:
         """
         Filters out users with less than a minimum number of ratings.
@@ -112,15 +182,94 @@ class RecommendationEngine:
             logger.error(f"Error creating Surprise dataset: {e}")
             return None
 
-    def _evaluate_model(self, testset: Dataset):
+    def get_params(self) -> dict:
+        """
+        Returns the hyperparameters of the engine's model type.
+
+        Returns:
+            dict: Hyperparameters that reproduce the model when passed to RecommendationEngine.
+        """
+        params = {
+            "model_type": self.model_type,
+            "min_ratings_per_user": self.min_ratings_per_user,
+            "random_state": self.random_state,
+        }
+        if self.model_type == "svd":
+            params.update(
+                svd_n_factors=self.svd_n_factors,
+                svd_n_epochs=self.svd_n_epochs,
+                svd_reg_all=self.svd_reg_all,
+                svd_lr_all=self.svd_lr_all,
+            )
+        elif self.model_type == "als":
+            params.update(
+                rating_col=self.rating_col,
+                als_n_factors=self.als_n_factors,
+                als_regularization=self.als_regularization,
+                als_alpha=self.als_alpha,
+                als_n_iterations=self.als_n_iterations,
+                als_cg_steps=self.als_cg_steps,
+            )
+        else:
+            params.update(knn_k=self.knn_k, knn_backend=self.knn_backend)
+        return params
+
+    def _evaluate_model(self, testset: Dataset, k: int = 10, relevance_threshold: float = 4.0):
         logger.info("Evaluating model on the test set...")
         predictions = self.model.test(testset)
         rmse = accuracy.rmse(predictions, verbose=False)
         mae = accuracy.mae(predictions, verbose=False)
-        logger.info(f"Evaluation - RMSE: {rmse:.4f}, MAE: {mae:.4f}")
-        return {"rmse": rmse, "mae": mae}
+        precision, recall = self._precision_recall_at_k(
+            predictions, k, relevance_threshold
+        )
+        logger.info(
+            f"Evaluation - RMSE: {rmse:.4f}, MAE: {mae:.4f}, "
+            f"Precision@{k}: {precision:.4f}, Recall@{k}: {recall:.4f}"
+        )
+        return {
+            "rmse": float(rmse),
+            "mae": float(mae),
+            f"precision_at_{k}": precision,
+            f"recall_at_{k}": recall,
+        }
+
+    @staticmethod
+    def _precision_recall_at_k(
+        predictions: list, k: int, relevance_threshold: float
+    ) -> tuple[float, float]:
+        """
+        Computes precision@k and recall@k over the test set predictions, averaged over users.
+        An item is relevant if its true rating is at least relevance_threshold and
+        recommended if it is among the user's k highest estimates.
+        Private helper method.
+        """
+        if not predictions:
+            return 0.0, 0.0
+        predictions_df = pd.DataFrame(
+            [(p.uid, p.est, p.r_ui) for p in predictions],
+            columns=["uid", "est", "r_ui"],
+        )
+        predictions_df["rank"] = predictions_df.groupby("uid")["est"].rank(
+            method="first", ascending=False
+        )
+        predictions_df["relevant"] = predictions_df["r_ui"] >= relevance_threshold
+        predictions_df["hit"] = predictions_df["relevant"] & (predictions_df["rank"] <= k)
+
+        per_user = predictions_df.groupby("uid").agg(
+            n_test=("rank", "size"), n_relevant=("relevant", "sum"), n_hits=("hit", "sum")
+        )
+        precision = (per_user["n_hits"] / np.minimum(per_user["n_test"], k)).mean()
+        with_relevant = per_user[per_user["n_relevant"] > 0]
+        recall = (
+            (with_relevant["n_hits"] / with_relevant["n_relevant"]).mean()
+            if len(with_relevant)
+            else 0.0
+        )
+        return float(precision), float(recall)
 
-    def train(self, ratings_df: pd.DataFrame, test_size: float = 0.2) -> dict | None:
+    def train(
+        self, ratings_df: pd.DataFrame, test_size: float = 0.2, profiler=None
+    ) -> dict | None:
         """
         Trains the recommendation model.
 
@@ -128,6 +277,7 @@ class RecommendationEngine:
             ratings_df (pd.DataFrame): DataFrame with user ratings.
                                       Must contain columns specified by user_id_col, item_id_col, and rating_col.
             test_size (float): Proportion of the dataset to include in the test split.
+            profiler (StageProfiler | None): Records the timing and memory of the training stages.
 
         Returns:
             dict: A dictionary containing RMSE and MAE if test_size > 0, else None.
@@ -151,7 +301,8 @@ class RecommendationEngine:
         )  # Store for generating recommendations later
 
         logger.info("Starting model training process...")
-        filtered_ratings = self._filter_active_users(self.full_ratings_df)
+        with stage(profiler, "filter_users", rows=len(ratings_df)):
+            filtered_ratings = self._filter_active_users(self.full_ratings_df)
 
         if filtered_ratings.empty:
             logger.error(
@@ -159,39 +310,165 @@ class RecommendationEngine:
             )
             return None
 
-        dataset = self._create_surprise_dataset(filtered_ratings)
-        if dataset is None:
-            logger.error("Failed to create Surprise dataset. Training aborted.")
-            return None
-
-        logger.info("Splitting data into training and testing sets.")
-        try:
-            self.trainset, testset = train_test_split(
-                dataset, test_size=test_size, random_state=self.random_state
-            )
-        except ValueError as e:  # Handles cases where dataset is too small for split
-            logger.warning(
-                f"Could not split dataset (test_size={test_size}): {e}. Using full dataset for training."
-            )
-            self.trainset = dataset.build_full_trainset()
-            testset = None
+        if self.model_type == "als":
+            return self._train_als(filtered_ratings, test_size, profiler=profiler)
+
+        with stage(profiler, "build_dataset", rows=len(filtered_ratings)):
+            dataset = self._create_surprise_dataset(filtered_ratings)
+            if dataset is None:
+                logger.error("Failed to create Surprise dataset. Training aborted.")
+                return None
+
+            if not test_size:
+                logger.info("No test split requested. Using full dataset for training.")
+                self.trainset = dataset.build_full_trainset()
+                testset = None
+            else:
+                logger.info("Splitting data into training and testing sets.")
+                try:
+                    self.trainset, testset = train_test_split(
+                        dataset, test_size=test_size, random_state=self.random_state
+                    )
+                except ValueError as e:  # Handles cases where dataset is too small for split
+                    logger.warning(
+                        f"Could not split dataset (test_size={test_size}): {e}. Using full dataset for training."
+                    )
+                    self.trainset = dataset.build_full_trainset()
+                    testset = None
 
         if self.model is None:  # Should have been initialized in __init__
             logger.error("Model is not initialized. Training aborted.")
             return None
 
         logger.info(f"Training {self.model_type.upper()} model...")
-        self.model.fit(self.trainset)
+        with stage(profiler, "fit", rows=self.trainset.n_ratings):
+            self.model.fit(self.trainset)
         logger.info("Model training complete.")
 
         # FIX: Return the evaluation metrics
         if testset:
-            metrics = self._evaluate_model(testset)
+            with stage(profiler, "evaluate", rows=len(testset)):
+                metrics = self._evaluate_model(testset)
             return metrics
         else:
             logger.warning("No test set available for evaluation.")
             return {"rmse": None, "mae": None}
 
+    def _train_als(
+        self, interactions_df: pd.DataFrame, test_size: float, k: int = 10, profiler=None
+    ) -> dict:
+        """
+        Trains the implicit ALS model on interaction weights and keeps it as a ServingModel.
+
+        With a test split, a random share of the interactions is held out and every held-out
+        interaction counts as relevant for the ranking metrics; rating errors (rmse, mae)
+        do not apply to implicit feedback and are returned as None.
+        Private helper method.
+        """
+        with stage(profiler, "build_matrix", rows=len(interactions_df)):
+            train_df, test_df = self._split_interactions(interactions_df, test_size)
+            user_codes, user_ids = pd.factorize(train_df[self.user_id_col], sort=True)
+            item_codes, item_ids = pd.factorize(train_df[self.item_id_col].astype(object))
+            interactions = sp.csr_matrix(
+                (
+                    train_df[self.rating_col].to_numpy(dtype=np.float32),
+                    (user_codes, item_codes),
+                ),
+                shape=(len(user_ids), len(item_ids)),
+            )
+
+        logger.info(
+            f"Training ALS model on {interactions.nnz} interactions of {len(user_ids)} users and {len(item_ids)} items..."
+        )
+        with stage(profiler, "fit", rows=interactions.nnz):
+            self.model.fit(interactions)
+        logger.info("Model training complete.")
+
+        item_ids = np.asarray(list(item_ids))
+        item_id_order = np.argsort(item_ids, kind="stable")
+        self.als_serving_model = ServingModel(
+            model_type=self.model_type,
+            user_ids=np.asarray(user_ids),
+            item_ids=item_ids,
+            sorted_item_ids=item_ids[item_id_order],
+            item_id_order=item_id_order,
+            user_factors=self.model.user_factors,
+            item_factors=self.model.item_factors,
+            user_bias=np.zeros(len(user_ids), dtype=np.float32),
+            item_bias=np.zeros(len(item_ids), dtype=np.float32),
+            seen_indptr=interactions.indptr.astype(np.int64),
+            seen_indices=interactions.indices.astype(np.int32),
+            rating_scale=None,
+            biased=False,
+            reg=self.als_regularization,
+        )
+
+        metrics = {"rmse": None, "mae": None}
+        if test_df is None:
+            logger.warning("No test set available for evaluation.")
+            return metrics
+
+        logger.info("Evaluating model on the held-out interactions...")
+        with stage(profiler, "evaluate", rows=len(test_df)):
+            recommendations = {
+                user_id: [item_id for item_id, _ in recs]
+                for user_id, recs in self.als_serving_model.recommend_for_users(
+                    np.unique(test_df[self.user_id_col].to_numpy()).tolist(),
+                    n_recommendations=k,
+                )
+            }
+            ranking_metrics = evaluate_recommendations(
+                recommendations,
+                train_df,
+                test_df,
+                k=k,
+                relevance_threshold=0.0,
+                item_id_col=self.item_id_col,
+                user_id_col=self.user_id_col,
+                rating_col=self.rating_col,
+            )
+        logger.info(f"Evaluation - {ranking_metrics}")
+        metrics.update(
+            {
+                name: value
+                for name, value in ranking_metrics.items()
+                if name in (f"precision_at_{k}", f"recall_at_{k}", f"ndcg_at_{k}")
+            }
+        )
+        return metrics
+
+    def _split_interactions(
+        self, interactions_df: pd.DataFrame, test_size: float
+    ) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+        """
+        Sums repeated (user, item) interactions and holds out a random share of them.
+        Held-out interactions of users or items missing from the training part are dropped.
+        Private helper method.
+        """
+        # Repeated interactions of a user with a book add up to one confidence weight
+        interactions_df = interactions_df.groupby(
+            [self.user_id_col, self.item_id_col], observed=True, as_index=False
+        )[self.rating_col].sum()
+
+        if not test_size:
+            logger.info("No test split requested. Using all interactions for training.")
+            return interactions_df, None
+
+        rng = np.random.default_rng(self.random_state)
+        is_test = rng.random(len(interactions_df)) < test_size
+        train_df = interactions_df[~is_test]
+        test_df = interactions_df[is_test]
+        test_df = test_df[
+            test_df[self.user_id_col].isin(train_df[self.user_id_col].unique())
+            & test_df[self.item_id_col].isin(train_df[self.item_id_col].unique())
+        ]
+        if train_df.empty or test_df.empty:
+            logger.warning(
+                f"Could not split interactions (test_size={test_size}). Using all interactions for training."
+            )
+            return interactions_df, None
+        return train_df, test_df
+
     def recommend_for_user(
         self, user_id: object, n_recommendations: int = 10
     ) -> list[tuple[object, float]]:
@@ -209,6 +486,14 @@ class RecommendationEngine:
                                        Returns an empty list if the model is not trained,
                                        user is not found, or no unrated items are found.
         """
+        if self.model_type == "als":
+            if self.als_serving_model is None:
+                logger.error(
+                    "Model has not been trained yet. Please call the 'train' method first."
+                )
+                return []
+            return self.als_serving_model.recommend_for_user(user_id, n_recommendations)
+
         if not self.model or not self.trainset:
             logger.error(
                 "Model has not been trained yet or trainset is missing. Please call the 'train' method first."
@@ -235,6 +520,184 @@ class RecommendationEngine:
             # For now, returning empty as per original notebook's behavior for unknown users in trainset.
             return []
 
+        if self.model_type == "svd":
+            top_n_recs = self.to_serving_model().recommend_for_user(
+                user_id, n_recommendations
+            )
+        else:
+            top_n_recs = self._recommend_by_prediction(
+                user_id, user_inner_id, n_recommendations
+            )
+
+        if not top_n_recs:
+            logger.info(
+                f"User '{user_id}' has rated all available items or no unrated items found."
+            )
+            return []
+
+        logger.info(
+            f"Successfully generated {len(top_n_recs)} recommendations for user '{user_id}'."
+        )
+        return top_n_recs
+
+    def recommend_for_users(
+        self,
+        user_ids: list,
+        n_recommendations: int = 10,
+        block_size: int = 1024,
+    ):
+        """
+        Generates top-N recommendations for many users at once.
+
+        For SVD and ALS models users are scored in blocks as a user-factor x item-factor
+        matrix product with a per-block top-N selection. Other model types fall
+        back to recommend_for_user for every user.
+
+        Args:
+            user_ids (list): Raw IDs of the users to generate recommendations for.
+            n_recommendations (int): The number of recommendations per user.
+            block_size (int): Number of users scored per matrix product.
+
+        Yields:
+            tuple[object, list[tuple[object, float]]]: (user_id, recommendations) for
+                every user found in the trainset that has at least one unrated item.
+        """
+        if self.model_type == "als":
+            if self.als_serving_model is None:
+                logger.error(
+                    "Model has not been trained yet. Please call the 'train' method first."
+                )
+                return
+            yield from self.als_serving_model.recommend_for_users(
+                user_ids, n_recommendations=n_recommendations, block_size=block_size
+            )
+            return
+
+        if not self.model or not self.trainset:
+            logger.error(
+                "Model has not been trained yet or trainset is missing. Please call the 'train' method first."
+            )
+            return
+
+        if self.model_type == "svd":
+            yield from self.to_serving_model().recommend_for_users(
+                user_ids, n_recommendations=n_recommendations, block_size=block_size
+            )
+            return
+
+        known_users = []
+        for user_id in user_ids:
+            try:
+                known_users.append((user_id, self.trainset.to_inner_uid(user_id)))
+            except ValueError:
+                continue
+        if len(known_users) < len(user_ids):
+            logger.warning(
+                f"{len(user_ids) - len(known_users)} of {len(user_ids)} users not found in the training set. Skipping them."
+            )
+
+        if isinstance(self.model, SparseUserKNN):
+            raw_item_ids = self._raw_item_ids()
+            for start in range(0, len(known_users), block_size):
+                block = known_users[start : start + block_size]
+                top_n = self.model.top_n(
+                    [user_inner_id for _, user_inner_id in block], n_recommendations
+                )
+                for (user_id, _), recs in zip(block, top_n):
+                    if recs:
+                        yield user_id, [(raw_item_ids[i], est) for i, est in recs]
+            return
+
+        for user_id, user_inner_id in known_users:
+            recs = self._recommend_by_prediction(
+                user_id, user_inner_id, n_recommendations
+            )
+            if recs:
+                yield user_id, recs
+
+    def recommend_from_ratings(
+        self, ratings: list[tuple[object, float]], n_recommendations: int = 10
+    ) -> list[tuple[object, float]]:
+        """
+        Generates top-N recommendations for a user who is not in the trainset by folding
+        their ratings into the trained SVD model. Only the user's factor vector and bias
+        are solved, against the frozen item factors, so no retraining is needed.
+
+        Args:
+            ratings (list[tuple[object, float]]): The user's (item_id, rating) pairs.
+            n_recommendations (int): The number of recommendations to return.
+
+        Returns:
+            list[tuple[object, float]]: A list of (item_id, estimated_rating) tuples,
+                                       sorted by estimated rating in descending order.
+        """
+        if not self.model or not self.trainset:
+            logger.error(
+                "Model has not been trained yet or trainset is missing. Please call the 'train' method first."
+            )
+            return []
+        if self.model_type != "svd":
+            logger.error(
+                f"Fold-in is only supported for SVD models, not {self.model_type.upper()}."
+            )
+            return []
+        return self.to_serving_model().recommend_from_ratings(
+            ratings, n_recommendations
+        )
+
+    def to_serving_model(self) -> ServingModel:
+        """
+        Returns the compact serving representation of a trained SVD or ALS model.
+        Built once per trained SVD model and cached on the engine; ALS models are
+        trained directly into one.
+
+        Returns:
+            ServingModel: float32 factors, biases, ID index arrays and seen-items CSR.
+        """
+        if self.model_type == "als":
+            if self.als_serving_model is None:
+                raise ValueError("Model has not been trained yet.")
+            return self.als_serving_model
+        if self.model_type != "svd":
+            raise ValueError(
+                f"Serving models are only available for SVD and ALS models, not {self.model_type.upper()}."
+            )
+        serving_model = getattr(self, "_serving_model_cache", None)
+        if serving_model is None or serving_model.n_users != self.trainset.n_users:
+            serving_model = ServingModel.from_engine(self)
+            self._serving_model_cache = serving_model
+        return serving_model
+
+    def _raw_item_ids(self) -> np.ndarray:
+        """
+        Returns the raw item IDs of the trainset indexed by Surprise inner item ID.
+        The array is built once per trained model and cached on the engine.
+        Private helper method.
+        """
+        raw_item_ids = getattr(self, "_raw_item_ids_cache", None)
+        if raw_item_ids is None or len(raw_item_ids) != self.trainset.n_items:
+            raw_item_ids = np.empty(self.trainset.n_items, dtype=object)
+            for raw_iid, inner_iid in self.trainset._raw2inner_id_items.items():
+                raw_item_ids[inner_iid] = raw_iid
+            self._raw_item_ids_cache = raw_item_ids
+        return raw_item_ids
+
+    def _recommend_by_prediction(
+        self, user_id: object, user_inner_id: int, n_recommendations: int
+    ) -> list[tuple[object, float]]:
+        """
+        Generates top-N recommendations by calling model.predict for every unrated item.
+        Used for models without a vectorized scoring path (e.g. Surprise KNN);
+        SparseUserKNN scores all items with one sparse product instead.
+        Private helper method.
+        """
+        if isinstance(self.model, SparseUserKNN):
+            raw_item_ids = self._raw_item_ids()
+            return [
+                (raw_item_ids[i], est)
+                for i, est in self.model.top_n([user_inner_id], n_recommendations)[0]
+            ]
+
         # Get all item inner IDs
         all_items_inner_ids = list(self.trainset.all_items())
 
@@ -252,12 +715,6 @@ class RecommendationEngine:
             if inner_iid not in rated_items_inner_ids
         ]
 
-        if not unrated_items_inner_ids:
-            logger.info(
-                f"User '{user_id}' has rated all available items or no unrated items found."
-            )
-            return []
-
         # Predict ratings for unrated items
         predictions_for_user = []
         for inner_item_id in unrated_items_inner_ids:
@@ -271,11 +728,7 @@ class RecommendationEngine:
         predictions_for_user.sort(key=lambda x: x[1], reverse=True)
 
         # Return the top N recommendations
-        top_n_recs = predictions_for_user[:n_recommendations]
-        logger.info(
-            f"Successfully generated {len(top_n_recs)} recommendations for user '{user_id}'."
-        )
-        return top_n_recs
+        return predictions_for_user[:n_recommendations]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_attributes = None
+_attributes_loaded_at = 0.0
+_attributes_lock = threading.Lock()
+
+
+def get_pool_size():
+    return getattr(settings, 'RECOMMENDATION_RERANK_POOL_SIZE', 200)
+
+
+def get_diversity():
+    return getattr(settings, 'RECOMMENDATION_RERANK_DIVERSITY', 0.3)
+
+
+def get_max_per_author():
+    return getattr(settings, 'RECOMMENDATION_RERANK_MAX_PER_AUTHOR', 2)
+
+
+def get_max_per_genre():
+    return getattr(settings, 'RECOMMENDATION_RERANK_MAX_PER_GENRE', None)
+
+
+def get_refresh_seconds():
+    return getattr(settings, 'RECOMMENDATION_RERANK_REFRESH_SECONDS', 60 * 60)
+
+
+def candidate_pool_size(n_recommendations):
+    """
+    Number of candidates to retrieve for a list of n_recommendations; n_recommendations
+    itself if re-ranking is disabled (RECOMMENDATION_RERANK_POOL_SIZE = 0)
+    """
+    return max(n_recommendations, get_pool_size())
+
+
+def _csr_from_pairs(rows, codes, n_rows):
+    """
+    CSR-style (indptr, indices) of integer codes per row from unsorted (row, code) pairs
+    """
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, codes[order].astype(np.int32)
+
+
+class BookAttributes:
+    """
+    In-memory author and genre lookups of every book as integer arrays
+    The author IDs and dictionary-encoded genres of the book in row r are
+    indices[indptr[r]:indptr[r + 1]]
+    """
+
+    def __init__(self, isbns, author_indptr, author_ids, genre_indptr, genre_codes):
+        self.isbns = isbns
+        self.row_index = {isbn: row for row, isbn in enumerate(isbns.tolist())}
+        self.author_indptr = author_indptr
+        self.author_ids = author_ids
+        self.genre_indptr = genre_indptr
+        self.genre_codes = genre_codes
+
+    @classmethod
+    def load(cls):
+        """
+        Read all BookAuthor and BookGenre rows with two queries
+        """
+        from books.models import BookAuthor, BookGenre  # Import here to avoid circular imports
+
+        author_pairs = list(BookAuthor.objects.order_by().values_list('book_id', 'author_id'))
+        genre_pairs = list(BookGenre.objects.order_by().values_list('book_id', 'genre'))
+
+        author_books = np.asarray([isbn for isbn, _ in author_pairs], dtype=str)
+        genre_books = np.asarray([isbn for isbn, _ in genre_pairs], dtype=str)
+        isbns = np.unique(np.concatenate([author_books, genre_books]))
+        _, genre_codes = np.unique(
+            np.asarray([genre.strip().lower() for _, genre in genre_pairs], dtype=str),
+            return_inverse=True
+        )
+
+        author_indptr, author_ids = _csr_from_pairs(
+            np.searchsorted(isbns, author_books),
+            np.fromiter((author_id for _, author_id in author_pairs), dtype=np.int64, count=len(author_pairs)),
+            len(isbns)
+        )
+        genre_indptr, genre_codes = _csr_from_pairs(
+            np.searchsorted(isbns, genre_books), genre_codes, len(isbns)
+        )
+        logger.info(
+            f"Loaded {len(author_pairs)} book authors and {len(genre_pairs)} book genres "
+            f"of {len(isbns)} books for re-ranking"
+        )
+        return cls(isbns, author_indptr, author_ids, genre_indptr, genre_codes)
+
+    def rows(self, isbns):
+        """
+        Rows of the given ISBNs, -1 for books without authors or genres
+        """
+        return np.fromiter(
+            (self.row_index.get(isbn, -1) for isbn in isbns), dtype=np.int64, count=len(isbns)
+        )
+
+    @staticmethod
+    def _indicator(rows, indptr, indices):
+        """
+        Dense 0/1 matrix of the codes of rows over the codes they use, shape (len(rows), n_codes)
+        """
+        valid = rows >= 0
+        starts = np.where(valid, indptr[np.maximum(rows, 0)], 0)
+        counts = np.where(valid, indptr[np.maximum(rows, 0) + 1] - starts, 0)
+        offsets = np.cumsum(counts) - counts
+        positions = np.arange(counts.sum()) - np.repeat(offsets, counts) + np.repeat(starts, counts)
+        codes, columns = np.unique(indices[positions], return_inverse=True)
+        matrix = np.zeros((len(rows), len(codes)), dtype=np.float32)
+        matrix[np.repeat(np.arange(len(rows)), counts), columns] = 1.0
+        return matrix
+
+    def author_matrix(self, rows):
+        return self._indicator(rows, self.author_indptr, self.author_ids)
+
+    def genre_matrix(self, rows):
+        return self._indicator(rows, self.genre_indptr, self.genre_codes)
+
+
+def get_book_attributes():
+    """
+    Return the process-level book attributes, reloaded every RECOMMENDATION_RERANK_REFRESH_SECONDS
+    """
+    global _attributes, _attributes_loaded_at
+
+    with _attributes_lock:
+        if _attributes is None or time.monotonic() - _attributes_loaded_at >= get_refresh_seconds():
+            _attributes = BookAttributes.load()
+            _attributes_loaded_at = time.monotonic()
+        return _attributes
+
+
+def rerank(recommendations, attributes, n_recommendations, diversity=0.3, max_per_author=None,
+           max_per_genre=None):
+    """
+    Pick n_recommendations of a candidate list by maximal marginal relevance
+    Each step takes the candidate maximising
+    (1 - diversity) * relevance - diversity * (highest similarity to a picked book),
+    where relevance is the score scaled to [0, 1] and two books are fully similar if they
+    share an author, otherwise as similar as the Jaccard index of their genres. Candidates
+    of an author (genre) already picked max_per_author (max_per_genre) times are skipped
+    while others remain
+    recommendations are (isbn13, score) pairs; the picked pairs are returned in pick order
+    """
+    if len(recommendations) <= 1 or n_recommendations <= 0:
+        return recommendations[:n_recommendations]
+
+    rows = attributes.rows([isbn for isbn, _ in recommendations])
+    authors = attributes.author_matrix(rows)
+    genres = attributes.genre_matrix(rows)
+
+    scores = np.fromiter((score for _, score in recommendations), dtype=np.float64, count=len(recommendations))
+    score_range = scores.max() - scores.min()
+    relevance = (scores - scores.min()) / score_range if score_range > 0 else np.ones_like(scores)
+
+    genre_counts = genres.sum(axis=1)
+
+    available = np.ones(len(recommendations), dtype=bool)
+    capped = np.zeros(len(recommendations), dtype=bool)
+    gains = (1 - diversity) * relevance
+    max_similarity = np.zeros(len(recommendations))
+    author_picks = np.zeros(authors.shape[1])
+    genre_picks = np.zeros(genres.shape[1])
+
+    picked = []
+    for _ in range(min(n_recommendations, len(recommendations))):
+        allowed = available & ~capped
+        if not allowed.any():
+            # The caps cannot be met; fill the list by relevance and diversity alone
+            allowed = available
+        best = int(np.argmax(np.where(allowed, gains - diversity * max_similarity, -np.inf)))
+        picked.append(best)
+        available[best] = False
+
+        best_authors = authors[best] > 0
+        if max_per_author:
+            author_picks += best_authors
+            full = best_authors & (author_picks >= max_per_author)
+            if full.any():
+                capped |= authors[:, full].any(axis=1)
+        if max_per_genre:
+            genre_picks += genres[best]
+            full = (genres[best] > 0) & (genre_picks >= max_per_genre)
+            if full.any():
+                capped |= genres[:, full].any(axis=1)
+
+        if diversity:
+            shared_genres = genres @ genres[best]
+            union = genre_counts + genre_counts[best] - shared_genres
+            similarity = np.divide(shared_genres, union, out=np.zeros_like(union), where=union > 0)
+            similarity[authors[:, best_authors].any(axis=1)] = 1.0
+            np.maximum(max_similarity, similarity, out=max_similarity)
+
+    return [recommendations[index] for index in picked]
+
+
+def diversify(recommendations, n_recommendations, attributes=None):
+    """
+    Re-rank a candidate list with the RECOMMENDATION_RERANK_* settings, or cut it to
+    n_recommendations if re-ranking is disabled
+    """
+    if not get_pool_size() or len(recommendations) <= 1:
+        return recommendations[:n_recommendations]
+    return rerank(
+        recommendations,
+        attributes or get_book_attributes(),
+        n_recommendations,
+        diversity=get_diversity(),
+        max_per_author=get_max_per_author(),
+        max_per_genre=get_max_per_genre(),
+    )
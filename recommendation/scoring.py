@@ -0,0 +1,232 @@
+import numpy as np
+
+
+def predict_scores(
+    user_factors: np.ndarray,
+    item_factors: np.ndarray,
+    user_bias: float = 0.0,
+    item_bias: np.ndarray | None = None,
+    global_mean: float = 0.0,
+    rating_scale: tuple | None = None,
+) -> np.ndarray:
+    """
+    Scores every item for a single user with one matrix-vector product.
+
+    Args:
+        user_factors (np.ndarray): Latent factor vector of the user, shape (n_factors,).
+        item_factors (np.ndarray): Item factor matrix, shape (n_items, n_factors).
+        user_bias (float): Bias term of the user.
+        item_bias (np.ndarray | None): Item bias vector, shape (n_items,).
+        global_mean (float): Global mean rating of the trainset.
+        rating_scale (tuple | None): (min_rating, max_rating) to clip the scores to.
+
+    Returns:
+        np.ndarray: Estimated score per item, shape (n_items,).
+    """
+    scores = item_factors @ user_factors
+    scores = scores.astype(np.float64, copy=False)
+    scores += global_mean + user_bias
+    if item_bias is not None:
+        scores += item_bias
+    if rating_scale is not None:
+        np.clip(scores, rating_scale[0], rating_scale[1], out=scores)
+    return scores
+
+
+def top_n_indices(
+    scores: np.ndarray, n: int, exclude: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Selects the indices of the N highest scores without sorting the whole array.
+
+    Args:
+        scores (np.ndarray): Score per item, shape (n_items,).
+        n (int): Number of indices to return.
+        exclude (np.ndarray | None): Item indices that must not be returned
+                                     (e.g. items the user already rated).
+
+    Returns:
+        np.ndarray: Item indices sorted by score in descending order. Ties are
+                    broken by the lower index first.
+    """
+    if exclude is not None and len(exclude):
+        scores = np.array(scores, dtype=np.float64)
+        scores[exclude] = -np.inf
+        n = min(n, int(np.isfinite(scores).sum()))
+    else:
+        n = min(n, scores.size)
+
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if n < scores.size:
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(scores.size)
+
+    # lexsort uses the last key as the primary one
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def predict_score_block(
+    user_factors: np.ndarray,
+    item_factors: np.ndarray,
+    user_bias: np.ndarray | None = None,
+    item_bias: np.ndarray | None = None,
+    global_mean: float = 0.0,
+    rating_scale: tuple | None = None,
+) -> np.ndarray:
+    """
+    Scores every item for a block of users with one matrix-matrix product.
+
+    Args:
+        user_factors (np.ndarray): User factor matrix, shape (n_users, n_factors).
+        item_factors (np.ndarray): Item factor matrix, shape (n_items, n_factors).
+        user_bias (np.ndarray | None): User bias vector, shape (n_users,).
+        item_bias (np.ndarray | None): Item bias vector, shape (n_items,).
+        global_mean (float): Global mean rating of the trainset.
+        rating_scale (tuple | None): (min_rating, max_rating) to clip the scores to.
+
+    Returns:
+        np.ndarray: Estimated scores, shape (n_users, n_items).
+    """
+    scores = user_factors @ item_factors.T
+    scores = scores.astype(np.float64, copy=False)
+    scores += global_mean
+    if user_bias is not None:
+        scores += user_bias[:, np.newaxis]
+    if item_bias is not None:
+        scores += item_bias[np.newaxis, :]
+    if rating_scale is not None:
+        np.clip(scores, rating_scale[0], rating_scale[1], out=scores)
+    return scores
+
+
+def top_n_indices_block(
+    scores: np.ndarray,
+    n: int,
+    exclude_rows: np.ndarray | None = None,
+    exclude_cols: np.ndarray | None = None,
+) -> list[np.ndarray]:
+    """
+    Selects the top-N item indices for every row of a score block.
+
+    Args:
+        scores (np.ndarray): Scores, shape (n_users, n_items). Modified in place
+                             when exclusions are given.
+        n (int): Number of indices to return per row.
+        exclude_rows (np.ndarray | None): Row index of every (row, item) pair to exclude.
+        exclude_cols (np.ndarray | None): Item index of every (row, item) pair to exclude.
+
+    Returns:
+        list[np.ndarray]: One array of item indices per row, sorted by score in
+                          descending order. Rows may hold fewer than N indices when
+                          not enough items remain after the exclusions.
+    """
+    n_rows, n_items = scores.shape
+    n = min(n, n_items)
+    if n <= 0 or n_rows == 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(n_rows)]
+
+    if exclude_rows is not None and len(exclude_rows):
+        scores[exclude_rows, exclude_cols] = -np.inf
+
+    if n < n_items:
+        candidates = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    else:
+        candidates = np.broadcast_to(np.arange(n_items), (n_rows, n_items))
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+    valid = np.isfinite(candidate_scores)
+    return [row[row_valid] for row, row_valid in zip(candidates, valid)]
+
+
+def fold_in_user(
+    item_factors: np.ndarray,
+    ratings: np.ndarray,
+    item_bias: np.ndarray | None = None,
+    global_mean: float = 0.0,
+    reg: float = 0.02,
+) -> tuple[np.ndarray, float]:
+    """
+    Solves the factor vector and bias of a user against frozen item factors.
+
+    Minimizes sum((r - global_mean - b_i - b_u - q_i . p_u)^2) + reg * n * (b_u^2 + |p_u|^2)
+    over the user's n ratings in closed form (ridge regression), which is the
+    objective SVD's SGD optimizes for a single user with the item side fixed.
+
+    Args:
+        item_factors (np.ndarray): Factors of the rated items, shape (n_ratings, n_factors).
+        ratings (np.ndarray): The user's ratings of those items, shape (n_ratings,).
+        item_bias (np.ndarray | None): Biases of the rated items, shape (n_ratings,).
+                                       None for unbiased models.
+        global_mean (float): Global mean rating of the trainset.
+        reg (float): Regularization term of the user factors and bias.
+
+    Returns:
+        tuple[np.ndarray, float]: (user_factors, user_bias).
+    """
+    n_ratings, n_factors = item_factors.shape
+    targets = np.asarray(ratings, dtype=np.float64) - global_mean
+    if item_bias is not None:
+        targets = targets - item_bias
+        # The leading column of ones learns the user bias
+        design = np.hstack([np.ones((n_ratings, 1)), item_factors.astype(np.float64)])
+    else:
+        design = item_factors.astype(np.float64)
+
+    gram = design.T @ design
+    gram[np.diag_indices_from(gram)] += reg * max(n_ratings, 1)
+    solution = np.linalg.solve(gram, design.T @ targets)
+
+    if item_bias is not None:
+        return solution[1:], float(solution[0])
+    return solution, 0.0
+
+
+def top_k_similar_items(
+    item_factors: np.ndarray, k: int, block_size: int = 2048
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the K most similar items of every item by cosine similarity of their factors.
+
+    Similarities are computed one block of items at a time, so memory stays at
+    block_size x n_items scores instead of the full n_items x n_items matrix.
+
+    Args:
+        item_factors (np.ndarray): Item factor matrix, shape (n_items, n_factors).
+        k (int): Number of neighbours per item. Capped at n_items - 1.
+        block_size (int): Number of items whose similarities are computed per matrix product.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (neighbours, similarities), both shape (n_items, k).
+                                       Neighbour indices are sorted by similarity in
+                                       descending order and never include the item itself.
+    """
+    n_items = item_factors.shape[0]
+    k = max(min(k, n_items - 1), 0)
+    neighbors = np.empty((n_items, k), dtype=np.int32)
+    similarities = np.empty((n_items, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, similarities
+
+    norms = np.linalg.norm(item_factors, axis=1)
+    normalized = (item_factors / np.where(norms > 0, norms, 1.0)[:, np.newaxis]).astype(
+        np.float32
+    )
+
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        block = normalized[start:stop] @ normalized.T
+        # An item is not its own neighbour
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        top = np.vstack(top_n_indices_block(block, k))
+        neighbors[start:stop] = top
+        similarities[start:stop] = np.take_along_axis(block, top, axis=1)
+
+    return neighbors, similarities
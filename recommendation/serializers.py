@@ -4,17 +4,29 @@ from .models import RecommendationModel, UserRecommendation
 class RecommendationModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecommendationModel
-        fields = ['id', 'model_type', 'created_at', 'is_active', 
-                 'min_ratings_per_user', 'n_factors', 'knn_k', 'rmse', 'mae']
-        read_only_fields = ['id', 'created_at', 'rmse', 'mae']
+        fields = ['id', 'model_type', 'created_at', 'is_active', 'traffic_weight',
+                 'min_ratings_per_user', 'n_factors', 'knn_k', 'rmse', 'mae',
+                 'hyperparameters', 'metrics', 'profile']
+        read_only_fields = ['id', 'created_at', 'traffic_weight', 'rmse', 'mae', 'hyperparameters', 'metrics',
+                            'profile']
 
 
 class UserRecommendationSerializer(serializers.ModelSerializer):
     book_title = serializers.CharField(source='book.title', read_only=True)
-    book_author = serializers.CharField(source='book.author', read_only=True)
-    book_cover = serializers.ImageField(source='book.cover', read_only=True)
+    # Comma-separated author names, kept for clients of the original field
+    book_author = serializers.SerializerMethodField()
+    book_authors = serializers.SerializerMethodField()
+    book_cover = serializers.URLField(source='book.cover_img', read_only=True)
     
     class Meta:
         model = UserRecommendation
-        fields = ['id', 'book', 'book_title', 'book_author', 'book_cover', 'score', 'recommended_at']
-        read_only_fields = ['id', 'score', 'recommended_at']
\ No newline at end of file
+        fields = ['id', 'book', 'book_title', 'book_author', 'book_authors', 'book_cover', 'score',
+                  'recommended_at', 'model']
+        read_only_fields = ['id', 'score', 'recommended_at', 'model']
+    
+    def get_book_author(self, obj):
+        return ', '.join(self.get_book_authors(obj))
+    
+    def get_book_authors(self, obj):
+        # Uses the authors prefetched by the feed query
+        return [author.name for author in obj.book.authors.all()]
\ No newline at end of file
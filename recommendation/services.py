@@ -1,116 +1,519 @@
 import logging
 import pickle
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from itertools import islice
 from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import transaction
-from django.db.models import Count
+from django.db import connections, transaction
+from django.db.models import Count, Exists, FloatField, OuterRef, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
 
-from .models import RecommendationModel, UserRecommendation
+from .models import RecommendationImpression, RecommendationModel, UserRatingStats, UserRecommendation
+from .ab_testing import group_users_by_model, assign_model_id, invalidate_traffic_split
+from .feed_cache import invalidate_feeds
+from .model_registry import model_registry
+from .popularity import popular_recommendations, popular_recommendations_for_users
+from .profiling import StageProfiler
 from .recommendation_engine import RecommendationEngine
+from .reranking import candidate_pool_size, diversify
+from .serving import ServingModel
+from .snapshot import read_ratings, refresh_ratings_snapshot
+from .evaluation import LOWER_IS_BETTER, evaluate_engine, time_based_split
+from .tuning import build_search_space, is_better, run_search
 
 logger = logging.getLogger(__name__)
 
+def exclude_rated(recommendations, ratings):
+    """
+    Drop the books in ratings ((isbn13, rate) pairs) from a list of (isbn13, score) pairs
+    Models only exclude the books rated when they were trained
+    """
+    if not ratings:
+        return recommendations
+    rated = {isbn for isbn, _ in ratings}
+    return [(isbn, score) for isbn, score in recommendations if isbn not in rated]
+
+
 class RecommendationService:
     """
     Service class for handling recommendation model training and generating recommendations
     """
     
     @staticmethod
-    def get_ratings_dataframe():
+    def get_ratings_dataframe(chunk_size=20000, include_timestamps=False, use_snapshot=None):
         """
-        Get ratings data from the database and convert to pandas DataFrame
-        Assumes the existence of a Rating model with user, book, and rating fields
+        Get ratings data and convert to pandas DataFrame
+        By default (RECOMMENDATION_USE_RATINGS_SNAPSHOT) the ratings come from the columnar
+        snapshot under MEDIA_ROOT, which is first brought up to date by reading only new and
+        changed ratings from the database (see recommendation.snapshot); otherwise the whole
+        table is streamed through a server-side cursor in chunks of chunk_size rows
+        The DataFrame is built with int32 user IDs, categorical ISBNs and float32 ratings,
+        plus a UTC created_at column if include_timestamps is set
         """
         from books.models import BookRating  # Import here to avoid circular imports
         
-        # Get all ratings
-        ratings = BookRating.objects.select_related('user', 'book').all()
+        if use_snapshot is None:
+            use_snapshot = getattr(settings, 'RECOMMENDATION_USE_RATINGS_SNAPSHOT', True)
         
-        # Convert to DataFrame format needed by RecommendationEngine
-        data = {
-            'user_id': [rating.user.id for rating in ratings],
-            'isbn13': [rating.book.isbn13 for rating in ratings],
-            'rate': [rating.rate for rating in ratings]
-        }
-        
-        return pd.DataFrame(data)
-    
+        if use_snapshot:
+            ratings = refresh_ratings_snapshot(chunk_size=chunk_size)
+        else:
+            ratings = read_ratings(BookRating.objects.all(), chunk_size=chunk_size)
+        return ratings.to_dataframe(include_timestamps=include_timestamps)
+
+    @staticmethod
+    def get_interactions_dataframe(weights=None, half_life_days=None):
+        """
+        Get implicit-feedback interactions for the ALS model as a pandas DataFrame
+        Ratings, reviews and reading-list entries each add a confidence weight from
+        RECOMMENDATION_IMPLICIT_WEIGHTS to their (user, book) pair; a rating counts
+        rate / 5 times the rating weight, so low ratings still count as weak interest
+        Reading-list entries are dated by their list's created_at
+        Every weight decays by half each RECOMMENDATION_IMPLICIT_HALF_LIFE_DAYS of age
+        Returns one row per (user_id, isbn13) with the summed weight and the time of the
+        latest interaction (created_at)
+        """
+        from books.models import BookReview, ReadingListBooks  # Import here to avoid circular imports
+
+        if weights is None:
+            weights = getattr(settings, 'RECOMMENDATION_IMPLICIT_WEIGHTS', {})
+        if half_life_days is None:
+            half_life_days = getattr(settings, 'RECOMMENDATION_IMPLICIT_HALF_LIFE_DAYS', None)
+
+        ratings_df = RecommendationService.get_ratings_dataframe(include_timestamps=True)
+        ratings_df['isbn13'] = ratings_df['isbn13'].astype(object)
+        ratings_df['weight'] = ratings_df.pop('rate') / 5.0 * weights.get('rating', 1.0)
+
+        reviews_df = pd.DataFrame(
+            list(BookReview.objects.order_by().values_list('user_id', 'book_id', 'created_at')),
+            columns=['user_id', 'isbn13', 'created_at'],
+        )
+        reviews_df['weight'] = weights.get('review', 1.0)
+
+        list_entries_df = pd.DataFrame(
+            list(ReadingListBooks.objects.order_by().values_list(
+                'readinglist__profile__user_id', 'book_id', 'readinglist__type', 'readinglist__created_at'
+            )),
+            columns=['user_id', 'isbn13', 'list_type', 'created_at'],
+        )
+        list_entries_df['weight'] = list_entries_df.pop('list_type').map(weights).fillna(1.0)
+
+        interactions_df = pd.concat(
+            [ratings_df, reviews_df, list_entries_df], ignore_index=True
+        ).dropna(subset=['user_id'])
+        if interactions_df.empty:
+            return interactions_df
+        interactions_df['created_at'] = pd.to_datetime(interactions_df['created_at'], utc=True)
+
+        if half_life_days:
+            age_days = (timezone.now() - interactions_df['created_at']).dt.total_seconds() / 86400
+            interactions_df['weight'] *= np.power(0.5, age_days.clip(lower=0) / half_life_days)
+
+        interactions_df = interactions_df.groupby(['user_id', 'isbn13'], as_index=False).agg(
+            weight=('weight', 'sum'), created_at=('created_at', 'max')
+        )
+        interactions_df['user_id'] = interactions_df['user_id'].astype(np.int32)
+        interactions_df['isbn13'] = interactions_df['isbn13'].astype('category')
+        interactions_df['weight'] = interactions_df['weight'].astype(np.float32)
+        return interactions_df
+
     @staticmethod
-    def train_recommendation_model(model_type='svd', min_ratings_per_user=5, n_factors=100, knn_k=40):
+    def train_recommendation_model(model_type='svd', min_ratings_per_user=5, n_factors=100, knn_k=40,
+                                   evaluate=False, profile=False):
         """
         Train a new recommendation model and save it to the database
+        With evaluate set, ranking metrics on a time-based holdout are computed before
+        activation, so RECOMMENDATION_ACTIVATION_THRESHOLDS on them can be met
+        ALS models are trained on implicit interactions (see get_interactions_dataframe)
+        instead of ratings; min_ratings_per_user then counts a user's interacted books
+        Per-stage timings and memory are stored in the model's profile; with profile set the
+        run is also recorded with cProfile (see get_cprofile_path)
         """
         logger.info(f"Starting training of {model_type} recommendation model")
+        with StageProfiler(f"train_{model_type}", cprofile=profile) as profiler:
+        
+            # Get ratings data
+            with profiler.stage('extract') as record:
+                if model_type == 'als':
+                    ratings_df = RecommendationService.get_interactions_dataframe()
+                else:
+                    ratings_df = RecommendationService.get_ratings_dataframe()
+                record['rows'] = len(ratings_df)
         
-        # Get ratings data
+            if ratings_df.empty:
+                logger.error("No ratings data available for training")
+                profiler.finish()
+                return None
+            
+            # Initialize recommendation engine with appropriate parameters
+            engine = RecommendationEngine(
+                model_type=model_type,
+                min_ratings_per_user=min_ratings_per_user,
+                rating_scale=(1, 5),  # Assuming 1-5 rating scale
+                rating_col='weight' if model_type == 'als' else 'rate',
+                svd_n_factors=n_factors,
+                als_n_factors=n_factors,
+                knn_k=knn_k,
+                knn_backend=getattr(settings, 'RECOMMENDATION_KNN_BACKEND', 'sparse')
+            )
+        
+            # Train the model
+            eval_metrics = engine.train(ratings_df, test_size=0.2, profiler=profiler)
+        
+            if not eval_metrics:
+                logger.error("Model training failed")
+                profiler.finish()
+                return None
+            
+            # Create model record
+            with profiler.stage('save_model'), transaction.atomic():
+                # Create new model record
+                model_record = RecommendationModel.objects.create(
+                    model_type=model_type,
+                    min_ratings_per_user=min_ratings_per_user,
+                    n_factors=n_factors,
+                    knn_k=knn_k,
+                    rmse=eval_metrics.get('rmse'),
+                    mae=eval_metrics.get('mae'),
+                    hyperparameters=engine.get_params(),
+                    metrics={name: value for name, value in eval_metrics.items() if value is not None},
+                    is_active=False
+                )
+            
+                # Serialize and save the model
+                RecommendationService.save_model_files(engine, model_record)
+        
+            if evaluate:
+                with profiler.stage('holdout_evaluation'):
+                    RecommendationService.evaluate_recommendation_model(model_record)
+        
+            RecommendationService.save_profile([model_record], 'training', profiler)
+        
+            # Deactivate all existing models of the same type and activate the new one
+            RecommendationService.activate_model(model_record)
+        
+            logger.info(f"Successfully trained and saved {model_type} model with id {model_record.id}")
+            return model_record
+    
+    @staticmethod
+    def tune_recommendation_model(param_grid, search='grid', n_iter=None, n_jobs=None,
+                                  metric='rmse', min_ratings_per_user=5, test_size=0.2, activate=True):
+        """
+        Train and evaluate a grid or random sample of hyperparameter candidates in a process pool
+        Every successful candidate is stored as an inactive RecommendationModel with its
+        hyperparameters and metrics; the best one by metric is activated
+        Returns (candidate model records, best model record)
+        """
+        logger.info(f"Starting hyperparameter search ({search}) selecting on {metric}")
+        
+        # Extract the ratings once; the workers share this DataFrame
         ratings_df = RecommendationService.get_ratings_dataframe()
         
         if ratings_df.empty:
-            logger.error("No ratings data available for training")
-            return None
-            
-        # Initialize recommendation engine with appropriate parameters
-        engine = RecommendationEngine(
-            model_type=model_type,
-            min_ratings_per_user=min_ratings_per_user,
-            rating_scale=(1, 5),  # Assuming 1-5 rating scale
-            svd_n_factors=n_factors,
-            knn_k=knn_k
+            logger.error("No ratings data available for tuning")
+            return [], None
+        
+        candidates = build_search_space(
+            param_grid,
+            search=search,
+            n_iter=n_iter,
+            base_params={
+                'min_ratings_per_user': min_ratings_per_user,
+                'knn_backend': getattr(settings, 'RECOMMENDATION_KNN_BACKEND', 'sparse'),
+            }
         )
         
-        # Train the model
-        eval_metrics = engine.train(ratings_df, test_size=0.2)
+        # Forked workers must not inherit open database connections
+        connections.close_all()
+        results = run_search(ratings_df, candidates, settings.MEDIA_ROOT, n_jobs=n_jobs, test_size=test_size)
         
-        if not eval_metrics:
-            logger.error("Model training failed")
-            return None
-            
-        # Create model record
-        with transaction.atomic():
-            # Deactivate all existing models of the same type
-            RecommendationModel.objects.filter(model_type=model_type, is_active=True).update(is_active=False)
+        model_records = []
+        best_record = None
+        for result in results:
+            eval_metrics = result['metrics']
+            if not eval_metrics:
+                continue
             
-            # Create new model record
-            model_record = RecommendationModel.objects.create(
-                model_type=model_type,
-                min_ratings_per_user=min_ratings_per_user,
-                n_factors=n_factors,
-                knn_k=knn_k,
+            params = result['params']
+            model_record = RecommendationModel(
+                model_type=params['model_type'],
+                min_ratings_per_user=params['min_ratings_per_user'],
+                n_factors=params.get('svd_n_factors', 100),
+                knn_k=params.get('knn_k', 40),
                 rmse=eval_metrics.get('rmse'),
                 mae=eval_metrics.get('mae'),
-                is_active=True
+                hyperparameters=params,
+                metrics={name: value for name, value in eval_metrics.items() if value is not None},
+                artifact_path=result.get('artifact_path', ''),
+                is_active=False
             )
+            if result.get('model_file'):
+                model_record.model_file.name = result['model_file']
+            model_record.save()
+            model_records.append(model_record)
             
-            # Serialize and save the model
+            best_value = best_record.metrics.get(metric) if best_record else None
+            if is_better(model_record.metrics.get(metric), best_value, metric):
+                best_record = model_record
+        
+        if best_record is None:
+            logger.error(f"No candidate produced a {metric} value")
+            return model_records, None
+        
+        if best_record.artifact_path:
+            RecommendationService.build_serving_indexes(best_record)
+        
+        if activate and RecommendationService.activate_model(best_record) is None:
+            logger.warning(f"Best model {best_record.id} was stored but not activated")
+        
+        logger.info(f"Hyperparameter search finished: {len(model_records)} candidates stored, "
+                    f"best model {best_record.id} with {metric}={best_record.metrics[metric]:.4f}")
+        return model_records, best_record
+    
+    @staticmethod
+    def save_model_files(engine, model_record):
+        """
+        Persist a trained engine for serving
+        SVD and ALS models are exported as a compact serving artifact (float32 factors, biases, ID index
+        arrays and a CSR of seen items as .npy files) that workers memory-map instead of unpickling
+        the whole engine with its trainset and ratings DataFrame. The artifact includes the
+        item-item neighbour index used for similar books and, if enabled, the IVF retrieval
+        index. Other model types are pickled
+        """
+        model_name = f"{model_record.model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{model_record.id}"
+        
+        if engine.model_type in ('svd', 'als'):
+            artifact_path = f"recommendation_models/{model_name}"
+            serving_model = RecommendationService.add_serving_indexes(engine.to_serving_model())
+            serving_model.save(os.path.join(settings.MEDIA_ROOT, artifact_path))
+            model_record.artifact_path = artifact_path
+            model_record.save(update_fields=['artifact_path'])
+        else:
             model_data = pickle.dumps(engine)
-            model_filename = f"{model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pkl"
-            model_record.model_file.save(model_filename, ContentFile(model_data))
+            model_record.model_file.save(f"{model_name}.pkl", ContentFile(model_data))
+        
+        return model_record
+    
+    @staticmethod
+    def get_cprofile_path(model_record, run):
+        """
+        Path (relative to MEDIA_ROOT) of the cProfile dump of a training or inference run
+        """
+        return os.path.join('recommendation_profiles', f"model_{model_record.id}_{run}.prof")
+    
+    @staticmethod
+    def save_profile(model_records, run, profiler):
+        """
+        Finish a profiled run and store its summary in the profile of each of model_records
+        (the models the run used) under run ('training' or 'inference'); a cProfile dump, if
+        recorded, is written next to the model files and its path kept in the summary
+        """
+        cprofile_path = None
+        if profiler.profiler is not None:
+            cprofile_path = RecommendationService.get_cprofile_path(model_records[0], run)
+        summary = profiler.finish(
+            os.path.join(settings.MEDIA_ROOT, cprofile_path) if cprofile_path else None
+        )
+        summary['cprofile_path'] = cprofile_path
+        for model_record in model_records:
+            model_record.profile = {**(model_record.profile or {}), run: summary}
+            model_record.save(update_fields=['profile'])
+        return summary
+    
+    @staticmethod
+    def add_serving_indexes(serving_model):
+        """
+        Build the indexes a serving model is missing: the item-item neighbour index and,
+        if RECOMMENDATION_ANN_CANDIDATES is set, the IVF retrieval index
+        """
+        if serving_model.item_neighbors is None:
+            serving_model.build_item_neighbors(k=getattr(settings, 'RECOMMENDATION_SIMILAR_ITEMS_K', 50))
+        
+        ann_candidates = getattr(settings, 'RECOMMENDATION_ANN_CANDIDATES', 0)
+        if ann_candidates and serving_model.ann_centroids is None:
+            serving_model.build_ann_index(
+                n_candidates=ann_candidates,
+                n_lists=getattr(settings, 'RECOMMENDATION_ANN_LISTS', None)
+            )
+        return serving_model
+    
+    @staticmethod
+    def build_serving_indexes(model_record):
+        """
+        Add missing indexes to a model's serving artifact
+        Tuning candidates are stored without them; only the selected model needs them
+        """
+        artifact_path = os.path.join(settings.MEDIA_ROOT, model_record.artifact_path)
+        serving_model = ServingModel.load(artifact_path, mmap_mode=None)
+        missing_indexes = serving_model.item_neighbors is None or (
+            getattr(settings, 'RECOMMENDATION_ANN_CANDIDATES', 0) and serving_model.ann_centroids is None
+        )
+        
+        if missing_indexes:
+            RecommendationService.add_serving_indexes(serving_model)
+            serving_model.save(artifact_path)
+            model_registry.invalidate(model_record.id)
+        return model_record
+    
+    @staticmethod
+    def get_similar_books(isbn13, n=10):
+        """
+        Get the books most similar to a book from the active SVD model's item neighbour index
+        Returns a list of (isbn13, similarity) tuples, empty if there is no active SVD model
+        or the book is not in it
+        """
+        model_record = RecommendationModel.objects.filter(
+            is_active=True, model_type='svd'
+        ).exclude(artifact_path='', model_file='').first()
+        if not model_record:
+            logger.warning("No active SVD model available for similar books")
+            return []
+        
+        try:
+            engine = model_registry.get(model_record)
+        except Exception as e:
+            logger.error(f"Error loading recommendation model {model_record.id}: {str(e)}")
+            return []
+        
+        serving_model = engine if isinstance(engine, ServingModel) else engine.to_serving_model()
+        return serving_model.similar_items(isbn13, n)
+    
+    @staticmethod
+    def evaluate_recommendation_model(model_record, k=10, holdout_fraction=0.2, relevance_threshold=4.0):
+        """
+        Compute offline ranking metrics of a model's configuration on a time-based holdout
+        A model with the record's hyperparameters is trained on the ratings made before the
+        holdout cutoff and its top-k lists are scored against the ratings made after it
+        The metrics are stored on the record with a holdout_ prefix and returned
+        ALS models are evaluated on implicit interactions, where every held-out
+        interaction is relevant
+        """
+        if model_record.model_type == 'als':
+            ratings_df = RecommendationService.get_interactions_dataframe()
+            relevance_threshold = 0.0
+        else:
+            ratings_df = RecommendationService.get_ratings_dataframe(include_timestamps=True)
+        
+        if ratings_df.empty:
+            logger.error("No ratings data available for evaluation")
+            return None
+        
+        train_df, test_df = time_based_split(ratings_df, holdout_fraction=holdout_fraction)
+        
+        params = model_record.hyperparameters or {
+            'model_type': model_record.model_type,
+            'min_ratings_per_user': model_record.min_ratings_per_user,
+            'svd_n_factors': model_record.n_factors,
+            'knn_k': model_record.knn_k,
+        }
+        engine = RecommendationEngine(**params)
+        if engine.train(train_df.drop(columns='created_at'), test_size=0) is None:
+            logger.error(f"Could not train model {model_record.id} on the holdout training ratings")
+            return None
+        
+        holdout_metrics = evaluate_engine(
+            engine, train_df, test_df, k=k, relevance_threshold=relevance_threshold
+        )
+        
+        model_record.metrics = {
+            **model_record.metrics,
+            **{f'holdout_{name}': value for name, value in holdout_metrics.items()}
+        }
+        model_record.save(update_fields=['metrics', 'updated_at'])
+        
+        logger.info(f"Evaluated model {model_record.id} on a time-based holdout: {holdout_metrics}")
+        return holdout_metrics
+    
+    @staticmethod
+    def check_activation_thresholds(model_record):
+        """
+        Check a model's stored metrics against RECOMMENDATION_ACTIVATION_THRESHOLDS
+        Thresholds are minimums, except for error metrics (rmse, mae) where they are maximums
+        Returns a list of failure messages, empty if the model may be activated
+        """
+        failures = []
+        thresholds = getattr(settings, 'RECOMMENDATION_ACTIVATION_THRESHOLDS', {})
+        for metric, threshold in thresholds.items():
+            value = model_record.metrics.get(metric)
+            if value is None:
+                failures.append(f"{metric} has not been evaluated")
+            elif metric in LOWER_IS_BETTER and value > threshold:
+                failures.append(f"{metric} {value:.4f} is above the maximum of {threshold}")
+            elif metric not in LOWER_IS_BETTER and value < threshold:
+                failures.append(f"{metric} {value:.4f} is below the minimum of {threshold}")
+        return failures
+    
+    @staticmethod
+    def activate_model(model_record, force=False):
+        """
+        Activate a model and deactivate all other models of the same type
+        Unless force is set, a model that does not meet RECOMMENDATION_ACTIVATION_THRESHOLDS
+        is left inactive and None is returned
+        Cached engines of the deactivated models are dropped from this process's model registry;
+        other processes pick up the change on their next lookup of the active model
+        """
+        if not force:
+            failures = RecommendationService.check_activation_thresholds(model_record)
+            if failures:
+                logger.warning(f"Model {model_record.id} not activated: {'; '.join(failures)}")
+                return None
+        
+        with transaction.atomic():
+            deactivated = RecommendationModel.objects.filter(
+                model_type=model_record.model_type, is_active=True
+            ).exclude(id=model_record.id)
+            deactivated_ids = list(deactivated.values_list('id', flat=True))
+            deactivated.update(is_active=False)
             
-        logger.info(f"Successfully trained and saved {model_type} model with id {model_record.id}")
+            model_record.is_active = True
+            model_record.save(update_fields=['is_active', 'updated_at'])
+        
+        for model_id in deactivated_ids:
+            model_registry.invalidate(model_id)
+        invalidate_traffic_split()
+        
         return model_record
     
     @staticmethod
-    def load_recommendation_model(model_id=None):
+    def set_traffic_weight(model_record, traffic_weight):
+        """
+        Set the share of users a model serves in an A/B test (0 ends its experiment)
+        Running workers pick up the new split within RECOMMENDATION_AB_REFRESH_SECONDS
+        """
+        if not 0.0 <= traffic_weight <= 1.0:
+            raise ValueError("traffic_weight must be between 0 and 1")
+        model_record.traffic_weight = traffic_weight
+        model_record.save(update_fields=['traffic_weight', 'updated_at'])
+        invalidate_traffic_split()
+        return model_record
+    
+    @staticmethod
+    def load_recommendation_model(model_id=None, user_id=None):
         """
         Load a trained recommendation model from the database
-        If model_id is not provided, load the latest active model
+        If model_id is not provided, load the model serving user_id in the A/B traffic split
+        (see recommendation.ab_testing), or the latest active model
+        Engines are cached per process by the model registry, so only the first call reads the model files
+        Returns (engine, model_record) where engine is a RecommendationEngine or, for models with
+        a serving artifact, a memory-mapped ServingModel exposing the same recommend_* methods
         """
         try:
+            if not model_id and user_id is not None:
+                model_id = assign_model_id(user_id)
             if model_id:
                 model_record = RecommendationModel.objects.get(id=model_id)
             else:
                 model_record = RecommendationModel.objects.filter(is_active=True).first()
                 
-            if not model_record or not model_record.model_file:
+            if not model_record or not (model_record.artifact_path or model_record.model_file):
                 logger.error("No valid recommendation model found")
                 return None
                 
-            model_path = os.path.join(settings.MEDIA_ROOT, model_record.model_file.name)
-            with open(model_path, 'rb') as f:
-                engine = pickle.load(f)
+            engine = model_registry.get(model_record)
                 
             return engine, model_record
         except Exception as e:
@@ -121,70 +524,350 @@ class RecommendationService:
     def generate_recommendations_for_user(user_id, n_recommendations=10, model_id=None):
         """
         Generate book recommendations for a specific user
+        Users that are not in the model (e.g. they crossed the rating threshold after the last
+        training run), or who rated books after it was trained, are folded into an SVD model
+        using their current ratings
+        Users the model cannot score at all get cold-start recommendations from the
+        precomputed popularity rankings
+        Model recommendations never include books the user has rated and are picked from a
+        larger candidate pool by the diversity re-ranking (see recommendation.reranking)
         """
-        # Load the recommendation model
-        model_data = RecommendationService.load_recommendation_model(model_id)
-        if not model_data:
-            logger.error(f"Could not generate recommendations for user {user_id}: No model available")
-            return []
+        # Load the recommendation model serving this user
+        model_data = RecommendationService.load_recommendation_model(model_id, user_id=user_id)
+        if model_data:
+            engine, model_record = model_data
+            pool_size = candidate_pool_size(n_recommendations)
+            ratings = RecommendationService.get_user_ratings([user_id]).get(user_id, [])
+            fold_in = engine.model_type == 'svd' and bool(ratings)
             
-        engine, model_record = model_data
+            # Generate recommendations
+            recommendations = []
+            rated_since_training = fold_in and bool(
+                RecommendationService.get_users_rated_since([user_id], model_record.created_at)
+            )
+            if rated_since_training:
+                recommendations = engine.recommend_from_ratings(ratings, n_recommendations=pool_size)
+            if not recommendations:
+                recommendations = engine.recommend_for_user(user_id=user_id, n_recommendations=pool_size)
+            if not recommendations and fold_in and not rated_since_training:
+                logger.info(f"Folding user {user_id} into the model using {len(ratings)} ratings")
+                recommendations = engine.recommend_from_ratings(ratings, n_recommendations=pool_size)
+            recommendations = diversify(exclude_rated(recommendations, ratings), n_recommendations)
+        else:
+            logger.error(f"No model available for user {user_id}, using popularity rankings")
+            recommendations = []
         
-        # Generate recommendations
-        recommendations = engine.recommend_for_user(user_id=user_id, n_recommendations=n_recommendations)
+        if not recommendations:
+            model_record = None
+            recommendations = popular_recommendations(user_id, n_recommendations)
         
         if not recommendations:
             logger.info(f"No recommendations generated for user {user_id}")
             return []
             
         # Save recommendations to database
-        with transaction.atomic():
-            # Clear existing recommendations for this user
-            UserRecommendation.objects.filter(user_id=user_id).delete()
-            
-            # Create new recommendation records
-            user_recs = []
-            for book_isbn, score in recommendations:
-                try:
-                    from books.models import Book  # Import here to avoid circular imports
-                    book = Book.objects.get(isbn13=book_isbn)
-                    
-                    user_rec = UserRecommendation(
-                        user_id=user_id,
-                        book=book,
-                        score=score,
-                        model=model_record
-                    )
-                    user_recs.append(user_rec)
-                except Exception as e:
-                    logger.error(f"Error creating recommendation for book {book_isbn}: {str(e)}")
-            
-            # Bulk create all recommendations
-            UserRecommendation.objects.bulk_create(user_recs)
+        user_recs = RecommendationService.save_recommendations(
+            {user_id: recommendations}, model_record
+        )
             
         logger.info(f"Generated {len(user_recs)} recommendations for user {user_id}")
         return user_recs
     
     @staticmethod
-    def generate_recommendations_for_all_users(n_recommendations=10, model_id=None, min_ratings=3):
+    def generate_recommendations_for_users(user_ids, n_recommendations=10, model_id=None):
         """
-        Generate recommendations for all users who have at least min_ratings
+        Generate and save book recommendations for a batch of users with one model load
+        Users known to the model are scored in blocks; the others, and users who rated books
+        after an SVD model was trained, are folded into it using their ratings, fetched with a
+        single query. Users left without recommendations get cold-start recommendations from
+        the popularity rankings
+        Without model_id, each user is scored only by the model serving them in the A/B split
+        Model recommendations never include books the user has rated and are picked from a
+        larger candidate pool by the diversity re-ranking
+        """
+        pool_size = candidate_pool_size(n_recommendations)
+        
+        if not model_id:
+            groups = group_users_by_model(user_ids)
+            if len(groups) > 1:
+                return sum(
+                    RecommendationService.generate_recommendations_for_users(
+                        variant_user_ids, n_recommendations=n_recommendations, model_id=variant_id
+                    )
+                    for variant_id, variant_user_ids in groups.items()
+                )
+            model_id = next(iter(groups), None)
+        
+        ratings_by_user = RecommendationService.get_user_ratings(user_ids)
+        model_data = RecommendationService.load_recommendation_model(model_id)
+        if model_data:
+            engine, model_record = model_data
+            rated_since_training = RecommendationService.get_users_to_fold_in(engine, model_record, user_ids)
+            recommendations_by_user = dict(engine.recommend_for_users(
+                [user_id for user_id in user_ids if user_id not in rated_since_training],
+                n_recommendations=pool_size
+            ))
+        else:
+            logger.error(f"No model available for {len(user_ids)} users, using popularity rankings")
+            engine, model_record = None, None
+            recommendations_by_user = {}
+        
+        recommendations_by_user = {
+            user_id: diversify(exclude_rated(recs, ratings_by_user.get(user_id, [])), n_recommendations)
+            for user_id, recs in recommendations_by_user.items()
+        }
+        
+        folded_in_by_user, popular_by_user = RecommendationService.get_fallback_recommendations(
+            engine, [user_id for user_id in user_ids if user_id not in recommendations_by_user],
+            ratings_by_user, n_recommendations
+        )
+        recommendations_by_user.update(folded_in_by_user)
+        
+        if not recommendations_by_user and not popular_by_user:
+            logger.info(f"No recommendations generated for {len(user_ids)} users")
+            return 0
+        
+        user_recs = RecommendationService.save_recommendations(recommendations_by_user, model_record)
+        # Popularity recommendations do not come from a model
+        user_recs += RecommendationService.save_recommendations(popular_by_user, None)
+        logger.info(f"Generated {len(user_recs)} recommendations for "
+                    f"{len(recommendations_by_user) + len(popular_by_user)} users "
+                    f"({len(popular_by_user)} from popularity rankings)")
+        return len(user_recs)
+    
+    @staticmethod
+    def get_users_to_fold_in(engine, model_record, user_ids):
+        """
+        IDs of the given users who rated books after an SVD model was trained
+        Their scores would come from stale factors, so their ratings are folded in instead
+        """
+        if engine.model_type != 'svd':
+            return set()
+        return RecommendationService.get_users_rated_since(user_ids, model_record.created_at)
+    
+    @staticmethod
+    def get_fallback_recommendations(engine, user_ids, ratings_by_user, n_recommendations=10):
+        """
+        Recommendations for users the model did not score, as ({user_id: recs} from the model,
+        {user_id: recs} from the popularity rankings)
+        SVD models fold the users' ratings in; users left without recommendations, or all of
+        them when engine is None, get cold-start recommendations from the popularity rankings
+        ratings_by_user maps user IDs to (isbn13, rate) pairs and must cover user_ids
+        """
+        folded_in_by_user = {}
+        if engine is not None and engine.model_type == 'svd':
+            pool_size = candidate_pool_size(n_recommendations)
+            for user_id in user_ids:
+                ratings = ratings_by_user.get(user_id)
+                if not ratings:
+                    continue
+                recs = engine.recommend_from_ratings(ratings, n_recommendations=pool_size)
+                if recs:
+                    folded_in_by_user[user_id] = diversify(exclude_rated(recs, ratings), n_recommendations)
+        
+        popular_by_user = popular_recommendations_for_users(
+            [user_id for user_id in user_ids if user_id not in folded_in_by_user],
+            n_recommendations, ratings_by_user=ratings_by_user
+        )
+        return folded_in_by_user, popular_by_user
+    
+    @staticmethod
+    def get_user_ratings(user_ids):
+        """
+        Current ratings of the given users with one query, as {user_id: [(isbn13, rate), ...]}
         """
         from books.models import BookRating  # Import here to avoid circular imports
         
-        # Get users with sufficient ratings
-        users_with_ratings = BookRating.objects.values('user').annotate(
-            rating_count=Count('id')
-        ).filter(rating_count__gte=min_ratings)
+        ratings_by_user = {}
+        for user_id, book_id, rate in BookRating.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'book_id', Cast('rate', FloatField())
+        ):
+            ratings_by_user.setdefault(user_id, []).append((book_id, rate))
+        return ratings_by_user
+    
+    @staticmethod
+    def get_users_rated_since(user_ids, since):
+        """
+        IDs of the given users whose latest rating event is newer than since
+        """
+        return set(
+            UserRatingStats.objects.filter(user_id__in=user_ids, last_rated_at__gt=since)
+            .values_list('user_id', flat=True)
+        )
+    
+    @staticmethod
+    def save_recommendations(recommendations_by_user, model_record, batch_size=1000):
+        """
+        Replace the stored recommendations of the given users in one transaction
+        recommendations_by_user maps user IDs to lists of (isbn13, score) tuples
+        """
+        from books.models import Book  # Import here to avoid circular imports
         
-        user_ids = [user['user'] for user in users_with_ratings]
+        if not recommendations_by_user:
+            return []
+        
+        isbns = {isbn for recs in recommendations_by_user.values() for isbn, _ in recs}
+        # Book's primary key is the isbn13, so one query is enough to skip books deleted since training
+        existing_isbns = set(
+            Book.objects.filter(isbn13__in=isbns).values_list('isbn13', flat=True)
+        )
+        missing_isbns = isbns - existing_isbns
+        if missing_isbns:
+            logger.warning(f"Skipping {len(missing_isbns)} recommended books that no longer exist")
         
-        recommendations_count = 0
-        for user_id in user_ids:
-            recs = RecommendationService.generate_recommendations_for_user(
-                user_id, n_recommendations, model_id
+        recommended_at = timezone.now()
+        user_recs = [
+            UserRecommendation(
+                user_id=user_id,
+                book_id=book_isbn,
+                score=score,
+                model=model_record,
+                recommended_at=recommended_at
             )
-            recommendations_count += len(recs)
+            for user_id, recs in recommendations_by_user.items()
+            for book_isbn, score in recs
+            if book_isbn in existing_isbns
+        ]
+        
+        user_ids = list(recommendations_by_user)
+        with transaction.atomic():
+            # Clear existing recommendations for these users
+            UserRecommendation.objects.filter(user_id__in=user_ids).delete()
+            UserRecommendation.objects.bulk_create(user_recs, batch_size=batch_size)
+            # Cached feed pages of these users are stale once the new rows are visible
+            transaction.on_commit(lambda: invalidate_feeds(user_ids))
+        
+        return user_recs
+    
+    @staticmethod
+    def generate_recommendations_for_all_users(n_recommendations=10, model_id=None, min_ratings=3,
+                                               block_size=1024, chunk_size=5000, profile=False):
+        """
+        Generate recommendations for all users who have at least min_ratings
+        Each model is loaded once, users are scored in blocks of block_size as a single
+        matrix product, and rows are written in one transaction per chunk_size users
+        Without model_id, each user is scored only by the model serving them in the A/B split
+        Each user's list is picked from a larger candidate pool by the diversity re-ranking,
+        which uses the in-memory book attributes and so adds no queries per user
+        As in generate_recommendations_for_users, users who rated books since an SVD model was
+        trained are folded into it and users left without recommendations get cold-start
+        recommendations from the popularity rankings
+        Per-stage timings and memory are stored in the models' profile under 'inference'
+        """
+        from books.models import BookRating  # Import here to avoid circular imports
+        
+        with StageProfiler('inference', cprofile=profile) as profiler:
+        
+            # Get users with sufficient ratings
+            with profiler.stage('select_users') as record:
+                users_with_ratings = BookRating.objects.values('user').annotate(
+                    rating_count=Count('rate_id')
+                ).filter(rating_count__gte=min_ratings)
+            
+                user_ids = [user['user'] for user in users_with_ratings]
+                record['rows'] = len(user_ids)
+        
+            groups = {model_id: user_ids} if model_id else group_users_by_model(user_ids)
+        
+            pool_size = candidate_pool_size(n_recommendations)
+            model_records = []
+            recommendations_count = 0
+            users_count = 0
+            for variant_id, variant_user_ids in groups.items():
+                # Load each recommendation model once for the whole run
+                with profiler.stage('load_model'):
+                    model_data = RecommendationService.load_recommendation_model(variant_id)
+                if model_data:
+                    engine, model_record = model_data
+                    model_records.append(model_record)
+                    rated_since_training = RecommendationService.get_users_to_fold_in(
+                        engine, model_record, variant_user_ids
+                    )
+                    recommendations = iter(engine.recommend_for_users(
+                        [user_id for user_id in variant_user_ids if user_id not in rated_since_training],
+                        n_recommendations=pool_size, block_size=block_size
+                    ))
+                else:
+                    logger.error(f"No model available for {len(variant_user_ids)} users, using popularity rankings")
+                    engine, model_record = None, None
+                    recommendations = iter(())
             
-        logger.info(f"Generated recommendations for {len(user_ids)} users, total of {recommendations_count} recommendations")
-        return recommendations_count
\ No newline at end of file
+                scored_users = set()
+                while True:
+                    with profiler.stage('score') as record:
+                        pending = dict(islice(recommendations, chunk_size))
+                        record['rows'] = len(pending)
+                    if not pending:
+                        break
+                    with profiler.stage('rerank') as record:
+                        # Books rated since training are not excluded by the model
+                        ratings_by_user = RecommendationService.get_user_ratings(list(pending))
+                        pending = {
+                            user_id: diversify(exclude_rated(recs, ratings_by_user.get(user_id)), n_recommendations)
+                            for user_id, recs in pending.items()
+                        }
+                        record['rows'] = len(pending)
+                    with profiler.stage('db_write') as record:
+                        saved = RecommendationService.save_recommendations(pending, model_record)
+                        record['rows'] = len(saved)
+                    recommendations_count += len(saved)
+                    users_count += len(pending)
+                    scored_users.update(pending)
+            
+                # Users who rated books since training or who are unknown to the model
+                unscored_users = [user_id for user_id in variant_user_ids if user_id not in scored_users]
+                for start in range(0, len(unscored_users), chunk_size):
+                    chunk = unscored_users[start:start + chunk_size]
+                    with profiler.stage('fallback') as record:
+                        folded_in, popular = RecommendationService.get_fallback_recommendations(
+                            engine, chunk, RecommendationService.get_user_ratings(chunk), n_recommendations
+                        )
+                        record['rows'] = len(chunk)
+                    with profiler.stage('db_write') as record:
+                        saved = RecommendationService.save_recommendations(folded_in, model_record)
+                        # Popularity recommendations do not come from a model
+                        saved += RecommendationService.save_recommendations(popular, None)
+                        record['rows'] = len(saved)
+                    recommendations_count += len(saved)
+                    users_count += len(folded_in) + len(popular)
+        
+            if model_records:
+                RecommendationService.save_profile(model_records, 'inference', profiler)
+            else:
+                profiler.finish()
+            
+            logger.info(f"Generated recommendations for {users_count} of {len(user_ids)} users, total of {recommendations_count} recommendations")
+            return recommendations_count
+    
+    @staticmethod
+    def get_experiment_results(since=None):
+        """
+        Compare the served models on their logged impressions
+        A conversion is an impressed book the user rated after it was shown
+        Returns one dict per model (None for popularity rankings) with impressions, users,
+        conversions and conversion_rate
+        """
+        from books.models import BookRating  # Import here to avoid circular imports
+        
+        impressions = RecommendationImpression.objects.all()
+        if since:
+            impressions = impressions.filter(shown_at__gte=since)
+        rated_after = BookRating.objects.filter(
+            user=OuterRef('user'), book=OuterRef('book'), created_at__gte=OuterRef('shown_at')
+        )
+        results = impressions.annotate(converted=Exists(rated_after)).values('model').annotate(
+            impressions=Count('id'),
+            users=Count('user', distinct=True),
+            conversions=Count('id', filter=Q(converted=True))
+        ).order_by('model')
+        
+        return [
+            {
+                'model_id': result['model'],
+                'impressions': result['impressions'],
+                'users': result['users'],
+                'conversions': result['conversions'],
+                'conversion_rate': result['conversions'] / result['impressions'],
+            }
+            for result in results
+        ]
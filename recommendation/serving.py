@@ -0,0 +1,556 @@
+import json
+import logging
+import os
+import numpy as np
+
+from .ann import IVFIndex
+from .scoring import (
+    fold_in_user,
+    predict_score_block,
+    predict_scores,
+    top_n_indices,
+    top_n_indices_block,
+    top_k_similar_items,
+)
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_META_FILE = "meta.json"
+ARTIFACT_ARRAYS = (
+    "user_ids",
+    "item_ids",
+    "sorted_item_ids",
+    "item_id_order",
+    "user_factors",
+    "item_factors",
+    "user_bias",
+    "item_bias",
+    "seen_indptr",
+    "seen_indices",
+)
+# Arrays that older artifacts may not have
+OPTIONAL_ARTIFACT_ARRAYS = (
+    "item_neighbors",
+    "item_neighbor_scores",
+    "ann_centroids",
+    "ann_list_indptr",
+    "ann_list_items",
+)
+
+
+class ServingModel:
+    """
+    Compact, read-only representation of a trained factorization model for serving.
+
+    Holds only what scoring needs: float32 factor matrices and bias vectors, the raw
+    user/item ID index arrays and a CSR matrix (indptr/indices) of the items every
+    user has already rated. Saved as one .npy file per array so it can be loaded
+    with mmap_mode='r' and shared between worker processes through the page cache.
+
+    Users are stored sorted by raw ID and looked up with a binary search, so loading
+    does not build any Python dictionaries.
+
+    Optionally holds an item-item index of the top-K most similar items per item
+    (item_neighbors/item_neighbor_scores), so similar items are served in O(K),
+    and an IVF index (ann_*) so single-user recommendations re-score a few hundred
+    candidate items instead of the whole catalogue.
+    """
+
+    def __init__(
+        self,
+        model_type: str,
+        user_ids: np.ndarray,
+        item_ids: np.ndarray,
+        sorted_item_ids: np.ndarray,
+        item_id_order: np.ndarray,
+        user_factors: np.ndarray,
+        item_factors: np.ndarray,
+        user_bias: np.ndarray,
+        item_bias: np.ndarray,
+        seen_indptr: np.ndarray,
+        seen_indices: np.ndarray,
+        global_mean: float = 0.0,
+        rating_scale: tuple | None = (1, 5),
+        biased: bool = True,
+        reg: float = 0.02,
+        item_neighbors: np.ndarray | None = None,
+        item_neighbor_scores: np.ndarray | None = None,
+        ann_centroids: np.ndarray | None = None,
+        ann_list_indptr: np.ndarray | None = None,
+        ann_list_items: np.ndarray | None = None,
+        ann_candidates: int = 0,
+    ):
+        self.model_type = model_type
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.sorted_item_ids = sorted_item_ids
+        self.item_id_order = item_id_order
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.user_bias = user_bias
+        self.item_bias = item_bias
+        self.seen_indptr = seen_indptr
+        self.seen_indices = seen_indices
+        self.global_mean = float(global_mean)
+        self.rating_scale = tuple(rating_scale) if rating_scale is not None else None
+        self.biased = biased
+        self.reg = float(reg)
+        self.item_neighbors = item_neighbors
+        self.item_neighbor_scores = item_neighbor_scores
+        self.ann_centroids = ann_centroids
+        self.ann_list_indptr = ann_list_indptr
+        self.ann_list_items = ann_list_items
+        self.ann_candidates = int(ann_candidates)
+
+    @property
+    def n_users(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def n_items(self) -> int:
+        return len(self.item_ids)
+
+    @classmethod
+    def from_engine(cls, engine, dtype=np.float32) -> "ServingModel":
+        """
+        Builds a serving model from a trained SVD RecommendationEngine.
+
+        Args:
+            engine (RecommendationEngine): Engine whose model has been trained.
+            dtype: Floating point type of the factor matrices and biases.
+
+        Returns:
+            ServingModel: The in-memory serving model.
+        """
+        trainset = engine.trainset
+        model = engine.model
+        biased = getattr(model, "biased", True)
+
+        raw_user_ids = np.asarray(
+            [trainset.to_raw_uid(inner_uid) for inner_uid in range(trainset.n_users)]
+        )
+        user_order = np.argsort(raw_user_ids, kind="stable")
+
+        seen_counts = np.fromiter(
+            (len(trainset.ur[inner_uid]) for inner_uid in user_order),
+            dtype=np.int64,
+            count=trainset.n_users,
+        )
+        seen_indptr = np.zeros(trainset.n_users + 1, dtype=np.int64)
+        np.cumsum(seen_counts, out=seen_indptr[1:])
+        seen_indices = np.fromiter(
+            (
+                inner_iid
+                for inner_uid in user_order
+                for (inner_iid, _) in trainset.ur[inner_uid]
+            ),
+            dtype=np.int32,
+            count=int(seen_indptr[-1]),
+        )
+
+        item_ids = np.asarray(list(engine._raw_item_ids()))
+        item_id_order = np.argsort(item_ids, kind="stable")
+
+        if biased:
+            user_bias = model.bu[user_order].astype(dtype)
+            item_bias = model.bi.astype(dtype)
+            global_mean = trainset.global_mean
+        else:
+            user_bias = np.zeros(trainset.n_users, dtype=dtype)
+            item_bias = np.zeros(trainset.n_items, dtype=dtype)
+            global_mean = 0.0
+
+        return cls(
+            model_type=engine.model_type,
+            user_ids=raw_user_ids[user_order],
+            item_ids=item_ids,
+            sorted_item_ids=item_ids[item_id_order],
+            item_id_order=item_id_order,
+            user_factors=np.ascontiguousarray(model.pu[user_order], dtype=dtype),
+            item_factors=np.ascontiguousarray(model.qi, dtype=dtype),
+            user_bias=user_bias,
+            item_bias=item_bias,
+            seen_indptr=seen_indptr,
+            seen_indices=seen_indices,
+            global_mean=global_mean,
+            rating_scale=engine.rating_scale,
+            biased=biased,
+            reg=getattr(model, "reg_pu", 0.02),
+        )
+
+    def save(self, path: str) -> str:
+        """
+        Writes the serving model to a directory of .npy files plus a meta.json.
+
+        Args:
+            path (str): Directory to write the artifact to. Created if missing.
+
+        Returns:
+            str: The artifact directory.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in ARTIFACT_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        for name in OPTIONAL_ARTIFACT_ARRAYS:
+            if getattr(self, name) is not None:
+                np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+
+        # meta.json is written last so a complete meta file marks a complete artifact
+        meta = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "model_type": self.model_type,
+            "global_mean": self.global_mean,
+            "rating_scale": list(self.rating_scale) if self.rating_scale else None,
+            "biased": self.biased,
+            "reg": self.reg,
+            "n_users": self.n_users,
+            "n_items": self.n_items,
+            "n_factors": int(self.item_factors.shape[1]),
+            "n_neighbors": (
+                int(self.item_neighbors.shape[1]) if self.item_neighbors is not None else 0
+            ),
+            "ann_candidates": self.ann_candidates,
+        }
+        with open(os.path.join(path, ARTIFACT_META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        logger.info(
+            f"Saved serving artifact with {self.n_users} users and {self.n_items} items to {path}"
+        )
+        return path
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str | None = "r") -> "ServingModel":
+        """
+        Loads a serving model written by save.
+
+        Args:
+            path (str): The artifact directory.
+            mmap_mode (str | None): Passed to np.load. With 'r' the arrays are memory-mapped
+                                    read-only instead of being read into memory.
+
+        Returns:
+            ServingModel: The loaded serving model.
+        """
+        with open(os.path.join(path, ARTIFACT_META_FILE)) as f:
+            meta = json.load(f)
+
+        if meta.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported serving artifact format version: {meta.get('format_version')}"
+            )
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARTIFACT_ARRAYS
+        }
+        for name in OPTIONAL_ARTIFACT_ARRAYS:
+            array_path = os.path.join(path, f"{name}.npy")
+            if os.path.exists(array_path):
+                arrays[name] = np.load(array_path, mmap_mode=mmap_mode)
+        return cls(
+            model_type=meta["model_type"],
+            global_mean=meta["global_mean"],
+            rating_scale=meta["rating_scale"],
+            biased=meta.get("biased", True),
+            reg=meta.get("reg", 0.02),
+            ann_candidates=meta.get("ann_candidates", 0),
+            **arrays,
+        )
+
+    def user_index(self, user_id: object) -> int | None:
+        """
+        Returns the row of user_id in the factor matrices, or None if the user is unknown.
+        """
+        try:
+            position = int(np.searchsorted(self.user_ids, user_id))
+        except TypeError:
+            return None
+        if position < self.n_users and self.user_ids[position] == user_id:
+            return position
+        return None
+
+    def item_index(self, item_id: object) -> int | None:
+        """
+        Returns the row of item_id in the factor matrices, or None if the item is unknown.
+        """
+        try:
+            position = int(np.searchsorted(self.sorted_item_ids, item_id))
+        except TypeError:
+            return None
+        if position < self.n_items and self.sorted_item_ids[position] == item_id:
+            return int(self.item_id_order[position])
+        return None
+
+    def build_item_neighbors(self, k: int = 50, block_size: int = 2048) -> "ServingModel":
+        """
+        Precomputes the top-K most similar items of every item by cosine similarity
+        of the item factors.
+
+        Args:
+            k (int): Number of neighbours stored per item.
+            block_size (int): Number of items whose similarities are computed per matrix product.
+
+        Returns:
+            ServingModel: self, with item_neighbors and item_neighbor_scores set.
+        """
+        self.item_neighbors, self.item_neighbor_scores = top_k_similar_items(
+            self.item_factors, k, block_size=block_size
+        )
+        logger.info(f"Built item neighbour index with {k} neighbours for {self.n_items} items")
+        return self
+
+    def build_ann_index(
+        self, n_candidates: int = 500, n_lists: int | None = None, n_iter: int = 15
+    ) -> "ServingModel":
+        """
+        Builds the IVF index used to retrieve candidates for single-user recommendations.
+
+        Args:
+            n_candidates (int): Default number of candidates retrieved per user and
+                                re-scored exactly. Higher values trade latency for recall.
+            n_lists (int | None): Number of IVF clusters, 4 * sqrt(n_items) by default.
+            n_iter (int): Number of k-means iterations.
+
+        Returns:
+            ServingModel: self, with the ann_* arrays set.
+        """
+        index = IVFIndex.build(
+            self.item_factors,
+            self.item_bias if self.biased else None,
+            n_lists=n_lists,
+            n_iter=n_iter,
+        )
+        self.ann_centroids = index.centroids
+        self.ann_list_indptr = index.list_indptr
+        self.ann_list_items = index.list_items
+        self.ann_candidates = int(n_candidates)
+        return self
+
+    def _top_n(
+        self,
+        user_factors: np.ndarray,
+        user_bias: float,
+        n_recommendations: int,
+        exclude: np.ndarray,
+        n_candidates: int | None = None,
+    ) -> list[tuple[object, float]]:
+        """
+        Scores items for one user and returns the top-N unrated ones.
+        With an IVF index and n_candidates > 0 only the retrieved candidates are
+        scored; otherwise every item is.
+        Private helper method.
+        """
+        if n_candidates is None:
+            n_candidates = self.ann_candidates
+
+        if n_candidates and self.ann_centroids is not None and n_candidates < self.n_items:
+            index = IVFIndex(self.ann_centroids, self.ann_list_indptr, self.ann_list_items)
+            candidates = index.candidates(
+                np.asarray(user_factors, dtype=np.float32),
+                max(n_candidates, n_recommendations) + len(exclude),
+            )
+            candidates = candidates[~np.isin(candidates, exclude)]
+            scores = predict_scores(
+                user_factors,
+                self.item_factors[candidates],
+                user_bias=user_bias,
+                item_bias=self.item_bias[candidates],
+                global_mean=self.global_mean,
+                rating_scale=self.rating_scale,
+            )
+            top = top_n_indices(scores, n_recommendations)
+            return [(self.item_ids[candidates[i]].item(), float(scores[i])) for i in top]
+
+        scores = predict_scores(
+            user_factors,
+            self.item_factors,
+            user_bias=user_bias,
+            item_bias=self.item_bias,
+            global_mean=self.global_mean,
+            rating_scale=self.rating_scale,
+        )
+        top_items = top_n_indices(scores, n_recommendations, exclude=exclude)
+        return [(self.item_ids[i].item(), float(scores[i])) for i in top_items]
+
+    def similar_items(self, item_id: object, n: int = 10) -> list[tuple[object, float]]:
+        """
+        Returns the items most similar to item_id.
+
+        Served from the precomputed neighbour index in O(n). Artifacts without the
+        index fall back to scoring item_id against every item.
+
+        Args:
+            item_id (object): The raw ID of the item.
+            n (int): The number of similar items to return.
+
+        Returns:
+            list[tuple[object, float]]: (item_id, cosine_similarity) tuples sorted by
+                                       similarity in descending order. Empty if the
+                                       item is unknown.
+        """
+        item_index = self.item_index(item_id)
+        if item_index is None:
+            return []
+
+        if self.item_neighbors is not None and n <= self.item_neighbors.shape[1]:
+            neighbors = self.item_neighbors[item_index, :n]
+            similarities = self.item_neighbor_scores[item_index, :n]
+        else:
+            factors = self.item_factors.astype(np.float64)
+            norms = np.linalg.norm(factors, axis=1)
+            norms[norms == 0] = 1.0
+            scores = factors @ factors[item_index] / (norms * norms[item_index])
+            neighbors = top_n_indices(scores, n, exclude=np.array([item_index]))
+            similarities = scores[neighbors]
+
+        return [
+            (self.item_ids[i].item(), float(similarity))
+            for i, similarity in zip(neighbors, similarities)
+        ]
+
+    def seen_items(self, user_index: int) -> np.ndarray:
+        """
+        Returns the item indices the user at user_index rated in the trainset.
+        """
+        return self.seen_indices[
+            self.seen_indptr[user_index] : self.seen_indptr[user_index + 1]
+        ]
+
+    def recommend_for_user(
+        self,
+        user_id: object,
+        n_recommendations: int = 10,
+        n_candidates: int | None = None,
+    ) -> list[tuple[object, float]]:
+        """
+        Generates top-N recommendations for a user for items they haven't rated.
+
+        Args:
+            user_id (object): The raw ID of the user.
+            n_recommendations (int): The number of recommendations to return.
+            n_candidates (int | None): Number of candidates retrieved from the IVF index
+                                       and re-scored exactly. 0 scores every item; None
+                                       uses the default stored with the index.
+
+        Returns:
+            list[tuple[object, float]]: (item_id, estimated_rating) tuples sorted by
+                                       estimated rating in descending order. Empty if
+                                       the user is unknown or has rated every item.
+        """
+        user_index = self.user_index(user_id)
+        if user_index is None:
+            logger.warning(
+                f"User_id '{user_id}' not found in the serving model. Cannot generate recommendations."
+            )
+            return []
+
+        return self._top_n(
+            self.user_factors[user_index],
+            self.user_bias[user_index],
+            n_recommendations,
+            exclude=self.seen_items(user_index),
+            n_candidates=n_candidates,
+        )
+
+    def recommend_for_users(
+        self, user_ids: list, n_recommendations: int = 10, block_size: int = 1024
+    ):
+        """
+        Generates top-N recommendations for many users, scoring them in blocks as a
+        user-factor x item-factor matrix product.
+
+        Args:
+            user_ids (list): Raw IDs of the users.
+            n_recommendations (int): The number of recommendations per user.
+            block_size (int): Number of users scored per matrix product.
+
+        Yields:
+            tuple[object, list[tuple[object, float]]]: (user_id, recommendations) for
+                every known user that has at least one unrated item.
+        """
+        known_users = []
+        for user_id in user_ids:
+            user_index = self.user_index(user_id)
+            if user_index is not None:
+                known_users.append((user_id, user_index))
+        if len(known_users) < len(user_ids):
+            logger.warning(
+                f"{len(user_ids) - len(known_users)} of {len(user_ids)} users not found in the serving model. Skipping them."
+            )
+
+        for start in range(0, len(known_users), block_size):
+            block = known_users[start : start + block_size]
+            user_indices = np.fromiter((index for _, index in block), dtype=np.int64)
+
+            scores = predict_score_block(
+                self.user_factors[user_indices],
+                self.item_factors,
+                user_bias=self.user_bias[user_indices],
+                item_bias=self.item_bias,
+                global_mean=self.global_mean,
+                rating_scale=self.rating_scale,
+            )
+
+            seen = [self.seen_items(index) for index in user_indices]
+            exclude_rows = np.repeat(
+                np.arange(len(block)), [len(items) for items in seen]
+            )
+            exclude_cols = (
+                np.concatenate(seen) if seen else np.empty(0, dtype=np.int64)
+            )
+
+            top_items = top_n_indices_block(
+                scores,
+                n_recommendations,
+                exclude_rows=exclude_rows,
+                exclude_cols=exclude_cols,
+            )
+            for row, (user_id, _) in enumerate(block):
+                if len(top_items[row]):
+                    yield user_id, [
+                        (self.item_ids[i].item(), float(scores[row, i]))
+                        for i in top_items[row]
+                    ]
+
+    def recommend_from_ratings(
+        self, ratings: list[tuple[object, float]], n_recommendations: int = 10
+    ) -> list[tuple[object, float]]:
+        """
+        Generates top-N recommendations for a user who is not in the model by folding
+        their ratings in: the user's factor vector and bias are solved against the
+        frozen item factors, then every item is scored as for a known user.
+
+        Args:
+            ratings (list[tuple[object, float]]): The user's (item_id, rating) pairs.
+                                                  Items unknown to the model are ignored.
+            n_recommendations (int): The number of recommendations to return.
+
+        Returns:
+            list[tuple[object, float]]: (item_id, estimated_rating) tuples sorted by
+                                       estimated rating in descending order, excluding
+                                       the rated items. Empty if no rated item is known.
+        """
+        rated = {}
+        for item_id, rating in ratings:
+            item_index = self.item_index(item_id)
+            if item_index is not None:
+                rated[item_index] = float(rating)
+        if not rated:
+            logger.warning("None of the rated items are known to the model. Cannot fold in user.")
+            return []
+
+        rated_indices = np.fromiter(rated.keys(), dtype=np.int64, count=len(rated))
+        rated_values = np.fromiter(rated.values(), dtype=np.float64, count=len(rated))
+        user_factors, user_bias = fold_in_user(
+            self.item_factors[rated_indices],
+            rated_values,
+            item_bias=self.item_bias[rated_indices] if self.biased else None,
+            global_mean=self.global_mean,
+            reg=self.reg,
+        )
+
+        return self._top_n(
+            user_factors, user_bias, n_recommendations, exclude=rated_indices
+        )
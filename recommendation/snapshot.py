@@ -0,0 +1,244 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import FloatField, Max, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "ratings_snapshot.npz"
+SNAPSHOT_ARRAYS = ("rate_ids", "user_ids", "isbn_codes", "isbns", "rates", "created_at")
+
+
+def get_snapshot_path():
+    return os.path.join(
+        settings.MEDIA_ROOT,
+        getattr(settings, 'RECOMMENDATION_SNAPSHOT_DIR', 'recommendation_data'),
+        SNAPSHOT_FILE,
+    )
+
+
+def get_overlap():
+    return timedelta(seconds=getattr(settings, 'RECOMMENDATION_SNAPSHOT_OVERLAP_SECONDS', 300))
+
+
+def get_log_retention():
+    return timedelta(days=getattr(settings, 'RECOMMENDATION_SNAPSHOT_LOG_RETENTION_DAYS', 7))
+
+
+class RatingsSnapshot:
+    """
+    Columnar copy of the BookRating table kept as one .npz file under MEDIA_ROOT
+    ISBNs are dictionary-encoded (isbn_codes index into isbns) and timestamps are
+    UTC epoch seconds; max_rate_id, last_change_id and refreshed_at record how far
+    the ratings and the RatingChangeLog have been read
+    """
+
+    def __init__(self, rate_ids, user_ids, isbn_codes, isbns, rates, created_at,
+                 max_rate_id=0, last_change_id=0, refreshed_at=0.0):
+        self.rate_ids = rate_ids
+        self.user_ids = user_ids
+        self.isbn_codes = isbn_codes
+        self.isbns = isbns
+        self.rates = rates
+        self.created_at = created_at
+        self.max_rate_id = int(max_rate_id)
+        self.last_change_id = int(last_change_id)
+        self.refreshed_at = float(refreshed_at)
+
+    def __len__(self):
+        return len(self.rate_ids)
+
+    @property
+    def refreshed_at_datetime(self):
+        return datetime.fromtimestamp(self.refreshed_at, tz=dt_timezone.utc)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a snapshot file, or return None if there is none
+        """
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                *(data[name] for name in SNAPSHOT_ARRAYS),
+                max_rate_id=data['max_rate_id'],
+                last_change_id=data['last_change_id'],
+                refreshed_at=data['refreshed_at'],
+            )
+
+    def save(self, path):
+        """
+        Write the snapshot through a temporary file and an atomic rename, so readers
+        never see a partly written snapshot
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                **{name: getattr(self, name) for name in SNAPSHOT_ARRAYS},
+                max_rate_id=self.max_rate_id,
+                last_change_id=self.last_change_id,
+                refreshed_at=self.refreshed_at,
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    def without(self, rate_ids):
+        """
+        Return a copy of the snapshot without the given ratings
+        """
+        keep = ~np.isin(self.rate_ids, rate_ids)
+        return RatingsSnapshot(
+            self.rate_ids[keep], self.user_ids[keep], self.isbn_codes[keep], self.isbns,
+            self.rates[keep], self.created_at[keep],
+            self.max_rate_id, self.last_change_id, self.refreshed_at,
+        )
+
+    def append(self, other):
+        """
+        Return a snapshot with the ratings of other appended, merging the ISBN dictionaries
+        """
+        isbn_codes = {isbn: code for code, isbn in enumerate(self.isbns.tolist())}
+        code_map = np.fromiter(
+            (isbn_codes.setdefault(isbn, len(isbn_codes)) for isbn in other.isbns.tolist()),
+            dtype=np.int32, count=len(other.isbns)
+        )
+        return RatingsSnapshot(
+            np.concatenate([self.rate_ids, other.rate_ids]),
+            np.concatenate([self.user_ids, other.user_ids]),
+            np.concatenate([self.isbn_codes, code_map[other.isbn_codes]]),
+            np.asarray(list(isbn_codes), dtype=str),
+            np.concatenate([self.rates, other.rates]),
+            np.concatenate([self.created_at, other.created_at]),
+            self.max_rate_id, self.last_change_id, self.refreshed_at,
+        )
+
+    def to_dataframe(self, include_timestamps=False):
+        """
+        Convert to the ratings DataFrame used by RecommendationEngine: int32 user IDs,
+        categorical ISBNs and float32 ratings, plus a UTC created_at column if
+        include_timestamps is set
+        """
+        ratings_df = pd.DataFrame({
+            'user_id': self.user_ids,
+            'isbn13': pd.Categorical.from_codes(
+                self.isbn_codes, categories=self.isbns.tolist()
+            ).remove_unused_categories(),
+            'rate': self.rates,
+        })
+        if include_timestamps:
+            ratings_df['created_at'] = pd.to_datetime(self.created_at, unit='s', utc=True)
+        return ratings_df
+
+
+def read_ratings(queryset, chunk_size=20000):
+    """
+    Read ratings from a BookRating queryset into a RatingsSnapshot
+    Only the needed columns are read (no joins, no model instances), streamed through a
+    server-side cursor in chunks of chunk_size rows; ISBNs are dictionary-encoded while
+    streaming so no per-row string list is kept
+    """
+    rows = queryset.order_by().values_list(
+        'rate_id', 'user_id', 'book_id', Cast('rate', FloatField()), 'created_at'
+    ).iterator(chunk_size=chunk_size)
+
+    isbn_codes = {}
+    chunks = {name: [] for name in ('rate_ids', 'user_ids', 'isbn_codes', 'rates', 'created_at')}
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        count = len(chunk)
+        chunks['rate_ids'].append(np.fromiter((row[0] for row in chunk), dtype=np.int64, count=count))
+        chunks['user_ids'].append(np.fromiter((row[1] for row in chunk), dtype=np.int32, count=count))
+        chunks['isbn_codes'].append(np.fromiter(
+            (isbn_codes.setdefault(row[2], len(isbn_codes)) for row in chunk),
+            dtype=np.int32, count=count
+        ))
+        chunks['rates'].append(np.fromiter((row[3] for row in chunk), dtype=np.float32, count=count))
+        chunks['created_at'].append(np.fromiter(
+            (row[4].timestamp() for row in chunk), dtype=np.float64, count=count
+        ))
+
+    dtypes = {'rate_ids': np.int64, 'user_ids': np.int32, 'isbn_codes': np.int32,
+              'rates': np.float32, 'created_at': np.float64}
+    arrays = {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+        for name, parts in chunks.items()
+    }
+    return RatingsSnapshot(isbns=np.asarray(list(isbn_codes), dtype=str), **arrays)
+
+
+def refresh_ratings_snapshot(path=None, full=False, chunk_size=20000):
+    """
+    Bring the ratings snapshot up to date and return it
+    Only ratings with a rate_id above the snapshot's high-water mark, ratings created
+    within RECOMMENDATION_SNAPSHOT_OVERLAP_SECONDS of the last refresh (to catch rows
+    whose transaction committed late) and ratings named in the RatingChangeLog since the
+    last refresh are read; logged ratings are dropped from the snapshot first, so deleted
+    ratings disappear and updated ones are replaced by their current row
+    The snapshot is rebuilt from the whole table if full is set, if it does not exist or
+    if it is older than RECOMMENDATION_SNAPSHOT_LOG_RETENTION_DAYS, after which change
+    log rows are pruned
+    """
+    from books.models import BookRating  # Import here to avoid circular imports
+    from .models import RatingChangeLog
+
+    path = path or get_snapshot_path()
+    now = timezone.now()
+
+    snapshot = None if full else RatingsSnapshot.load(path)
+    if snapshot is not None and now - snapshot.refreshed_at_datetime > get_log_retention():
+        logger.info("Ratings snapshot is older than the change log retention; rebuilding it")
+        snapshot = None
+
+    # Read before the ratings, so changes logged meanwhile are replayed on the next refresh
+    last_change_id = RatingChangeLog.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+    if snapshot is None:
+        merged = read_ratings(BookRating.objects.all(), chunk_size)
+        logger.info(f"Built ratings snapshot with {len(merged)} ratings")
+    else:
+        since = snapshot.refreshed_at_datetime - get_overlap()
+        changes = RatingChangeLog.objects.filter(
+            Q(id__gt=snapshot.last_change_id) | Q(created_at__gte=since), id__lte=last_change_id
+        )
+        changed_rate_ids = np.fromiter(
+            changes.order_by().values_list('rate_id', flat=True).distinct(), dtype=np.int64
+        )
+        delta = read_ratings(
+            BookRating.objects.filter(
+                Q(rate_id__gt=snapshot.max_rate_id)
+                | Q(created_at__gte=since)
+                | Q(rate_id__in=changes.values('rate_id'))
+            ),
+            chunk_size,
+        )
+        kept = snapshot.without(np.union1d(changed_rate_ids, delta.rate_ids))
+        merged = kept.append(delta)
+        logger.info(
+            f"Refreshed ratings snapshot: {len(delta)} new or changed ratings read, "
+            f"{len(snapshot) - len(kept)} replaced or deleted, {len(merged)} in total"
+        )
+
+    merged.max_rate_id = max(
+        snapshot.max_rate_id if snapshot is not None else 0,
+        int(merged.rate_ids.max()) if len(merged) else 0,
+    )
+    merged.last_change_id = last_change_id
+    merged.refreshed_at = now.timestamp()
+    merged.save(path)
+
+    RatingChangeLog.objects.filter(
+        created_at__lt=now - get_log_retention() - get_overlap()
+    ).delete()
+    return merged
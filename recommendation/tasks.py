@@ -1,11 +1,14 @@
 import logging
 from celery import shared_task
 from .services import RecommendationService
+from .popularity import refresh_popular_books
+from .work_queue import finish_queue_processing, process_pending_updates
 
 logger = logging.getLogger(__name__)
 
 @shared_task
-def train_recommendation_model_task(model_type='svd', min_ratings_per_user=5, n_factors=100, knn_k=40):
+def train_recommendation_model_task(model_type='svd', min_ratings_per_user=5, n_factors=100, knn_k=40,
+                                    evaluate=False, profile=False):
     """
     Background task for training a recommendation model
     """
@@ -15,7 +18,9 @@ def train_recommendation_model_task(model_type='svd', min_ratings_per_user=5, n_
             model_type=model_type,
             min_ratings_per_user=min_ratings_per_user,
             n_factors=n_factors,
-            knn_k=knn_k
+            knn_k=knn_k,
+            evaluate=evaluate,
+            profile=profile
         )
         return f"Successfully trained model ID: {model_record.id}" if model_record else "Model training failed"
     except Exception as e:
@@ -40,7 +45,8 @@ def generate_recommendations_for_user_task(user_id, n_recommendations=10, model_
         return f"Error generating recommendations: {str(e)}"
 
 @shared_task
-def generate_recommendations_for_all_users_task(n_recommendations=10, model_id=None, min_ratings=3):
+def generate_recommendations_for_all_users_task(n_recommendations=10, model_id=None, min_ratings=3,
+                                                profile=False):
     """
     Background task for generating recommendations for all eligible users
     """
@@ -49,9 +55,44 @@ def generate_recommendations_for_all_users_task(n_recommendations=10, model_id=N
         count = RecommendationService.generate_recommendations_for_all_users(
             n_recommendations=n_recommendations,
             model_id=model_id,
-            min_ratings=min_ratings
+            min_ratings=min_ratings,
+            profile=profile
         )
         return f"Generated recommendations for multiple users, total count: {count}"
     except Exception as e:
         logger.error(f"Error in generate_recommendations_for_all_users_task: {str(e)}")
-        return f"Error generating recommendations for all users: {str(e)}"
\ No newline at end of file
+        return f"Error generating recommendations for all users: {str(e)}"
+
+@shared_task
+def process_recommendation_queue_task(batch_size=None, n_recommendations=10):
+    """
+    Background task for refreshing recommendations of users queued by rating events
+    Reschedules itself while queue entries remain, also after a failed batch
+    """
+    logger.info("Starting background task for processing the recommendation queue")
+    processed = 0
+    try:
+        processed, _ = process_pending_updates(
+            batch_size=batch_size,
+            n_recommendations=n_recommendations
+        )
+        return f"Refreshed recommendations for {processed} queued users"
+    except Exception as e:
+        logger.error(f"Error in process_recommendation_queue_task: {str(e)}")
+        return f"Error processing recommendation queue: {str(e)}"
+    finally:
+        finish_queue_processing(processed)
+
+@shared_task
+def refresh_popular_books_task(top_n=None):
+    """
+    Background task for recomputing the cold-start popularity rankings
+    Meant to run periodically (e.g. hourly from Celery beat)
+    """
+    logger.info("Starting background task for refreshing popularity rankings")
+    try:
+        count = refresh_popular_books(top_n=top_n)
+        return f"Refreshed popularity rankings with {count} entries"
+    except Exception as e:
+        logger.error(f"Error in refresh_popular_books_task: {str(e)}")
+        return f"Error refreshing popularity rankings: {str(e)}"
\ No newline at end of file
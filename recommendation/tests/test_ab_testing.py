@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from django.test import SimpleTestCase, override_settings
+from recommendation.ab_testing import assign_model_id, build_traffic_split, user_bucket
+
+
+def model_record(id, is_active=False, traffic_weight=0.0):
+    return SimpleNamespace(id=id, is_active=is_active, traffic_weight=traffic_weight)
+
+
+class UserBucketTests(SimpleTestCase):
+    def test_bucket_is_stable_and_uniform(self):
+        buckets = [user_bucket(user_id) for user_id in range(10000)]
+        self.assertEqual(buckets, [user_bucket(user_id) for user_id in range(10000)])
+        self.assertTrue(all(0 <= bucket < 1 for bucket in buckets))
+        self.assertAlmostEqual(sum(bucket < 0.1 for bucket in buckets) / 10000, 0.1, delta=0.01)
+        # Assignments must survive deploys, so a change of the hash has to be noticed
+        self.assertEqual(user_bucket(42), 0.10400782541269099)
+
+    def test_salt_reshuffles_users(self):
+        buckets = [user_bucket(user_id) for user_id in range(100)]
+        with override_settings(RECOMMENDATION_AB_SALT='another-experiment'):
+            reshuffled = [user_bucket(user_id) for user_id in range(100)]
+        self.assertFalse(any(a == b for a, b in zip(buckets, reshuffled)))
+
+
+class TrafficSplitTests(SimpleTestCase):
+    def test_control_takes_what_the_experiments_leave(self):
+        split = build_traffic_split([model_record(3, is_active=True), model_record(5, traffic_weight=0.1),
+                                     model_record(4, traffic_weight=0.2)])
+        self.assertEqual(split[0], [4, 5, 3])
+        for bound, expected in zip(split[1], [0.2, 0.3, 1.0]):
+            self.assertAlmostEqual(bound, expected)
+
+    def test_weights_are_scaled_to_one(self):
+        split = build_traffic_split([model_record(1, is_active=True, traffic_weight=3), model_record(2, traffic_weight=1)])
+        self.assertEqual(split[0], [2, 1])
+        self.assertEqual(split[1], [0.25, 1.0])
+
+    def test_no_served_model(self):
+        self.assertEqual(build_traffic_split([]), ([], []))
+        self.assertEqual(build_traffic_split([model_record(1)]), ([], []))
+        self.assertIsNone(assign_model_id(1, ([], [])))
+
+    def test_users_are_assigned_by_bucket(self):
+        split = build_traffic_split([model_record(1, is_active=True), model_record(2, traffic_weight=0.3)])
+        assignments = {user_id: assign_model_id(user_id, split) for user_id in range(2000)}
+        for user_id, model_id in assignments.items():
+            self.assertEqual(model_id, 2 if user_bucket(user_id) < 0.3 else 1)
+        self.assertAlmostEqual(list(assignments.values()).count(2) / 2000, 0.3, delta=0.05)
+
+    def test_starting_an_experiment_only_moves_control_users(self):
+        before = build_traffic_split([model_record(1, is_active=True), model_record(2, traffic_weight=0.2)])
+        after = build_traffic_split([model_record(1, is_active=True), model_record(2, traffic_weight=0.2),
+                                     model_record(3, traffic_weight=0.1)])
+        for user_id in range(2000):
+            if assign_model_id(user_id, before) == 2:
+                self.assertEqual(assign_model_id(user_id, after), 2)
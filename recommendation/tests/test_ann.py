@@ -0,0 +1,69 @@
+import numpy as np
+from django.test import SimpleTestCase
+from recommendation.ann import IVFIndex, augment_items, augment_user
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.serving import ServingModel
+from recommendation.tests.utils import make_ratings
+
+
+class IVFIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.item_factors = rng.normal(scale=0.3, size=(2000, 16))
+        self.item_bias = rng.normal(scale=0.3, size=2000)
+        self.users = rng.normal(size=(50, 16))
+
+    def exact_top(self, user_factors, n=10):
+        return np.argsort(-(self.item_factors @ user_factors + self.item_bias))[:n]
+
+    def recall(self, index, n_candidates):
+        hits = [
+            len(np.intersect1d(self.exact_top(user), index.candidates(user, n_candidates))) / 10
+            for user in self.users
+        ]
+        return np.mean(hits)
+
+    def test_nearest_augmented_item_has_the_highest_score(self):
+        items = augment_items(self.item_factors, self.item_bias)
+        for user in self.users:
+            distances = np.linalg.norm(items - augment_user(user), axis=1)
+            self.assertEqual(np.argmin(distances), self.exact_top(user, 1)[0])
+
+    def test_recall_against_brute_force(self):
+        index = IVFIndex.build(self.item_factors, self.item_bias, n_lists=40)
+        recalls = [self.recall(index, n_candidates) for n_candidates in (100, 200, 400)]
+        self.assertEqual(recalls, sorted(recalls))
+        self.assertGreaterEqual(recalls[-1], 0.7)
+        self.assertEqual(self.recall(index, 2000), 1.0)
+
+    def test_lists_partition_the_items(self):
+        index = IVFIndex.build(self.item_factors, n_lists=40)
+        self.assertEqual(index.n_lists, 40)
+        self.assertEqual(index.list_indptr[-1], 2000)
+        self.assertEqual(sorted(index.list_items.tolist()), list(range(2000)))
+        self.assertGreaterEqual(len(index.candidates(self.users[0], 100)), 100)
+
+
+class ServingModelANNTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        engine = RecommendationEngine(model_type='svd', min_ratings_per_user=1, svd_n_factors=8)
+        engine.train(make_ratings(), test_size=0)
+        cls.model = ServingModel.from_engine(engine).build_ann_index(n_candidates=10, n_lists=6)
+
+    def test_candidates_are_rescored_exactly(self):
+        exact = dict(self.model.recommend_for_user(3, 40, n_candidates=0))
+        recommendations = self.model.recommend_for_user(3, 5)
+        self.assertEqual(len(recommendations), 5)
+        scores = [score for _, score in recommendations]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        for isbn, score in recommendations:
+            self.assertAlmostEqual(score, exact[isbn])
+
+    def test_all_candidates_match_exact_scoring(self):
+        for user_id in (1, 12, 30):
+            self.assertEqual(
+                self.model.recommend_for_user(user_id, 10, n_candidates=self.model.n_items - 1),
+                self.model.recommend_for_user(user_id, 10, n_candidates=0)
+            )
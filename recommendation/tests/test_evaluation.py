@@ -0,0 +1,93 @@
+import math
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from recommendation.evaluation import evaluate_recommendations, time_based_split
+from recommendation.tests.utils import make_ratings
+
+
+def reference_metrics(recommendations, train_df, test_df, k, relevance_threshold):
+    """Per-user loop over the textbook metric definitions"""
+    relevant = test_df[test_df['rate'] >= relevance_threshold]
+    item_counts = train_df['isbn13'].value_counts()
+    n_train_users = train_df['user_id'].nunique()
+    per_user = []
+    recommended = []
+    for user_id, user_relevant in relevant.groupby('user_id'):
+        relevant_items = set(user_relevant['isbn13'])
+        items = list(recommendations.get(user_id, []))[:k]
+        recommended.extend(items)
+        hits = [item in relevant_items for item in items]
+        ideal = min(len(relevant_items), k)
+        dcg = sum(1 / math.log2(rank + 2) for rank, hit in enumerate(hits) if hit)
+        idcg = sum(1 / math.log2(rank + 2) for rank in range(ideal))
+        precisions = [sum(hits[:rank + 1]) / (rank + 1) for rank, hit in enumerate(hits) if hit]
+        per_user.append((sum(hits) / k, sum(hits) / len(relevant_items), dcg / idcg, sum(precisions) / ideal))
+
+    precision, recall, ndcg, average_precision = np.mean(per_user, axis=0)
+    return {
+        f'precision_at_{k}': precision,
+        f'recall_at_{k}': recall,
+        f'ndcg_at_{k}': ndcg,
+        f'map_at_{k}': average_precision,
+        'coverage': len(set(recommended)) / len(item_counts),
+        'novelty': np.mean([-math.log2(max(item_counts.get(item, 0), 1) / n_train_users) for item in recommended]),
+        'users': len(per_user),
+    }
+
+
+class EvaluateRecommendationsTests(SimpleTestCase):
+    def setUp(self):
+        ratings = make_ratings()
+        is_test = np.random.default_rng(3).random(len(ratings)) < 0.3
+        self.train_df = ratings[~is_test]
+        self.test_df = ratings[is_test]
+
+    def test_matches_per_user_definitions(self):
+        rng = np.random.default_rng(4)
+        items = self.train_df['isbn13'].unique().tolist() + ['9789999999999']
+        recommendations = {
+            user_id: rng.choice(items, size=rng.integers(0, 15), replace=False).tolist()
+            for user_id in range(1, 28)
+        }
+        metrics = evaluate_recommendations(recommendations, self.train_df, self.test_df, k=10)
+        expected = reference_metrics(recommendations, self.train_df, self.test_df, 10, 4.0)
+
+        self.assertEqual(metrics.keys(), expected.keys())
+        self.assertEqual(metrics['users'], expected['users'])
+        for name, value in expected.items():
+            self.assertAlmostEqual(metrics[name], value, msg=name)
+
+    def test_perfect_lists(self):
+        relevant = self.test_df[self.test_df['rate'] >= 4]
+        recommendations = {
+            user_id: user_ratings['isbn13'].tolist()[:5]
+            for user_id, user_ratings in relevant.groupby('user_id')
+        }
+        metrics = evaluate_recommendations(recommendations, self.train_df, self.test_df, k=5)
+        self.assertAlmostEqual(metrics['ndcg_at_5'], 1.0)
+        self.assertAlmostEqual(metrics['map_at_5'], 1.0)
+
+    def test_no_relevant_ratings(self):
+        test_df = self.test_df.assign(rate=1)
+        self.assertEqual(evaluate_recommendations({1: ['a']}, self.train_df, test_df), {})
+
+
+class TimeBasedSplitTests(SimpleTestCase):
+    def test_holds_out_the_latest_ratings_of_known_users(self):
+        ratings = pd.DataFrame({
+            'user_id': [1, 1, 2, 2, 1, 3, 2, 3],
+            'isbn13': list('abcdefgh'),
+            'rate': [5] * 8,
+            'created_at': pd.date_range('2024-01-01', periods=8, freq='D', tz='UTC'),
+        })
+        train_df, test_df = time_based_split(ratings, holdout_fraction=0.4)
+
+        self.assertEqual(train_df['isbn13'].tolist(), list('abcde'))
+        # User 3 has no rating before the cutoff
+        self.assertEqual(test_df['isbn13'].tolist(), ['g'])
+        self.assertLess(train_df['created_at'].max(), test_df['created_at'].min())
+
+    def test_rejects_invalid_fraction(self):
+        with self.assertRaises(ValueError):
+            time_based_split(make_ratings().assign(created_at=0), holdout_fraction=1)
@@ -0,0 +1,70 @@
+import numpy as np
+import scipy.sparse as sp
+from django.test import SimpleTestCase
+from recommendation.implicit_als import ImplicitALS
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.tests.utils import make_ratings
+
+
+def two_communities(n_users=20, n_items=20, density=0.6, seed=0):
+    """Users of each half only interact with the items of the same half"""
+    rng = np.random.default_rng(seed)
+    half_users, half_items = n_users // 2, n_items // 2
+    same_half = (np.arange(n_users)[:, np.newaxis] < half_users) == (np.arange(n_items) < half_items)
+    observed = same_half & (rng.random((n_users, n_items)) < density)
+    return sp.csr_matrix(observed * rng.integers(1, 4, size=observed.shape), dtype=np.float32)
+
+
+class ImplicitALSTests(SimpleTestCase):
+    def test_conjugate_gradient_reaches_the_exact_solution(self):
+        rng = np.random.default_rng(1)
+        interactions = two_communities()
+        fixed = rng.normal(scale=0.5, size=(20, 6)).astype(np.float32)
+        model = ImplicitALS(n_factors=6, regularization=0.1, alpha=2.0, cg_steps=6)
+
+        solved = model._solve(interactions * np.float32(2.0), fixed, np.zeros((20, 6), dtype=np.float32))
+
+        for user in range(20):
+            weights = interactions[user].toarray().ravel()
+            confidence = 1 + 2.0 * weights
+            preference = (weights > 0).astype(float)
+            lhs = fixed.T @ (confidence[:, np.newaxis] * fixed) + 0.1 * np.eye(6)
+            exact = np.linalg.solve(lhs, fixed.T @ (confidence * preference))
+            np.testing.assert_allclose(solved[user], exact, rtol=1e-3, atol=1e-4)
+
+    def test_ranks_items_of_the_users_community_first(self):
+        interactions = two_communities()
+        # One factor per community
+        model = ImplicitALS(n_factors=2, alpha=5.0, n_iterations=10).fit(interactions)
+        self.assertEqual(model.user_factors.shape, (20, 2))
+        self.assertEqual(model.item_factors.shape, (20, 2))
+
+        scores = model.user_factors @ model.item_factors.T
+        for user in range(20):
+            own = slice(0, 10) if user < 10 else slice(10, 20)
+            other = slice(10, 20) if user < 10 else slice(0, 10)
+            self.assertGreater(scores[user, own].min(), scores[user, other].max())
+
+
+class ALSEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.interactions = make_ratings().rename(columns={'rate': 'weight'})
+        self.engine = RecommendationEngine(
+            model_type='als', rating_col='weight', min_ratings_per_user=1, als_n_factors=8, als_n_iterations=5
+        )
+
+    def test_reports_ranking_metrics_on_held_out_interactions(self):
+        metrics = self.engine.train(self.interactions, test_size=0.2)
+        self.assertIsNone(metrics['rmse'])
+        self.assertIsNone(metrics['mae'])
+        for name in ('precision_at_10', 'recall_at_10', 'ndcg_at_10'):
+            self.assertTrue(0 <= metrics[name] <= 1)
+
+    def test_recommends_unseen_items(self):
+        self.engine.train(self.interactions, test_size=0)
+        for user_id in (1, 4, 30):
+            seen = set(self.interactions.loc[self.interactions['user_id'] == user_id, 'isbn13'])
+            recommendations = self.engine.recommend_for_user(user_id, 10)
+            self.assertEqual(len(recommendations), 10)
+            self.assertFalse(seen & {isbn for isbn, _ in recommendations})
+        self.assertEqual(self.engine.recommend_for_user(999, 10), [])
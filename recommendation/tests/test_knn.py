@@ -0,0 +1,82 @@
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg
+from django.test import SimpleTestCase
+from recommendation.knn import SparseUserKNN, top_k_neighbors_block
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.tests.utils import make_ratings
+
+
+class SparseUserKNNTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = RecommendationEngine(
+            model_type='knn', knn_backend='sparse', knn_k=10, knn_n_jobs=1, min_ratings_per_user=1
+        )
+        cls.engine.train(make_ratings(), test_size=0)
+        cls.model = cls.engine.model
+        cls.trainset = cls.engine.trainset
+
+    def dense_similarities(self, shrinkage):
+        ratings = np.zeros((self.trainset.n_users, self.trainset.n_items))
+        for u, i, r in self.trainset.all_ratings():
+            ratings[u, i] = r
+        rated = ratings > 0
+        means = ratings.sum(axis=1) / rated.sum(axis=1)
+        centered = np.where(rated, ratings - means[:, np.newaxis], 0.0)
+        normalized = centered / np.linalg.norm(centered, axis=1, keepdims=True)
+        similarities = normalized @ normalized.T
+        n_common = rated.astype(float) @ rated.T
+        similarities *= np.maximum(n_common - 1, 0) / (np.maximum(n_common - 1, 0) + shrinkage)
+        np.fill_diagonal(similarities, 0.0)
+        return similarities
+
+    def test_neighbors_match_dense_similarities(self):
+        similarities = self.dense_similarities(shrinkage=100.0)
+        centered = self.model.centered
+        normalized = sp.csr_matrix(sp.diags(1 / sp.linalg.norm(centered, axis=1)) @ centered)
+        start, neighbors, neighbor_similarities = top_k_neighbors_block(
+            normalized, self.model.binary, 5, 12, k=10, shrinkage=100.0
+        )
+        self.assertEqual(start, 5)
+        self.assertEqual(neighbors.shape, (7, 10))
+        for row, user in enumerate(range(5, 12)):
+            expected = np.sort(similarities[user])[::-1][:10]
+            expected = np.where(expected > 0, expected, 0.0)
+            np.testing.assert_allclose(neighbor_similarities[row], expected, atol=1e-5)
+            valid = neighbors[row] >= 0
+            np.testing.assert_allclose(
+                similarities[user, neighbors[row][valid]], neighbor_similarities[row][valid], atol=1e-5
+            )
+
+    def test_predict_block_matches_estimate(self):
+        users = np.array([0, 3, 17, 29])
+        estimates = self.model.predict_block(users)
+        for row, u in enumerate(users):
+            for i in range(self.trainset.n_items):
+                self.assertAlmostEqual(estimates[row, i], self.model.estimate(u, i)[0], places=4)
+
+    def test_parallel_fit_matches_single_process(self):
+        parallel = SparseUserKNN(k=10, block_size=7, n_jobs=2).fit(self.trainset)
+        single = SparseUserKNN(k=10, block_size=7, n_jobs=1).fit(self.trainset)
+        np.testing.assert_array_equal(parallel.neighbors, single.neighbors)
+        np.testing.assert_array_equal(parallel.neighbor_similarities, single.neighbor_similarities)
+
+    def test_top_n_matches_per_item_estimates(self):
+        low, high = self.trainset.rating_scale
+        for u, recommendations in zip([1, 8], self.model.top_n([1, 8], 10)):
+            rated = {i for i, _ in self.trainset.ur[u]}
+            expected = sorted(
+                (min(max(self.model.estimate(u, i)[0], low), high)
+                 for i in range(self.trainset.n_items) if i not in rated),
+                reverse=True
+            )[:10]
+            self.assertEqual(len(recommendations), 10)
+            self.assertFalse(rated & {i for i, _ in recommendations})
+            np.testing.assert_allclose([estimate for _, estimate in recommendations], expected, atol=1e-4)
+
+    def test_min_k_falls_back_to_the_user_mean(self):
+        model = SparseUserKNN(k=10, min_k=11, n_jobs=1).fit(self.trainset)
+        estimates = model.predict_block(np.array([2]))
+        np.testing.assert_allclose(estimates[0], model.means[2])
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from django.test import SimpleTestCase, override_settings
+from recommendation.model_registry import ModelRegistry
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.serving import ARTIFACT_META_FILE, ServingModel
+from recommendation.tests.utils import make_ratings
+
+
+class ModelRegistryTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        engine = RecommendationEngine(model_type='svd', min_ratings_per_user=1, svd_n_factors=4)
+        engine.train(make_ratings(n_users=5, n_items=10, per_user=5), test_size=0)
+        cls.model = ServingModel.from_engine(engine)
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.media_root = tmp_dir.name
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.records = {}
+        for model_id in (1, 2, 3):
+            artifact_path = f'recommendation_models/svd_{model_id}'
+            self.model.save(os.path.join(self.media_root, artifact_path))
+            self.records[model_id] = SimpleNamespace(id=model_id, artifact_path=artifact_path, model_file=None)
+        self.registry = ModelRegistry(max_models=2)
+
+    def load(self, *model_ids):
+        return [self.registry.get(self.records[model_id]) for model_id in model_ids]
+
+    def test_models_are_loaded_once(self):
+        first, = self.load(1)
+        self.assertIsInstance(first, ServingModel)
+        self.assertIs(self.registry.get(self.records[1]), first)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_least_recently_used_model_is_evicted(self):
+        first, second = self.load(1, 2)
+        self.load(1, 3)
+        self.assertEqual(len(self.registry), 2)
+        self.assertIs(self.registry.get(self.records[1]), first)
+        self.assertIsNot(self.registry.get(self.records[2]), second)
+
+    def test_pinned_models_are_not_evicted(self):
+        self.registry = ModelRegistry(max_models=1)
+        self.registry.pin([self.records[1]])
+        first, = self.load(1)
+        self.load(2, 3)
+        self.assertEqual(len(self.registry), 2)
+        self.assertIs(self.registry.get(self.records[1]), first)
+
+        # Pinning another model makes the first one evictable again
+        self.registry.pin([self.records[2]])
+        self.load(3)
+        self.assertIsNot(self.registry.get(self.records[1]), first)
+
+    def test_unreadable_model_is_not_pinned(self):
+        missing = SimpleNamespace(id=4, artifact_path='recommendation_models/missing', model_file=None)
+        with self.assertLogs('recommendation.model_registry', 'ERROR'):
+            self.registry.pin([missing, self.records[1]])
+        self.assertEqual(len(self.registry), 1)
+
+    def test_rewritten_model_is_reloaded(self):
+        first, = self.load(1)
+        meta_path = os.path.join(self.media_root, self.records[1].artifact_path, ARTIFACT_META_FILE)
+        later = time.time() + 10
+        os.utime(meta_path, (later, later))
+        self.assertIsNot(self.registry.get(self.records[1]), first)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_invalidate(self):
+        first, _ = self.load(1, 2)
+        self.registry.invalidate(1)
+        self.assertEqual(len(self.registry), 1)
+        self.assertIsNot(self.registry.get(self.records[1]), first)
+        self.registry.invalidate()
+        self.assertEqual(len(self.registry), 0)
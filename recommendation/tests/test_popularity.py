@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from books.models import Book, BookGenre, BookRating
+from recommendation.models import PopularBook
+from recommendation.popularity import (
+    bayesian_average, popular_recommendations, popular_recommendations_for_users,
+    refresh_popular_books
+)
+from users.models.profile import Profile, ProfileInterest
+
+
+class PopularityTests(TestCase):
+    # (number of ratings, rate, genre) per book; the last book is never rated
+    catalogue = [(1, 5, None), (8, 4.5, None), (6, 4, 'Epic Fantasy'), (2, 3, 'Fantasy'), (4, 3.5, 'Mystery'),
+                 (0, 0, 'Fantasy')]
+
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='password')
+            for i in range(9)
+        ]
+        self.books = []
+        for i, (count, rate, genre) in enumerate(self.catalogue):
+            book = Book.objects.create(isbn13=f'978000000000{i}', title=f'Book {i}')
+            self.books.append(book.isbn13)
+            if genre:
+                BookGenre.objects.create(book=book, genre=genre)
+            for user in self.users[:count]:
+                BookRating.objects.create(user=user, book=book, rate=rate)
+
+        # The last user has rated nothing and likes fantasy
+        self.fan = self.users[-1]
+        profile = Profile.objects.create(user=self.fan)
+        ProfileInterest.objects.create(profile=profile, interest=' Fantasy ')
+        refresh_popular_books(prior_weight=4)
+
+    def ranking(self, scope, key=''):
+        return list(PopularBook.objects.filter(scope=scope, key=key).order_by('rank').values_list('book_id', flat=True))
+
+    def test_bayesian_average_shrinks_small_samples(self):
+        self.assertEqual(bayesian_average(5, 1, 4, 4), 4.2)
+        self.assertEqual(bayesian_average(0, 0, 4, 4), 4)
+
+    def test_rankings_follow_the_bayesian_average(self):
+        rated = [entry for entry in self.catalogue if entry[0]]
+        prior_mean = sum(count * rate for count, rate, _ in rated) / sum(count for count, _, _ in rated)
+        scores = {
+            isbn: bayesian_average(count * rate, count, prior_mean, 4)
+            for isbn, (count, rate, _) in zip(self.books, self.catalogue) if count
+        }
+        self.assertEqual(self.ranking('overall'), sorted(scores, key=scores.get, reverse=True))
+        # Many 4.5-star ratings outrank a single 5-star one
+        self.assertEqual(self.ranking('overall')[0], self.books[1])
+        for popular in PopularBook.objects.filter(scope='overall'):
+            self.assertAlmostEqual(popular.score, scores[popular.book_id])
+
+    def test_genre_and_interest_rankings(self):
+        self.assertEqual(self.ranking('genre', 'Epic Fantasy'), [self.books[2]])
+        self.assertEqual(self.ranking('genre', 'Fantasy'), [self.books[3]])
+        self.assertEqual(self.ranking('interest', 'fantasy'), [self.books[2], self.books[3]])
+
+    def test_interest_matches_come_first(self):
+        recommendations = [isbn for isbn, _ in popular_recommendations(self.fan.id, 3)]
+        self.assertEqual(recommendations, [self.books[2], self.books[3], self.books[1]])
+
+    def test_rated_books_are_excluded(self):
+        # The first user rated every book except the unrated one
+        self.assertEqual(popular_recommendations(self.users[0].id), [])
+        recommendations = [isbn for isbn, _ in popular_recommendations(self.users[5].id)]
+        rated = {self.books[1], self.books[2]}
+        self.assertEqual(recommendations, [isbn for isbn in self.ranking('overall') if isbn not in rated])
+
+    def test_batch_matches_single_user(self):
+        user_ids = [user.id for user in self.users]
+        recommendations = popular_recommendations_for_users(user_ids)
+        for user_id in user_ids:
+            self.assertEqual(recommendations.get(user_id, []), popular_recommendations(user_id))
+        self.assertNotIn(self.users[0].id, recommendations)
+
+        ratings_by_user = {self.fan.id: [(self.books[2], 5)]}
+        recommendations = popular_recommendations_for_users([self.fan.id], ratings_by_user=ratings_by_user)
+        self.assertEqual(recommendations[self.fan.id][0][0], self.books[3])
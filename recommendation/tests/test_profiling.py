@@ -0,0 +1,60 @@
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from recommendation.profiling import StageProfiler, stage
+
+
+class StageProfilerTests(SimpleTestCase):
+    def test_repeated_stages_accumulate(self):
+        with mock.patch('recommendation.profiling.time.perf_counter', side_effect=[0.0, 1.0, 1.5, 2.0, 4.0, 5.0]):
+            profiler = StageProfiler('train_svd')
+            for rows in (100, 300):
+                with profiler.stage('fit', rows=rows):
+                    pass
+            summary = profiler.finish()
+
+        fit, = summary['stages']
+        self.assertEqual(fit['calls'], 2)
+        self.assertEqual(fit['rows'], 400)
+        self.assertEqual(fit['wall_time_s'], 2.5)
+        self.assertEqual(fit['items_per_s'], 160.0)
+        self.assertEqual(summary['run'], 'train_svd')
+        self.assertEqual(summary['total_wall_time_s'], 5.0)
+
+    def test_rows_can_be_set_inside_the_stage(self):
+        profiler = StageProfiler('inference')
+        with profiler.stage('score') as record:
+            record['rows'] = 42
+        with profiler.stage('save'):
+            pass
+        score, save = profiler.finish()['stages']
+        self.assertEqual(score['rows'], 42)
+        self.assertIsNone(save['rows'])
+        self.assertIsNone(save['items_per_s'])
+
+    def test_stage_without_profiler(self):
+        with stage(None, 'fit', rows=10) as record:
+            self.assertEqual(record, {'rows': 10})
+
+    def test_cprofile_dump(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = os.path.join(tmp_dir.name, 'profiles', 'train.prof')
+        with StageProfiler('train_svd', cprofile=True) as profiler:
+            sorted(range(1000), reverse=True)
+            profiler.finish(cprofile_path=path)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_cprofile_is_disabled_when_the_run_raises(self):
+        with self.assertRaises(RuntimeError):
+            with StageProfiler('train_svd', cprofile=True):
+                raise RuntimeError('training failed')
+        self.assertIsNone(sys.getprofile())
+        # Only one profiler can be active at a time on Python 3.12+
+        other = cProfile.Profile()
+        other.enable()
+        other.disable()
@@ -0,0 +1,78 @@
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from recommendation.reranking import (
+    BookAttributes, _csr_from_pairs, candidate_pool_size, diversify, rerank
+)
+
+
+def make_attributes(authors, genres):
+    """BookAttributes from {isbn: [author_id, ...]} and {isbn: [genre_code, ...]}"""
+    isbns = np.array(sorted(set(authors) | set(genres)))
+    row = {isbn: index for index, isbn in enumerate(isbns.tolist())}
+
+    def pairs(values):
+        rows = [row[isbn] for isbn, codes in values.items() for _ in codes]
+        codes = [code for codes in values.values() for code in codes]
+        return _csr_from_pairs(np.array(rows, dtype=np.int64), np.array(codes, dtype=np.int64), len(isbns))
+
+    return BookAttributes(isbns, *pairs(authors), *pairs(genres))
+
+
+def isbns(recommendations):
+    return [isbn for isbn, _ in recommendations]
+
+
+class RerankTests(SimpleTestCase):
+    def setUp(self):
+        # Books 0-3 share author 1; 0-2 are fantasy (genre 0), 3-5 mystery (genre 1)
+        self.attributes = make_attributes(
+            authors={'b0': [1], 'b1': [1], 'b2': [1], 'b3': [1], 'b4': [2], 'b5': [3]},
+            genres={'b0': [0], 'b1': [0], 'b2': [0], 'b3': [1], 'b4': [1], 'b5': [1]},
+        )
+        self.candidates = [(f'b{i}', 5.0 - 0.1 * i) for i in range(6)]
+
+    def test_without_diversity_or_caps_keeps_the_order(self):
+        self.assertEqual(rerank(self.candidates, self.attributes, 4, diversity=0), self.candidates[:4])
+
+    def test_author_cap(self):
+        reranked = rerank(self.candidates, self.attributes, 4, diversity=0, max_per_author=2)
+        self.assertEqual(isbns(reranked), ['b0', 'b1', 'b4', 'b5'])
+
+    def test_genre_cap(self):
+        reranked = rerank(self.candidates, self.attributes, 4, diversity=0, max_per_genre=1)
+        self.assertEqual(isbns(reranked), ['b0', 'b3', 'b1', 'b2'])
+
+    def test_caps_are_relaxed_when_they_cannot_be_met(self):
+        reranked = rerank(self.candidates, self.attributes, 6, diversity=0, max_per_author=1)
+        self.assertEqual(isbns(reranked), ['b0', 'b4', 'b5', 'b1', 'b2', 'b3'])
+
+    def test_diversity_prefers_other_authors_and_genres(self):
+        candidates = [('b0', 1.0), ('b1', 0.95), ('b5', 0.9)]
+        self.assertEqual(isbns(rerank(candidates, self.attributes, 2, diversity=0.5)), ['b0', 'b5'])
+        self.assertEqual(isbns(rerank(candidates, self.attributes, 2, diversity=0.1)), ['b0', 'b1'])
+
+    def test_books_without_attributes(self):
+        candidates = [('unknown', 4.0), ('b0', 3.0), ('other', 2.0)]
+        reranked = rerank(candidates, self.attributes, 3, diversity=0.3, max_per_author=1)
+        self.assertEqual(sorted(isbns(reranked)), sorted(isbns(candidates)))
+        self.assertEqual(rerank(candidates[:1], self.attributes, 5), candidates[:1])
+
+    def test_genre_lookup(self):
+        rows = self.attributes.rows(['b3', 'unknown', 'b0'])
+        self.assertEqual(rows.tolist(), [3, -1, 0])
+        np.testing.assert_array_equal(self.attributes.genre_matrix(rows), [[0, 1], [0, 0], [1, 0]])
+
+
+class DiversifyTests(SimpleTestCase):
+    @override_settings(RECOMMENDATION_RERANK_POOL_SIZE=0)
+    def test_disabled_reranking_cuts_the_list(self):
+        candidates = [(f'b{i}', 5.0 - i) for i in range(5)]
+        self.assertEqual(diversify(candidates, 3, attributes=make_attributes({}, {})), candidates[:3])
+        self.assertEqual(candidate_pool_size(10), 10)
+
+    @override_settings(RECOMMENDATION_RERANK_POOL_SIZE=50, RECOMMENDATION_RERANK_DIVERSITY=0,
+                       RECOMMENDATION_RERANK_MAX_PER_AUTHOR=1)
+    def test_uses_the_rerank_settings(self):
+        attributes = make_attributes({'a': [1], 'b': [1], 'c': [2]}, {})
+        self.assertEqual(isbns(diversify([('a', 3.0), ('b', 2.0), ('c', 1.0)], 2, attributes)), ['a', 'c'])
+        self.assertEqual(candidate_pool_size(10), 50)
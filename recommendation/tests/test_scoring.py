@@ -0,0 +1,118 @@
+import numpy as np
+from django.test import SimpleTestCase
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.scoring import (
+    fold_in_user, predict_score_block, predict_scores, top_n_indices, top_n_indices_block
+)
+from recommendation.tests.utils import make_ratings
+
+
+class ScoringTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.item_factors = rng.normal(size=(50, 8))
+        self.user_factors = rng.normal(size=8)
+        self.item_bias = rng.normal(size=50)
+
+    def test_predict_scores_matches_per_item_estimate(self):
+        scores = predict_scores(
+            self.user_factors, self.item_factors, user_bias=0.2, item_bias=self.item_bias,
+            global_mean=3.5, rating_scale=(1, 5)
+        )
+        for item, score in enumerate(scores):
+            estimate = 3.5 + 0.2 + self.item_bias[item] + self.item_factors[item] @ self.user_factors
+            self.assertAlmostEqual(score, min(max(estimate, 1), 5))
+
+    def test_top_n_matches_full_sort(self):
+        scores = predict_scores(self.user_factors, self.item_factors, item_bias=self.item_bias)
+        exclude = np.array([int(np.argmax(scores)), 7])
+        expected = [
+            item for item in sorted(range(len(scores)), key=lambda item: (-scores[item], item))
+            if item not in exclude
+        ][:10]
+        self.assertEqual(top_n_indices(scores, 10, exclude=exclude).tolist(), expected)
+
+    def test_top_n_breaks_ties_by_index_and_skips_excluded(self):
+        scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+        self.assertEqual(top_n_indices(scores, 3).tolist(), [1, 2, 4])
+        self.assertEqual(top_n_indices(scores, 10, exclude=np.array([1, 2])).tolist(), [4, 3, 0])
+
+    def test_block_matches_single_user_scoring(self):
+        rng = np.random.default_rng(2)
+        user_factors = rng.normal(size=(6, 8))
+        user_bias = rng.normal(size=6)
+        scores = predict_score_block(
+            user_factors, self.item_factors, user_bias=user_bias, item_bias=self.item_bias,
+            global_mean=3.5, rating_scale=(1, 5)
+        )
+        exclude = {0: [3, 4], 2: [0], 5: list(range(45))}
+        expected = []
+        for row in range(6):
+            row_scores = predict_scores(
+                user_factors[row], self.item_factors, user_bias=user_bias[row],
+                item_bias=self.item_bias, global_mean=3.5, rating_scale=(1, 5)
+            )
+            np.testing.assert_allclose(scores[row], row_scores)
+            expected.append(top_n_indices(row_scores, 10, exclude=np.array(exclude.get(row, []))))
+
+        exclude_rows = np.array([row for row, items in exclude.items() for _ in items])
+        exclude_cols = np.array([item for items in exclude.values() for item in items])
+        top = top_n_indices_block(scores, 10, exclude_rows=exclude_rows, exclude_cols=exclude_cols)
+        self.assertEqual([row.tolist() for row in top], [row.tolist() for row in expected])
+        self.assertEqual(len(top[5]), 5)
+
+    def test_fold_in_recovers_user_factors_and_bias(self):
+        user_bias = 0.4
+        ratings = 3.5 + user_bias + self.item_bias + self.item_factors @ self.user_factors
+        factors, bias = fold_in_user(
+            self.item_factors, ratings, item_bias=self.item_bias, global_mean=3.5, reg=1e-9
+        )
+        np.testing.assert_allclose(factors, self.user_factors, atol=1e-6)
+        self.assertAlmostEqual(bias, user_bias, places=6)
+
+        factors, bias = fold_in_user(self.item_factors, self.item_factors @ self.user_factors, reg=1e-9)
+        np.testing.assert_allclose(factors, self.user_factors, atol=1e-6)
+        self.assertEqual(bias, 0.0)
+
+
+class VectorizedRecommendationTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = RecommendationEngine(model_type='svd', min_ratings_per_user=1, svd_n_factors=8)
+        cls.engine.train(make_ratings(), test_size=0)
+
+    def test_recommend_for_user_matches_per_item_predictions(self):
+        for user_id in (1, 2, 3):
+            inner_id = self.engine.trainset.to_inner_uid(user_id)
+            expected = self.engine._recommend_by_prediction(user_id, inner_id, 10)
+            recommendations = self.engine.recommend_for_user(user_id, 10)
+            self.assertEqual([isbn for isbn, _ in recommendations], [isbn for isbn, _ in expected])
+            for (_, score), (_, expected_score) in zip(recommendations, expected):
+                self.assertAlmostEqual(score, expected_score, places=4)
+
+    def test_recommend_for_users_matches_single_user_path(self):
+        user_ids = list(range(1, 31)) + [999]
+        recommendations = dict(self.engine.recommend_for_users(user_ids, 10, block_size=4))
+        self.assertEqual(sorted(recommendations), list(range(1, 31)))
+        for user_id in (1, 17, 30):
+            expected = self.engine.recommend_for_user(user_id, 10)
+            self.assertEqual([isbn for isbn, _ in recommendations[user_id]], [isbn for isbn, _ in expected])
+            for (_, score), (_, expected_score) in zip(recommendations[user_id], expected):
+                self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_fold_in_excludes_rated_and_ignores_unknown_items(self):
+        ratings = [('9780000000001', 5), ('9780000000002', 2), ('unknown', 4)]
+        recommendations = self.engine.recommend_from_ratings(ratings, 40)
+        self.assertEqual(len(recommendations), self.engine.trainset.n_items - 2)
+        self.assertFalse({'9780000000001', '9780000000002'} & {isbn for isbn, _ in recommendations})
+        self.assertEqual(self.engine.recommend_from_ratings([('unknown', 4)], 10), [])
+
+    def test_rated_and_unknown_users(self):
+        rated = {
+            isbn for isbn in self.engine.full_ratings_df.loc[
+                self.engine.full_ratings_df['user_id'] == 1, 'isbn13'
+            ]
+        }
+        self.assertFalse(rated & {isbn for isbn, _ in self.engine.recommend_for_user(1, 40)})
+        self.assertEqual(self.engine.recommend_for_user(999, 10), [])
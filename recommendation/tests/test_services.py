@@ -0,0 +1,151 @@
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from books.models import Book, BookRating
+from recommendation.models import RecommendationModel, UserRatingStats, UserRecommendation
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.services import RecommendationService, exclude_rated
+
+
+class RatingsExtractionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='password')
+            for i in range(3)
+        ]
+        self.books = [Book.objects.create(isbn13=f'978000000000{i}', title=f'Book {i}') for i in range(3)]
+        self.ratings = {
+            (self.users[0].id, self.books[0].isbn13): 5.0,
+            (self.users[0].id, self.books[1].isbn13): 3.5,
+            (self.users[1].id, self.books[1].isbn13): 4.0,
+            (self.users[2].id, self.books[2].isbn13): 1.0,
+            (self.users[2].id, self.books[0].isbn13): 2.5,
+        }
+        for (user_id, isbn), rate in self.ratings.items():
+            BookRating.objects.create(user_id=user_id, book_id=isbn, rate=rate)
+
+    def test_streamed_dataframe_has_every_rating_in_compact_dtypes(self):
+        ratings_df = RecommendationService.get_ratings_dataframe(chunk_size=2, use_snapshot=False)
+
+        self.assertEqual(ratings_df['user_id'].dtype, np.int32)
+        self.assertEqual(ratings_df['isbn13'].dtype, 'category')
+        self.assertEqual(ratings_df['rate'].dtype, np.float32)
+        self.assertEqual(
+            {(user_id, isbn): rate for user_id, isbn, rate in ratings_df.itertuples(index=False)},
+            self.ratings
+        )
+
+    def test_timestamps_are_included_on_request(self):
+        ratings_df = RecommendationService.get_ratings_dataframe(include_timestamps=True, use_snapshot=False)
+        self.assertEqual(len(ratings_df), len(self.ratings))
+        self.assertEqual(str(ratings_df['created_at'].dt.tz), 'UTC')
+
+    def test_empty_table(self):
+        BookRating.objects.all().delete()
+        ratings_df = RecommendationService.get_ratings_dataframe(use_snapshot=False)
+        self.assertTrue(ratings_df.empty)
+        self.assertEqual(list(ratings_df.columns), ['user_id', 'isbn13', 'rate'])
+
+
+@override_settings(RECOMMENDATION_RERANK_POOL_SIZE=0)
+class RatedBooksExclusionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='password')
+            for i in range(6)
+        ]
+        self.books = [Book.objects.create(isbn13=f'97800000000{i:02d}', title=f'Book {i}') for i in range(12)]
+
+        # The last two books are only rated after training
+        rng = np.random.default_rng(0)
+        rows = [
+            (user.id, self.books[i].isbn13, float(rng.integers(1, 6)))
+            for user in self.users
+            for i in rng.choice(10, size=6, replace=False)
+        ]
+        engine = RecommendationEngine(model_type='svd', min_ratings_per_user=1, svd_n_factors=4)
+        engine.train(pd.DataFrame(rows, columns=['user_id', 'isbn13', 'rate']), test_size=0)
+        self.engine = engine.to_serving_model()
+        for user_id, isbn, rate in rows:
+            BookRating.objects.create(user_id=user_id, book_id=isbn, rate=rate)
+        self.model_record = RecommendationModel.objects.create(model_type='svd', artifact_path='svd_test')
+
+        # The first user rates a new book after the model was trained
+        self.stale_user = self.users[0]
+        BookRating.objects.create(user=self.stale_user, book=self.books[10], rate=5)
+        UserRatingStats.objects.create(
+            user=self.stale_user, rating_count=7, last_rated_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        patcher = mock.patch.object(
+            RecommendationService, 'load_recommendation_model',
+            return_value=(self.engine, self.model_record)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rated(self, user):
+        return set(BookRating.objects.filter(user=user).values_list('book_id', flat=True))
+
+    def recommended(self, user):
+        return set(UserRecommendation.objects.filter(user=user).values_list('book_id', flat=True))
+
+    def test_exclude_rated(self):
+        recommendations = [('a', 4.5), ('b', 4.0), ('c', 3.0)]
+        self.assertEqual(exclude_rated(recommendations, [('b', 5.0)]), [('a', 4.5), ('c', 3.0)])
+        self.assertEqual(exclude_rated(recommendations, []), recommendations)
+
+    def test_user_who_rated_since_training_is_folded_in(self):
+        with mock.patch.object(self.engine, 'recommend_from_ratings', wraps=self.engine.recommend_from_ratings) as fold_in:
+            RecommendationService.generate_recommendations_for_user(self.stale_user.id, n_recommendations=12)
+        self.assertIn((self.books[10].isbn13, 5.0), fold_in.call_args.args[0])
+        recommended = self.recommended(self.stale_user)
+        self.assertTrue(recommended)
+        self.assertFalse(recommended & self.rated(self.stale_user))
+
+    def test_known_user_is_scored_by_the_model(self):
+        user = self.users[1]
+        with mock.patch.object(self.engine, 'recommend_from_ratings') as fold_in:
+            RecommendationService.generate_recommendations_for_user(user.id, n_recommendations=12)
+        fold_in.assert_not_called()
+        self.assertEqual(self.recommended(user), set(self.engine.item_ids.tolist()) - self.rated(user))
+
+    def test_batch_never_recommends_rated_books(self):
+        RecommendationService.generate_recommendations_for_users(
+            [user.id for user in self.users], n_recommendations=12, model_id=self.model_record.id
+        )
+        for user in self.users:
+            recommended = self.recommended(user)
+            self.assertTrue(recommended)
+            self.assertFalse(recommended & self.rated(user))
+
+    def test_all_users_fold_in_and_popularity_fallback(self):
+        # A newcomer who only rated books the model has never seen cannot be folded in
+        newcomer = get_user_model().objects.create_user(
+            username='newcomer', email='newcomer@example.com', password='password'
+        )
+        for book in self.books[10:]:
+            BookRating.objects.create(user=newcomer, book=book, rate=4)
+        popular = {newcomer.id: [(self.books[9].isbn13, 1.0)]}
+
+        with mock.patch.object(self.engine, 'recommend_from_ratings', wraps=self.engine.recommend_from_ratings) as fold_in, \
+                mock.patch('recommendation.services.popular_recommendations_for_users', return_value=popular) as popularity:
+            RecommendationService.generate_recommendations_for_all_users(
+                n_recommendations=12, model_id=self.model_record.id, min_ratings=2
+            )
+
+        self.assertTrue(any((self.books[10].isbn13, 5.0) in call.args[0] for call in fold_in.call_args_list))
+        self.assertEqual(popularity.call_args.args[0], [newcomer.id])
+        for user in self.users:
+            recommended = self.recommended(user)
+            self.assertTrue(recommended)
+            self.assertFalse(recommended & self.rated(user))
+        recommendation = UserRecommendation.objects.get(user=newcomer)
+        self.assertEqual(recommendation.book_id, self.books[9].isbn13)
+        self.assertIsNone(recommendation.model)
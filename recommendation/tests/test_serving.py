@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.serving import (
+    ARTIFACT_ARRAYS, ARTIFACT_META_FILE, OPTIONAL_ARTIFACT_ARRAYS, ServingModel
+)
+from recommendation.tests.utils import make_ratings
+
+
+class ServingModelTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.engine = RecommendationEngine(model_type='svd', min_ratings_per_user=1, svd_n_factors=8)
+        cls.engine.train(make_ratings(), test_size=0)
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'svd_artifact')
+        self.model = ServingModel.from_engine(self.engine)
+
+    def test_save_load_round_trip(self):
+        self.model.save(self.path)
+        loaded = ServingModel.load(self.path)
+
+        for name in ARTIFACT_ARRAYS:
+            self.assertIsInstance(getattr(loaded, name), np.memmap)
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(self.model, name))
+        for name in OPTIONAL_ARTIFACT_ARRAYS:
+            self.assertIsNone(getattr(loaded, name))
+        self.assertEqual(loaded.model_type, 'svd')
+        self.assertEqual(loaded.rating_scale, (1, 5))
+        self.assertEqual(loaded.global_mean, self.model.global_mean)
+        self.assertEqual(loaded.reg, self.model.reg)
+
+        for user_id in (1, 15, 30):
+            self.assertEqual(loaded.recommend_for_user(user_id, 10), self.model.recommend_for_user(user_id, 10))
+        ratings = [('9780000000001', 5), ('9780000000002', 1), ('9780000000003', 4)]
+        self.assertEqual(loaded.recommend_from_ratings(ratings, 10), self.model.recommend_from_ratings(ratings, 10))
+
+    def test_round_trip_keeps_optional_indexes(self):
+        self.model.build_item_neighbors(k=5).build_ann_index(n_candidates=10, n_lists=4)
+        self.model.save(self.path)
+        loaded = ServingModel.load(self.path, mmap_mode=None)
+
+        for name in OPTIONAL_ARTIFACT_ARRAYS:
+            np.testing.assert_array_equal(getattr(loaded, name), getattr(self.model, name))
+        self.assertEqual(loaded.ann_candidates, 10)
+        self.assertEqual(loaded.similar_items('9780000000001', 5), self.model.similar_items('9780000000001', 5))
+        self.assertEqual(loaded.recommend_for_user(1, 5), self.model.recommend_for_user(1, 5))
+
+    def test_serving_model_matches_engine(self):
+        self.assertEqual(self.model.n_users, 30)
+        self.assertEqual(self.model.n_items, self.engine.trainset.n_items)
+        self.assertEqual(self.model.recommend_for_user(7, 10), self.engine.recommend_for_user(7, 10))
+        self.assertIsNone(self.model.user_index(999))
+        self.assertIsNone(self.model.item_index('unknown'))
+        self.assertEqual(self.model.recommend_for_user(999, 10), [])
+
+    def test_rejects_unknown_format_version(self):
+        self.model.save(self.path)
+        meta_path = os.path.join(self.path, ARTIFACT_META_FILE)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['format_version'] += 1
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        with self.assertRaises(ValueError):
+            ServingModel.load(self.path)
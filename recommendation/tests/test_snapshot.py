@@ -0,0 +1,100 @@
+import os
+import tempfile
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from books.models import Book, BookRating
+from recommendation.models import RatingChangeLog
+from recommendation.snapshot import RatingsSnapshot, read_ratings, refresh_ratings_snapshot
+
+
+def make_snapshot(rate_ids, user_ids, isbns, rates):
+    codes = {isbn: code for code, isbn in enumerate(dict.fromkeys(isbns))}
+    return RatingsSnapshot(
+        np.array(rate_ids, dtype=np.int64), np.array(user_ids, dtype=np.int32),
+        np.array([codes[isbn] for isbn in isbns], dtype=np.int32), np.array(list(codes), dtype=str),
+        np.array(rates, dtype=np.float32), np.zeros(len(rate_ids))
+    )
+
+
+def rows(snapshot):
+    return sorted(
+        (rate_id, user_id, isbn, rate)
+        for rate_id, user_id, isbn, rate in zip(
+            snapshot.rate_ids.tolist(), snapshot.user_ids.tolist(),
+            snapshot.isbns[snapshot.isbn_codes].tolist(), snapshot.rates.tolist()
+        )
+    )
+
+
+class RatingsSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.snapshot = make_snapshot([1, 2, 3], [1, 1, 2], ['a', 'b', 'a'], [5, 4, 3])
+
+    def test_append_merges_isbn_dictionaries(self):
+        merged = self.snapshot.append(make_snapshot([4, 5], [3, 3], ['c', 'a'], [2, 1]))
+        self.assertEqual(merged.isbns.tolist(), ['a', 'b', 'c'])
+        self.assertEqual(rows(merged), [
+            (1, 1, 'a', 5), (2, 1, 'b', 4), (3, 2, 'a', 3), (4, 3, 'c', 2), (5, 3, 'a', 1)
+        ])
+
+    def test_without_drops_ratings(self):
+        self.assertEqual(rows(self.snapshot.without([2, 9])), [(1, 1, 'a', 5), (3, 2, 'a', 3)])
+
+    def test_save_load_round_trip(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = os.path.join(tmp_dir.name, 'snapshot', 'ratings.npz')
+        self.snapshot.max_rate_id = 3
+        self.snapshot.save(path)
+
+        loaded = RatingsSnapshot.load(path)
+        self.assertEqual(rows(loaded), rows(self.snapshot))
+        self.assertEqual(loaded.max_rate_id, 3)
+        self.assertIsNone(RatingsSnapshot.load(os.path.join(tmp_dir.name, 'missing.npz')))
+
+    def test_dataframe_drops_unused_isbns(self):
+        ratings_df = self.snapshot.without([2]).to_dataframe(include_timestamps=True)
+        self.assertEqual(list(ratings_df['isbn13'].cat.categories), ['a'])
+        self.assertEqual(list(ratings_df.columns), ['user_id', 'isbn13', 'rate', 'created_at'])
+
+
+# Without an overlap window only the rate_id mark and the change log find changed ratings
+@override_settings(RECOMMENDATION_SNAPSHOT_OVERLAP_SECONDS=0)
+class RefreshSnapshotTests(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'ratings_snapshot.npz')
+
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='password')
+            for i in range(3)
+        ]
+        self.books = [Book.objects.create(isbn13=f'978000000000{i}', title=f'Book {i}') for i in range(4)]
+        self.ratings = [
+            BookRating.objects.create(user=user, book=book, rate=(i + j) % 5 + 1)
+            for i, user in enumerate(self.users) for j, book in enumerate(self.books[:3])
+        ]
+
+    def test_incremental_refresh_matches_full_rebuild(self):
+        snapshot = refresh_ratings_snapshot(self.path)
+        self.assertEqual(len(snapshot), 9)
+
+        BookRating.objects.create(user=self.users[0], book=self.books[3], rate=2)
+        self.ratings[1].rate = 1
+        self.ratings[1].save()
+        self.ratings[4].delete()
+        self.assertEqual(RatingChangeLog.objects.count(), 2)
+
+        refreshed = refresh_ratings_snapshot(self.path)
+        self.assertEqual(rows(refreshed), rows(read_ratings(BookRating.objects.all())))
+        self.assertEqual(len(np.unique(refreshed.rate_ids)), len(refreshed))
+        self.assertEqual(refreshed.max_rate_id, BookRating.objects.order_by('-rate_id').first().rate_id)
+        self.assertEqual(rows(RatingsSnapshot.load(self.path)), rows(refreshed))
+
+    def test_full_refresh_ignores_the_stored_snapshot(self):
+        refresh_ratings_snapshot(self.path)
+        BookRating.objects.all().delete()
+        self.assertEqual(len(refresh_ratings_snapshot(self.path, full=True)), 0)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from django.test import SimpleTestCase
+from recommendation.serving import ServingModel
+from recommendation.tests.utils import make_ratings
+from recommendation.tuning import build_search_space, is_better, run_search
+
+
+class SearchSpaceTests(SimpleTestCase):
+    param_grid = {
+        'model_type': ['svd', 'knn'],
+        'svd_n_factors': [8, 16],
+        'svd_n_epochs': [5, 10],
+        'knn_k': [10, 20, 40],
+    }
+
+    def test_grid_combines_only_the_model_types_params(self):
+        candidates = build_search_space(self.param_grid, base_params={'min_ratings_per_user': 1})
+        self.assertEqual(len(candidates), 4 + 3)
+        self.assertIn(
+            {'min_ratings_per_user': 1, 'model_type': 'svd', 'svd_n_factors': 16, 'svd_n_epochs': 5},
+            candidates
+        )
+        self.assertIn({'min_ratings_per_user': 1, 'model_type': 'knn', 'knn_k': 40}, candidates)
+
+    def test_random_search_samples_reproducibly(self):
+        grid = build_search_space(self.param_grid)
+        sampled = build_search_space(self.param_grid, search='random', n_iter=3, random_state=7)
+        self.assertEqual(len(sampled), 3)
+        self.assertTrue(all(candidate in grid for candidate in sampled))
+        self.assertEqual(sampled, build_search_space(self.param_grid, search='random', n_iter=3, random_state=7))
+        self.assertEqual(len(build_search_space(self.param_grid, search='random', n_iter=100)), len(grid))
+
+    def test_rejects_unknown_search_and_model_type(self):
+        with self.assertRaises(ValueError):
+            build_search_space(self.param_grid, search='bayesian')
+        with self.assertRaises(ValueError):
+            build_search_space({'model_type': ['nmf']})
+
+    def test_is_better(self):
+        self.assertTrue(is_better(0.9, None, 'rmse'))
+        self.assertTrue(is_better(0.8, 0.9, 'rmse'))
+        self.assertFalse(is_better(0.95, 0.9, 'mae'))
+        self.assertTrue(is_better(0.3, 0.2, 'ndcg_at_k'))
+        self.assertFalse(is_better(None, 0.2, 'ndcg_at_k'))
+
+
+class RunSearchTests(SimpleTestCase):
+    def test_trains_every_candidate_and_writes_its_model(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        candidates = build_search_space(
+            {'model_type': ['svd', 'knn'], 'svd_n_factors': [4, 8], 'knn_k': [10]},
+            base_params={'min_ratings_per_user': 1}
+        )
+
+        results = run_search(make_ratings(), candidates, tmp_dir.name, n_jobs=2)
+
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        for candidate, result in zip(candidates, results):
+            self.assertEqual(result['params']['model_type'], candidate['model_type'])
+            self.assertIn('rmse', result['metrics'])
+        self.assertEqual(results[1]['params']['svd_n_factors'], 8)
+        model = ServingModel.load(os.path.join(tmp_dir.name, results[0]['artifact_path']))
+        self.assertEqual(model.item_factors.shape[1], 4)
+        self.assertTrue(os.path.exists(os.path.join(tmp_dir.name, results[2]['model_file'])))
+
+    def test_no_candidates(self):
+        self.assertEqual(run_search(make_ratings(), [], '/nonexistent'), [])
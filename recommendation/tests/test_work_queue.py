@@ -0,0 +1,184 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from recommendation.models import PendingRecommendationUpdate, UserRatingStats
+from recommendation.work_queue import (
+    QUEUE_SCHEDULED_KEY, enqueue_recommendation_update, finish_queue_processing,
+    process_pending_updates, record_rating_change, schedule_queue_processing
+)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_users(count):
+    User = get_user_model()
+    return [
+        User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='password')
+        for i in range(count)
+    ]
+
+
+@override_settings(RECOMMENDATION_RATING_THRESHOLD=3)
+class RecordRatingChangeTests(TestCase):
+    def setUp(self):
+        self.user = create_users(1)[0]
+        patcher = mock.patch('recommendation.work_queue.schedule_queue_processing')
+        self.schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_queues_user_once_threshold_is_reached(self):
+        self.assertFalse(record_rating_change(self.user.id, 1))
+        self.assertFalse(record_rating_change(self.user.id, 1))
+        self.assertFalse(PendingRecommendationUpdate.objects.exists())
+
+        self.assertTrue(record_rating_change(self.user.id, 1))
+        self.assertTrue(PendingRecommendationUpdate.objects.filter(user=self.user).exists())
+        self.assertEqual(UserRatingStats.objects.get(user=self.user).rating_count, 3)
+        self.schedule.assert_called_once_with()
+
+    def test_repeat_event_only_pushes_back_the_deadline(self):
+        for _ in range(3):
+            record_rating_change(self.user.id, 1)
+        entry = PendingRecommendationUpdate.objects.get(user=self.user)
+
+        self.assertFalse(record_rating_change(self.user.id, 1))
+        updated = PendingRecommendationUpdate.objects.get(user=self.user)
+        self.assertEqual(updated.requested_at, entry.requested_at)
+        self.assertGreater(updated.updated_at, entry.updated_at)
+        self.assertEqual(UserRatingStats.objects.get(user=self.user).rating_count, 4)
+        self.schedule.assert_called_once_with()
+
+    def test_updated_rating_does_not_queue(self):
+        UserRatingStats.objects.create(user=self.user, rating_count=5)
+
+        self.assertFalse(record_rating_change(self.user.id, 0))
+        self.assertEqual(UserRatingStats.objects.get(user=self.user).rating_count, 5)
+        self.assertFalse(PendingRecommendationUpdate.objects.exists())
+        self.schedule.assert_not_called()
+
+    def test_deleted_rating_lowers_the_count_without_queueing(self):
+        last_rated_at = timezone.now() - timedelta(days=1)
+        UserRatingStats.objects.create(user=self.user, rating_count=4, last_rated_at=last_rated_at)
+
+        self.assertFalse(record_rating_change(self.user.id, -1))
+        stats = UserRatingStats.objects.get(user=self.user)
+        self.assertEqual(stats.rating_count, 3)
+        self.assertEqual(stats.last_rated_at, last_rated_at)
+        self.assertFalse(PendingRecommendationUpdate.objects.exists())
+
+    def test_deleted_rating_of_untracked_user(self):
+        self.assertFalse(record_rating_change(self.user.id, -1))
+        stats = UserRatingStats.objects.get(user=self.user)
+        self.assertEqual(stats.rating_count, 0)
+        self.assertIsNone(stats.last_rated_at)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RECOMMENDATION_QUEUE_DEBOUNCE_SECONDS=30)
+class QueueSchedulingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('recommendation.tasks.process_recommendation_queue_task.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scheduling_is_single_flight(self):
+        self.assertTrue(schedule_queue_processing())
+        self.assertFalse(schedule_queue_processing())
+        self.apply_async.assert_called_once_with(countdown=30, retry=False)
+
+    def test_broker_failure_releases_the_flag(self):
+        self.apply_async.side_effect = ConnectionError('broker down')
+        self.assertFalse(schedule_queue_processing())
+        self.assertIsNone(cache.get(QUEUE_SCHEDULED_KEY))
+
+        self.apply_async.side_effect = None
+        self.assertTrue(schedule_queue_processing())
+
+    def test_finish_reschedules_while_entries_remain(self):
+        user = create_users(1)[0]
+        PendingRecommendationUpdate.objects.create(user=user)
+
+        schedule_queue_processing()
+        finish_queue_processing(processed=5)
+        self.assertEqual(self.apply_async.call_args.kwargs['countdown'], 0)
+
+        finish_queue_processing(processed=0)
+        self.assertEqual(self.apply_async.call_args.kwargs['countdown'], 30)
+        self.assertEqual(self.apply_async.call_count, 3)
+
+    def test_finish_releases_the_flag_on_an_empty_queue(self):
+        schedule_queue_processing()
+        finish_queue_processing(processed=1)
+        self.assertIsNone(cache.get(QUEUE_SCHEDULED_KEY))
+        self.assertEqual(self.apply_async.call_count, 1)
+
+
+@override_settings(RECOMMENDATION_QUEUE_DEBOUNCE_SECONDS=30, RECOMMENDATION_QUEUE_CLAIM_TIMEOUT_SECONDS=600)
+class ProcessPendingUpdatesTests(TestCase):
+    def setUp(self):
+        self.users = create_users(3)
+        patcher = mock.patch(
+            'recommendation.services.RecommendationService.generate_recommendations_for_users'
+        )
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('recommendation.work_queue.schedule_queue_processing')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queue(self, user, age=60, claimed_age=None):
+        now = timezone.now()
+        return PendingRecommendationUpdate.objects.create(
+            user=user,
+            requested_at=now - timedelta(seconds=age),
+            updated_at=now - timedelta(seconds=age),
+            claimed_at=now - timedelta(seconds=claimed_age) if claimed_age is not None else None
+        )
+
+    def processed_users(self):
+        return self.generate.call_args.args[0]
+
+    def test_waits_for_the_debounce_window(self):
+        self.queue(self.users[0], age=5)
+        self.assertEqual(process_pending_updates(), (0, True))
+        self.generate.assert_not_called()
+
+    def test_refreshes_and_removes_settled_entries(self):
+        self.queue(self.users[0])
+        self.assertEqual(process_pending_updates(n_recommendations=5), (1, False))
+        self.assertEqual(self.processed_users(), [self.users[0].id])
+        self.assertEqual(self.generate.call_args.kwargs['n_recommendations'], 5)
+        self.assertFalse(PendingRecommendationUpdate.objects.exists())
+
+    def test_claims_oldest_entries_first(self):
+        for age, user in zip((60, 180, 120), self.users):
+            self.queue(user, age=age)
+        self.assertEqual(process_pending_updates(batch_size=2), (2, True))
+        self.assertEqual(self.processed_users(), [self.users[1].id, self.users[2].id])
+
+    def test_skips_claimed_entries_until_abandoned(self):
+        self.queue(self.users[0], claimed_age=10)
+        self.queue(self.users[1], claimed_age=900)
+        self.assertEqual(process_pending_updates(), (1, True))
+        self.assertEqual(self.processed_users(), [self.users[1].id])
+
+    def test_failure_releases_the_claims(self):
+        self.queue(self.users[0])
+        self.generate.side_effect = RuntimeError('model missing')
+        with self.assertRaises(RuntimeError):
+            process_pending_updates()
+        entry = PendingRecommendationUpdate.objects.get(user=self.users[0])
+        self.assertIsNone(entry.claimed_at)
+
+    def test_keeps_entries_of_users_who_rated_during_the_refresh(self):
+        self.queue(self.users[0])
+        self.queue(self.users[1])
+        self.generate.side_effect = lambda user_ids, **kwargs: enqueue_recommendation_update(self.users[0].id)
+
+        self.assertEqual(process_pending_updates(), (2, True))
+        entry = PendingRecommendationUpdate.objects.get()
+        self.assertEqual(entry.user, self.users[0])
+        self.assertIsNone(entry.claimed_at)
@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+
+
+def make_ratings(n_users=30, n_items=40, per_user=15, seed=0):
+    """
+    Random ratings DataFrame in the format of RecommendationService.get_ratings_dataframe
+    """
+    rng = np.random.default_rng(seed)
+    rows = [
+        (user_id, f'978{item:010d}', int(rng.integers(1, 6)))
+        for user_id in range(1, n_users + 1)
+        for item in rng.choice(n_items, size=per_user, replace=False)
+    ]
+    return pd.DataFrame(rows, columns=['user_id', 'isbn13', 'rate'])
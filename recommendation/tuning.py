@@ -0,0 +1,174 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from .evaluation import LOWER_IS_BETTER
+from .recommendation_engine import RecommendationEngine
+
+logger = logging.getLogger(__name__)
+
+# Hyperparameters that apply to each model type; the others are ignored when building candidates
+MODEL_TYPE_PARAMS = {
+    "svd": ("svd_n_factors", "svd_n_epochs", "svd_reg_all", "svd_lr_all"),
+    "knn": ("knn_k",),
+}
+
+# Set once per worker process by _init_worker and only read afterwards
+_shared_ratings_df = None
+_media_root = None
+_run_name = None
+
+
+def build_search_space(
+    param_grid: dict,
+    search: str = "grid",
+    n_iter: int | None = None,
+    base_params: dict | None = None,
+    random_state: int = 42,
+) -> list[dict]:
+    """
+    Expands a parameter grid into the list of candidate configurations.
+
+    Args:
+        param_grid (dict): Candidate values per hyperparameter, e.g.
+                           {"model_type": ["svd"], "svd_n_factors": [50, 100]}.
+                           Only the hyperparameters of a candidate's model type are combined.
+        search (str): 'grid' for every combination or 'random' for n_iter sampled combinations.
+        n_iter (int | None): Number of candidates sampled by random search.
+        base_params (dict | None): Fixed parameters added to every candidate.
+        random_state (int): Seed of the random search.
+
+    Returns:
+        list[dict]: Keyword arguments for RecommendationEngine, one dict per candidate.
+    """
+    if search not in ("grid", "random"):
+        raise ValueError(f"Unsupported search: {search}. Choose 'grid' or 'random'.")
+
+    candidates = []
+    for model_type in param_grid.get("model_type", ["svd"]):
+        if model_type not in MODEL_TYPE_PARAMS:
+            raise ValueError(f"Unsupported model type: {model_type}.")
+        keys = [key for key in MODEL_TYPE_PARAMS[model_type] if param_grid.get(key)]
+        for values in itertools.product(*(param_grid[key] for key in keys)):
+            candidate = dict(base_params or {})
+            candidate["model_type"] = model_type
+            candidate.update(zip(keys, values))
+            candidates.append(candidate)
+
+    if search == "random" and n_iter is not None and n_iter < len(candidates):
+        candidates = random.Random(random_state).sample(candidates, n_iter)
+    return candidates
+
+
+def _init_worker(ratings_df, media_root, run_name):
+    global _shared_ratings_df, _media_root, _run_name
+    _shared_ratings_df = ratings_df
+    _media_root = media_root
+    _run_name = run_name
+
+
+def _train_candidate(index: int, params: dict, test_size: float) -> dict:
+    """
+    Trains one candidate on the worker's shared ratings and writes its model files.
+    Runs in a worker process, so it only touches the filesystem and never the database.
+    """
+    # Candidates already run in parallel, so the sparse KNN backend stays in this process
+    engine = RecommendationEngine(**{**params, "knn_n_jobs": 1})
+    metrics = engine.train(_shared_ratings_df, test_size=test_size)
+    result = {"index": index, "params": engine.get_params(), "metrics": metrics}
+    if not metrics:
+        return result
+
+    model_name = f"{engine.model_type}_{_run_name}_candidate{index}"
+    if engine.model_type == "svd":
+        artifact_path = f"recommendation_models/{model_name}"
+        engine.to_serving_model().save(os.path.join(_media_root, artifact_path))
+        result["artifact_path"] = artifact_path
+    else:
+        model_file = f"recommendation_models/{model_name}.pkl"
+        os.makedirs(os.path.join(_media_root, "recommendation_models"), exist_ok=True)
+        with open(os.path.join(_media_root, model_file), "wb") as f:
+            pickle.dump(engine, f)
+        result["model_file"] = model_file
+    return result
+
+
+def run_search(
+    ratings_df,
+    candidates: list[dict],
+    media_root: str,
+    n_jobs: int | None = None,
+    test_size: float = 0.2,
+) -> list[dict]:
+    """
+    Trains and evaluates every candidate in a process pool.
+
+    The ratings DataFrame is handed to each worker once through the pool initializer;
+    with the fork start method the workers share the parent's copy instead of
+    receiving it per candidate. Callers must close database connections before
+    calling this, since forked workers would otherwise inherit them.
+
+    Args:
+        ratings_df (pd.DataFrame): Ratings shared by all candidates.
+        candidates (list[dict]): Candidate configurations from build_search_space.
+        media_root (str): Directory the candidates' model files are written under.
+        n_jobs (int | None): Number of worker processes, all cores by default.
+        test_size (float): Proportion of ratings held out for evaluation.
+
+    Returns:
+        list[dict]: One result per candidate in candidate order with 'params', 'metrics'
+                    (None when training failed), 'error' and the written 'artifact_path'
+                    or 'model_file'.
+    """
+    if not candidates:
+        return []
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(candidates))
+    mp_context = (
+        multiprocessing.get_context("fork")
+        if "fork" in multiprocessing.get_all_start_methods()
+        else None
+    )
+    run_name = datetime.now().strftime("%Y%m%d_%H%M%S")
+    logger.info(f"Evaluating {len(candidates)} candidates with {n_jobs} worker processes")
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(ratings_df, media_root, run_name),
+    ) as executor:
+        futures = {
+            executor.submit(_train_candidate, index, params, test_size): (index, params)
+            for index, params in enumerate(candidates)
+        }
+        for future in as_completed(futures):
+            index, params = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Candidate {index} {params} failed: {e}")
+                result = {"index": index, "params": params, "metrics": None, "error": str(e)}
+            else:
+                logger.info(f"Candidate {index} {result['params']} finished: {result['metrics']}")
+            results.append(result)
+
+    results.sort(key=lambda result: result["index"])
+    return results
+
+
+def is_better(value: float, best: float | None, metric: str) -> bool:
+    """
+    Returns whether a metric value beats the current best value.
+    """
+    if value is None:
+        return False
+    if best is None:
+        return True
+    return value < best if metric in LOWER_IS_BETTER else value > best
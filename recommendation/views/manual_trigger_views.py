@@ -2,7 +2,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from books.models import BookRating
+from recommendation.models import UserRatingStats
 from recommendation.services import RecommendationService
 from recommendation.tasks import generate_recommendations_for_user_task
 
@@ -15,8 +15,10 @@ def trigger_recommendations(request):
     """
     user = request.user
     
-    # Count user ratings
-    user_rating_count = BookRating.objects.filter(user=user).count()
+    # Read the user's maintained rating counter
+    user_rating_count = UserRatingStats.objects.filter(user=user).values_list(
+        'rating_count', flat=True
+    ).first() or 0
     
     # Check if user has enough ratings
     if user_rating_count < 10:
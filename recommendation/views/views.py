@@ -1,11 +1,21 @@
+import os
+import pstats
+from io import StringIO
+
+from django.conf import settings
+from django.http import FileResponse
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
 
 from ..models import RecommendationModel, UserRecommendation
 from ..serializers import RecommendationModelSerializer, UserRecommendationSerializer
 from ..services import RecommendationService
+from ..feed_cache import get_cached_feed, set_cached_feed
+from ..impressions import log_impressions
 from ..tasks import (
     train_recommendation_model_task,
     generate_recommendations_for_user_task,
@@ -30,11 +40,13 @@ class RecommendationModelViewSet(viewsets.ReadOnlyModelViewSet):
         min_ratings = int(request.data.get('min_ratings_per_user', 5))
         n_factors = int(request.data.get('n_factors', 100))
         knn_k = int(request.data.get('knn_k', 40))
+        evaluate = request.data.get('evaluate', False)
+        profile = request.data.get('profile', False)
         async_training = request.data.get('async', True)
         
-        if model_type not in ['svd', 'knn']:
+        if model_type not in ['svd', 'knn', 'als']:
             return Response(
-                {"error": "Invalid model_type. Choose 'svd' or 'knn'"},
+                {"error": "Invalid model_type. Choose 'svd', 'knn' or 'als'"},
                 status=status.HTTP_400_BAD_REQUEST
             )
             
@@ -44,7 +56,9 @@ class RecommendationModelViewSet(viewsets.ReadOnlyModelViewSet):
                 model_type=model_type,
                 min_ratings_per_user=min_ratings,
                 n_factors=n_factors,
-                knn_k=knn_k
+                knn_k=knn_k,
+                evaluate=evaluate,
+                profile=profile
             )
             return Response({"message": "Model training started", "task_id": task.id})
         else:
@@ -53,7 +67,9 @@ class RecommendationModelViewSet(viewsets.ReadOnlyModelViewSet):
                 model_type=model_type,
                 min_ratings_per_user=min_ratings,
                 n_factors=n_factors,
-                knn_k=knn_k
+                knn_k=knn_k,
+                evaluate=evaluate,
+                profile=profile
             )
             
             if model_record:
@@ -71,17 +87,104 @@ class RecommendationModelViewSet(viewsets.ReadOnlyModelViewSet):
         Activate a specific model and deactivate all others
         """
         model = self.get_object()
+        force = request.data.get('force', False)
         
-        # Deactivate all models of the same type
-        RecommendationModel.objects.filter(model_type=model.model_type).update(is_active=False)
+        failures = [] if force else RecommendationService.check_activation_thresholds(model)
+        if failures:
+            return Response(
+                {"error": "Model does not meet the activation thresholds", "failures": failures},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Activate the selected model
-        model.is_active = True
-        model.save()
+        # Deactivate all models of the same type and activate the selected model
+        RecommendationService.activate_model(model, force=True)
         
         serializer = self.get_serializer(model)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def traffic(self, request, pk=None):
+        """
+        Set the share of users this model serves in an A/B test; 0 ends the experiment
+        """
+        model = self.get_object()
+        try:
+            traffic_weight = float(request.data.get('traffic_weight'))
+            RecommendationService.set_traffic_weight(model, traffic_weight)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "traffic_weight must be a number between 0 and 1"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = self.get_serializer(model)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def experiment(self, request):
+        """
+        Impressions and conversions of each served model, optionally since ?since=<ISO datetime>
+        """
+        since = request.query_params.get('since')
+        if since:
+            since = parse_datetime(since)
+            if since is None:
+                return Response(
+                    {"error": "since must be an ISO 8601 datetime"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(RecommendationService.get_experiment_results(since=since))
+    
+    @action(detail=True, methods=['get'])
+    def profile(self, request, pk=None):
+        """
+        Per-stage profile of the model's training and inference runs
+        With ?run=training|inference, the run's cProfile dump (if recorded) is summarised by
+        its top functions; adding &download=1 returns the .prof file itself
+        """
+        model = self.get_object()
+        run = request.query_params.get('run')
+        if not run:
+            return Response(model.profile)
+        
+        cprofile_path = (model.profile or {}).get(run, {}).get('cprofile_path')
+        full_path = os.path.join(settings.MEDIA_ROOT, cprofile_path) if cprofile_path else None
+        if not full_path or not os.path.exists(full_path):
+            return Response(
+                {"error": f"No cProfile dump recorded for the {run} run of this model"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if request.query_params.get('download'):
+            return FileResponse(open(full_path, 'rb'), as_attachment=True,
+                                filename=os.path.basename(full_path))
         
+        try:
+            limit = int(request.query_params.get('limit', 30))
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response(
+                {"error": "limit must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        output = StringIO()
+        pstats.Stats(full_path, stream=output).sort_stats('cumulative').print_stats(limit)
+        return Response({**model.profile[run], "top_functions": output.getvalue()})
+        
+
+class RecommendationCursorPagination(CursorPagination):
+    """
+    Keyset pagination on score, so deep pages cost the same as the first one
+    """
+    ordering = ('-score', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
 
 class UserRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -92,9 +195,41 @@ class UserRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         """
-        Return recommendations for the current user only
+        Return recommendations for the current user only, with their books and authors
+        loaded in the same round trips as the page
+        """
+        return UserRecommendation.objects.filter(user=self.request.user).select_related(
+            'book'
+        ).prefetch_related('book__authors')
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Return all of the current user's recommendations as a plain list
+        Responses are cached per user until the user's recommendations are regenerated
+        and logged as impressions through the impression buffer
+        """
+        data = get_cached_feed(request.user.id, request.query_params, endpoint='list')
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            set_cached_feed(request.user.id, request.query_params, data, endpoint='list')
+        log_impressions(request.user.id, data)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'], pagination_class=RecommendationCursorPagination)
+    def feed(self, request):
+        """
+        Return a cursor-paginated page of the current user's recommendations as
+        {next, previous, results}
+        Pages are cached per user until the user's recommendations are regenerated
+        Each served page is logged as impressions through the impression buffer
         """
-        return UserRecommendation.objects.filter(user=self.request.user)
+        data = get_cached_feed(request.user.id, request.query_params)
+        if data is None:
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            data = self.get_paginated_response(self.get_serializer(page, many=True).data).data
+            set_cached_feed(request.user.id, request.query_params, data)
+        log_impressions(request.user.id, data['results'])
+        return Response(data)
     
     @action(detail=False, methods=['post'])
     def generate(self, request):
@@ -163,6 +298,7 @@ class AdminRecommendationViewSet(viewsets.ViewSet):
         n_recommendations = int(request.data.get('n_recommendations', 10))
         model_id = request.data.get('model_id')
         min_ratings = int(request.data.get('min_ratings', 3))
+        profile = request.data.get('profile', False)
         async_generation = request.data.get('async', True)
         
         if async_generation:
@@ -170,7 +306,8 @@ class AdminRecommendationViewSet(viewsets.ViewSet):
             task = generate_recommendations_for_all_users_task.delay(
                 n_recommendations=n_recommendations,
                 model_id=model_id,
-                min_ratings=min_ratings
+                min_ratings=min_ratings,
+                profile=profile
             )
             return Response({"message": "Recommendation generation for all users started", "task_id": task.id})
         else:
@@ -178,7 +315,8 @@ class AdminRecommendationViewSet(viewsets.ViewSet):
             count = RecommendationService.generate_recommendations_for_all_users(
                 n_recommendations=n_recommendations,
                 model_id=model_id,
-                min_ratings=min_ratings
+                min_ratings=min_ratings,
+                profile=profile
             )
             
             return Response({"message": f"Generated recommendations for multiple users, total count: {count}"})
\ No newline at end of file
@@ -0,0 +1,172 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import PendingRecommendationUpdate, UserRatingStats
+
+logger = logging.getLogger(__name__)
+
+# Cache key held while a queue drain is scheduled or running, so rating events start at
+# most one chain of drain tasks. It is taken by web processes and released by Celery
+# workers, so it is only single-flight with a cache shared between them (REDIS_CACHE_URL);
+# with the per-process local-memory cache every process may schedule its own drain
+QUEUE_SCHEDULED_KEY = 'recommendation_queue:scheduled'
+
+
+def get_rating_threshold():
+    return getattr(settings, 'RECOMMENDATION_RATING_THRESHOLD', 22)
+
+
+def get_debounce_seconds():
+    return getattr(settings, 'RECOMMENDATION_QUEUE_DEBOUNCE_SECONDS', 30)
+
+
+def get_batch_size():
+    return getattr(settings, 'RECOMMENDATION_QUEUE_BATCH_SIZE', 500)
+
+
+def get_claim_timeout_seconds():
+    return getattr(settings, 'RECOMMENDATION_QUEUE_CLAIM_TIMEOUT_SECONDS', 15 * 60)
+
+
+def record_rating_change(user_id, delta):
+    """
+    Apply a rating event to the user's rating counter and queue a recommendation refresh
+    for each new rating once the user has at least RECOMMENDATION_RATING_THRESHOLD ratings,
+    starting with the rating that reaches it
+    delta is +1 for a new rating, -1 for a deleted one and 0 for an updated one; updated and
+    deleted ratings only change the counter
+    Runs a constant number of single-row queries regardless of how many ratings the user has
+    """
+    now = timezone.now()
+    updates = {'rating_count': F('rating_count') + delta}
+    if delta >= 0:
+        updates['last_rated_at'] = now
+
+    if not UserRatingStats.objects.filter(user_id=user_id).update(**updates):
+        try:
+            with transaction.atomic():
+                UserRatingStats.objects.create(
+                    user_id=user_id,
+                    rating_count=max(delta, 0),
+                    last_rated_at=now if delta >= 0 else None
+                )
+        except IntegrityError:
+            # Created concurrently by another event for the same user
+            UserRatingStats.objects.filter(user_id=user_id).update(**updates)
+
+    if delta <= 0:
+        return False
+
+    rating_count = UserRatingStats.objects.filter(user_id=user_id).values_list(
+        'rating_count', flat=True
+    ).first()
+    if rating_count is not None and rating_count >= get_rating_threshold():
+        return enqueue_recommendation_update(user_id)
+    return False
+
+
+def enqueue_recommendation_update(user_id):
+    """
+    Queue a recommendation refresh for a user
+    Events for a user that is already queued only push back its debounce deadline
+    Returns True if a new queue entry was created
+    """
+    now = timezone.now()
+    if PendingRecommendationUpdate.objects.filter(user_id=user_id).update(updated_at=now):
+        return False
+
+    try:
+        with transaction.atomic():
+            PendingRecommendationUpdate.objects.create(user_id=user_id, requested_at=now, updated_at=now)
+    except IntegrityError:
+        return False
+
+    schedule_queue_processing()
+    return True
+
+
+def schedule_queue_processing(countdown=None):
+    """
+    Ask a Celery worker to drain the queue once the debounce window has passed, unless a
+    drain is already scheduled or running
+    The QUEUE_SCHEDULED_KEY flag makes scheduling single-flight: it is taken here and only
+    released by the drain task when it finishes, which then schedules the next drain itself
+    if entries remain. The flag expires after the claim timeout in case the task is lost
+    Queue entries are durable, so if the broker is unavailable they are picked up by the
+    next scheduled run or by the process_recommendation_queue command
+    Returns True if a task was scheduled
+    """
+    if countdown is None:
+        countdown = get_debounce_seconds()
+    if not cache.add(QUEUE_SCHEDULED_KEY, True, countdown + get_claim_timeout_seconds()):
+        return False
+    try:
+        from .tasks import process_recommendation_queue_task
+        process_recommendation_queue_task.apply_async(countdown=countdown, retry=False)
+    except Exception as e:
+        cache.delete(QUEUE_SCHEDULED_KEY)
+        logger.warning(f"Could not schedule recommendation queue processing, updates stay queued: {str(e)}")
+        return False
+    return True
+
+
+def finish_queue_processing(processed):
+    """
+    Release the drain flag at the end of a drain task and schedule the next drain if
+    entries remain: at once if this drain made progress, after the debounce window if it
+    processed nothing or failed
+    The flag is released before looking at the queue, so an entry created meanwhile is
+    either seen here or schedules its own drain
+    """
+    cache.delete(QUEUE_SCHEDULED_KEY)
+    if PendingRecommendationUpdate.objects.exists():
+        schedule_queue_processing(countdown=0 if processed else None)
+
+
+def process_pending_updates(batch_size=None, n_recommendations=10):
+    """
+    Claim a batch of queued users whose last event is older than the debounce window and
+    refresh their recommendations in one pass over the model
+    Entries are only marked as claimed while their users are refreshed and deleted once
+    the refresh succeeded, so users claimed by a worker that crashes or is killed are
+    claimed again after RECOMMENDATION_QUEUE_CLAIM_TIMEOUT_SECONDS. Entries of users who
+    rated again during their refresh are kept for another round
+    Returns (number of users processed, whether queue entries remain)
+    """
+    from .services import RecommendationService  # Import here to avoid circular imports
+
+    batch_size = batch_size or get_batch_size()
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=get_debounce_seconds())
+    abandoned = now - timedelta(seconds=get_claim_timeout_seconds())
+
+    with transaction.atomic():
+        user_ids = list(
+            PendingRecommendationUpdate.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=abandoned), updated_at__lte=cutoff)
+            .order_by('requested_at')
+            .values_list('user_id', flat=True)[:batch_size]
+        )
+        PendingRecommendationUpdate.objects.filter(user_id__in=user_ids).update(claimed_at=now)
+
+    if user_ids:
+        try:
+            RecommendationService.generate_recommendations_for_users(
+                user_ids, n_recommendations=n_recommendations
+            )
+        except Exception:
+            # Release the claims so the users are retried
+            PendingRecommendationUpdate.objects.filter(user_id__in=user_ids, claimed_at=now).update(claimed_at=None)
+            raise
+        claimed = PendingRecommendationUpdate.objects.filter(user_id__in=user_ids, claimed_at=now)
+        claimed.filter(updated_at__lte=now).delete()
+        claimed.update(claimed_at=None)
+
+    remaining = PendingRecommendationUpdate.objects.exists()
+    logger.info(f"Processed recommendation updates for {len(user_ids)} users, entries remaining: {remaining}")
+    return len(user_ids), remaining
@@ -3,7 +3,7 @@ import json
 import time
 import sys
 
-def test_recommendation_trigger(base_url, email, password):
+def trigger_recommendations(base_url, email, password):
     """
     A test client that:
     1. Logs in as a user
@@ -158,12 +158,12 @@ def test_recommendation_trigger(base_url, email, password):
 
 if __name__ == "__main__":
     if len(sys.argv) < 4:
-        print("Usage: python test_recommendation_trigger.py BASE_URL USERNAME PASSWORD")
-        print("Example: python test_recommendation_trigger.py http://localhost:8000 testuser1 password123")
+        print("Usage: python scripts/trigger_recommendations.py BASE_URL USERNAME PASSWORD")
+        print("Example: python scripts/trigger_recommendations.py http://localhost:8000 testuser1 password123")
         sys.exit(1)
         
     base_url = sys.argv[1].rstrip('/')
     username = sys.argv[2]
     password = sys.argv[3]
     
-    test_recommendation_trigger(base_url, username, password)
\ No newline at end of file
+    trigger_recommendations(base_url, username, password)
\ No newline at end of file